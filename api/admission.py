@@ -0,0 +1,112 @@
+"""
+Gridiron Admission Control
+Bounded concurrency gate with queueing deadlines and fast load shedding
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued"""
+
+    def __init__(self, upstream: str, retry_after: float):
+        self.upstream = upstream
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"{upstream} is overloaded, retry after {self.retry_after}s")
+
+
+class AdmissionGate:
+    """
+    Lets at most `concurrency` requests through to an upstream at once and
+    queues the rest. A request is shed up front when the queue is full or the
+    estimated wait already exceeds its deadline, and shed later if it is still
+    waiting when the deadline passes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        max_queue: int,
+        deadline: float,
+        initial_service_time: float = 2.0
+    ):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self._slots = asyncio.Semaphore(concurrency)
+        self._service_time = initial_service_time  # EWMA of time holding a slot
+        self._waits: deque = deque(maxlen=1000)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def estimated_wait(self) -> float:
+        """Expected queueing delay for a request arriving now"""
+        if self.active < self.concurrency:
+            return 0.0
+        return (self.waiting + 1) / self.concurrency * self._service_time
+
+    def _shed(self, retry_after: float) -> Overloaded:
+        self.shed += 1
+        return Overloaded(self.name, retry_after)
+
+    @asynccontextmanager
+    async def admit(self, deadline: Optional[float] = None) -> AsyncIterator[float]:
+        """
+        Hold a slot for the duration of the block.
+        Yields the time left before the deadline, to use as the upstream timeout.
+        """
+        deadline = deadline or self.deadline
+        estimate = self.estimated_wait()
+        if self.waiting >= self.max_queue or estimate > deadline:
+            raise self._shed(estimate)
+
+        self.waiting += 1
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=deadline)
+        except asyncio.TimeoutError:
+            raise self._shed(self.estimated_wait())
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - queued_at
+        self._waits.append(waited)
+        self.admitted += 1
+        self.active += 1
+        started = time.monotonic()
+        try:
+            yield max(deadline - waited, 1.0)
+        finally:
+            self.active -= 1
+            self._slots.release()
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - started)
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))] * 1000, 1)
+
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "deadline_s": self.deadline,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "wait_p50_ms": percentile(0.5),
+            "wait_p99_ms": percentile(0.99),
+            "service_time_ms": round(self._service_time * 1000, 1),
+        }
@@ -0,0 +1,79 @@
+"""
+Gridiron Arrow IPC
+Reads Arrow IPC stream results from the R service into lazy column views
+"""
+
+from collections.abc import Mapping
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optional: without it the R service is asked for JSON
+    pa = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+class ArrowResult(Mapping):
+    """
+    Read-only {column: values} view over an Arrow table, the same shape the
+    JSON transport produces. Columns become Python lists only when read, so
+    callers that touch a few rows (compaction) or a few columns never
+    materialize the rest. One-row tables read as scalars, matching the
+    auto-unboxed JSON from Plumber.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._columns: dict = {}
+
+    def __getitem__(self, name: str):
+        if name not in self._columns:
+            if name not in self.table.column_names:
+                raise KeyError(name)
+            values = self.table.column(name).to_pylist()
+            self._columns[name] = values[0] if len(values) == 1 else values
+        return self._columns[name]
+
+    def __iter__(self):
+        return iter(self.table.column_names)
+
+    def __len__(self) -> int:
+        return self.table.num_columns
+
+    def __repr__(self) -> str:
+        return f"ArrowResult({self.table.num_rows} rows x {self.table.num_columns} columns)"
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    def take(self, rows: list) -> dict:
+        """{column: [values]} for just the given row positions"""
+        return self.table.take(pa.array(rows, type=pa.int64())).to_pydict()
+
+    def to_pydict(self) -> dict:
+        return {name: self[name] for name in self}
+
+    def json_length(self) -> int:
+        """Approximate length of the indented-JSON form, computed inside Arrow"""
+        length = sum(len(name) + 8 for name in self.table.column_names)
+        for column in self.table.columns:
+            if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+                text = column
+                length += 2 * (column.length() - column.null_count)  # quotes
+            else:
+                text = pc.cast(column, pa.string())
+            length += (pc.sum(pc.utf8_length(text)).as_py() or 0) + 4 * column.null_count
+            length += 7 * column.length()  # indent, comma and newline per value
+        return length
+
+
+def read_ipc_stream(body: bytes) -> ArrowResult:
+    """Arrow IPC stream bytes -> ArrowResult (buffers are used in place, not copied)"""
+    reader = pa.ipc.open_stream(pa.py_buffer(body))
+    return ArrowResult(reader.read_all())
@@ -3,17 +3,24 @@ Gridiron Authentication Module
 Google and X (Twitter) OAuth2 + JWT session management
 """
 
+import asyncio
+import hashlib
 import os
 import secrets
-import httpx
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
+from fastapi import HTTPException, Request
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from pydantic import BaseModel
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session as DBSession
 
-from models import User, Session, get_db
+from models import User, Session, AsyncSessionLocal, get_db
+from http_clients import get_http_client
 
 # Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", secrets.token_urlsafe(32))
@@ -32,6 +39,16 @@ TWITTER_REDIRECT_URI = os.getenv("TWITTER_REDIRECT_URI", "http://localhost:8000/
 
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:57432")
 
+# Auth cache: verified tokens until their exp, user records for a short TTL
+AUTH_CACHE_ENABLED = os.getenv("AUTH_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+# Expired/revoked session cleanup
+SESSION_COMPACTION_INTERVAL = float(os.getenv("SESSION_COMPACTION_INTERVAL", "3600"))
+SESSION_COMPACTION_BATCH = int(os.getenv("SESSION_COMPACTION_BATCH", "5000"))
+
 
 # Pydantic models
 class TokenResponse(BaseModel):
@@ -63,19 +80,73 @@ def create_refresh_token(data: dict) -> str:
     """Create a JWT refresh token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    # jti keeps two logins within the same second from minting identical tokens
+    to_encode.update({"exp": expire, "type": "refresh", "jti": secrets.token_urlsafe(16)})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# Auth Cache
+_token_cache: OrderedDict = OrderedDict()  # token -> verified payload
+_user_cache: OrderedDict = OrderedDict()  # user id -> (expires_at, UserInfo)
+_auth_cache_stats = {"token_hits": 0, "token_misses": 0, "user_hits": 0, "user_misses": 0}
+
+
+def _cache_token(token: str, payload: dict) -> None:
+    _token_cache[token] = payload
+    while len(_token_cache) > TOKEN_CACHE_MAX_ENTRIES:
+        _token_cache.popitem(last=False)
+
+
+def _cached_payload(token: str) -> Optional[dict]:
+    """A previously verified payload, as long as the token has not expired since"""
+    payload = _token_cache.get(token)
+    if payload is None:
+        return None
+    if payload.get("exp", 0) <= time.time():
+        del _token_cache[token]
+        return None
+    _token_cache.move_to_end(token)
+    return payload
+
+
+def invalidate_user(user_id: str) -> None:
+    """Drop a cached user record after it changes"""
+    _user_cache.pop(user_id, None)
+
+
+def get_auth_cache_stats() -> dict:
+    return {
+        "enabled": AUTH_CACHE_ENABLED,
+        "tokens": len(_token_cache),
+        "users": len(_user_cache),
+        **_auth_cache_stats
+    }
+
+
+def hash_refresh_token(token: str) -> str:
+    """Fixed-size digest stored and indexed in place of the refresh token"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def verify_token(token: str, expected_type: str = "access") -> Optional[dict]:
     """Verify and decode a JWT token"""
+    if AUTH_CACHE_ENABLED:
+        payload = _cached_payload(token)
+        if payload is not None:
+            _auth_cache_stats["token_hits"] += 1
+            return payload if payload.get("type") == expected_type else None
+        _auth_cache_stats["token_misses"] += 1
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        if payload.get("type") != expected_type:
-            return None
-        return payload
     except JWTError:
         return None
+    
+    if AUTH_CACHE_ENABLED:
+        _cache_token(token, payload)
+    if payload.get("type") != expected_type:
+        return None
+    return payload
 
 
 def get_user_from_token(token: str, db: DBSession) -> Optional[User]:
@@ -109,36 +180,36 @@ def get_google_auth_url(state: str) -> str:
 
 async def exchange_google_code(code: str) -> Optional[dict]:
     """Exchange Google authorization code for tokens"""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "client_id": GOOGLE_CLIENT_ID,
-                "client_secret": GOOGLE_CLIENT_SECRET,
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": GOOGLE_REDIRECT_URI
-            }
-        )
-        
-        if response.status_code != 200:
-            return None
-        
-        return response.json()
+    client = get_http_client("google")
+    response = await client.post(
+        "https://oauth2.googleapis.com/token",
+        data={
+            "client_id": GOOGLE_CLIENT_ID,
+            "client_secret": GOOGLE_CLIENT_SECRET,
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": GOOGLE_REDIRECT_URI
+        }
+    )
+    
+    if response.status_code != 200:
+        return None
+    
+    return response.json()
 
 
 async def get_google_user_info(access_token: str) -> Optional[dict]:
     """Get user info from Google"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://www.googleapis.com/oauth2/v2/userinfo",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        
-        if response.status_code != 200:
-            return None
-        
-        return response.json()
+    client = get_http_client("google")
+    response = await client.get(
+        "https://www.googleapis.com/oauth2/v2/userinfo",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    
+    if response.status_code != 200:
+        return None
+    
+    return response.json()
 
 
 # X (Twitter) OAuth 2.0
@@ -165,99 +236,87 @@ async def exchange_twitter_code(code: str, code_verifier: str) -> Optional[dict]
         f"{TWITTER_CLIENT_ID}:{TWITTER_CLIENT_SECRET}".encode()
     ).decode()
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.twitter.com/2/oauth2/token",
-            headers={
-                "Authorization": f"Basic {credentials}",
-                "Content-Type": "application/x-www-form-urlencoded"
-            },
-            data={
-                "code": code,
-                "grant_type": "authorization_code",
-                "redirect_uri": TWITTER_REDIRECT_URI,
-                "code_verifier": code_verifier
-            }
-        )
-        
-        if response.status_code != 200:
-            return None
-        
-        return response.json()
+    client = get_http_client("twitter")
+    response = await client.post(
+        "https://api.twitter.com/2/oauth2/token",
+        headers={
+            "Authorization": f"Basic {credentials}",
+            "Content-Type": "application/x-www-form-urlencoded"
+        },
+        data={
+            "code": code,
+            "grant_type": "authorization_code",
+            "redirect_uri": TWITTER_REDIRECT_URI,
+            "code_verifier": code_verifier
+        }
+    )
+    
+    if response.status_code != 200:
+        return None
+    
+    return response.json()
 
 
 async def get_twitter_user_info(access_token: str) -> Optional[dict]:
     """Get user info from Twitter"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://api.twitter.com/2/users/me?user.fields=profile_image_url",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        
-        if response.status_code != 200:
-            return None
-        
-        data = response.json()
-        return data.get("data")
+    client = get_http_client("twitter")
+    response = await client.get(
+        "https://api.twitter.com/2/users/me?user.fields=profile_image_url",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    
+    if response.status_code != 200:
+        return None
+    
+    data = response.json()
+    return data.get("data")
 
 
 # User Management
-def create_or_update_user(
-    db: DBSession,
+def _new_user(
     email: str,
     name: Optional[str],
     avatar_url: Optional[str],
     provider: str,
-    provider_id: Optional[str] = None
+    provider_id: Optional[str]
 ) -> User:
-    """Create or update a user after OAuth"""
+    """Build a new User row for a first OAuth login"""
     import uuid
     
-    # Check if user exists
-    user = db.query(User).filter(User.email == email).first()
-    
-    if user:
-        # Update existing user
-        user.last_login = datetime.utcnow()
-        if name:
-            user.name = name
-        if avatar_url:
-            user.avatar_url = avatar_url
-    else:
-        # Create new user
-        user = User(
-            id=str(uuid.uuid4()),
-            email=email,
-            name=name,
-            avatar_url=avatar_url,
-            provider=provider,
-            provider_id=provider_id
-        )
-        db.add(user)
-    
-    db.commit()
-    db.refresh(user)
-    return user
+    return User(
+        id=str(uuid.uuid4()),
+        email=email,
+        name=name,
+        avatar_url=avatar_url,
+        provider=provider,
+        provider_id=provider_id
+    )
 
 
-def create_session_for_user(db: DBSession, user: User) -> TokenResponse:
-    """Create access and refresh tokens for a user"""
+def _record_login(user: User, name: Optional[str], avatar_url: Optional[str]) -> None:
+    """Refresh an existing user's profile on login"""
+    user.last_login = datetime.utcnow()
+    if name:
+        user.name = name
+    if avatar_url:
+        user.avatar_url = avatar_url
+
+
+def _new_session(user: User) -> tuple[Session, TokenResponse]:
+    """Issue access/refresh tokens and the Session row that tracks the refresh token"""
     import uuid
     
     access_token = create_access_token({"sub": user.id, "email": user.email})
     refresh_token = create_refresh_token({"sub": user.id})
     
-    # Store refresh token in database
     session = Session(
         id=str(uuid.uuid4()),
         user_id=user.id,
-        refresh_token=refresh_token,
+        token_hash=hash_refresh_token(refresh_token),
         expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     )
-    db.add(session)
-    db.commit()
     
-    return TokenResponse(
+    tokens = TokenResponse(
         access_token=access_token,
         refresh_token=refresh_token,
         expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
@@ -269,12 +328,48 @@ def create_session_for_user(db: DBSession, user: User) -> TokenResponse:
             "provider": user.provider
         }
     )
+    return session, tokens
+
+
+def create_or_update_user(
+    db: DBSession,
+    email: str,
+    name: Optional[str],
+    avatar_url: Optional[str],
+    provider: str,
+    provider_id: Optional[str] = None
+) -> User:
+    """Create or update a user after OAuth"""
+    # Check if user exists
+    user = db.query(User).filter(User.email == email).first()
+    
+    if user:
+        _record_login(user, name, avatar_url)
+        invalidate_user(user.id)
+    else:
+        user = _new_user(email, name, avatar_url, provider, provider_id)
+        db.add(user)
+    
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def create_session_for_user(db: DBSession, user: User) -> TokenResponse:
+    """Create access and refresh tokens for a user"""
+    session, tokens = _new_session(user)
+    
+    # Store refresh token in database
+    db.add(session)
+    db.commit()
+    
+    return tokens
 
 
 def revoke_session(db: DBSession, refresh_token: str) -> bool:
     """Revoke a session by refresh token"""
     session = db.query(Session).filter(
-        Session.refresh_token == refresh_token,
+        Session.token_hash == hash_refresh_token(refresh_token),
         Session.is_revoked == False
     ).first()
     
@@ -284,3 +379,207 @@ def revoke_session(db: DBSession, refresh_token: str) -> bool:
         return True
     
     return False
+
+
+# Async variants (used by request handlers so DB work never blocks the event loop)
+async def create_or_update_user_async(
+    db: AsyncSession,
+    email: str,
+    name: Optional[str],
+    avatar_url: Optional[str],
+    provider: str,
+    provider_id: Optional[str] = None
+) -> User:
+    """Create or update a user after OAuth"""
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
+    
+    if user:
+        _record_login(user, name, avatar_url)
+        invalidate_user(user.id)
+    else:
+        user = _new_user(email, name, avatar_url, provider, provider_id)
+        db.add(user)
+    
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+async def create_session_for_user_async(db: AsyncSession, user: User) -> TokenResponse:
+    """Create access and refresh tokens for a user"""
+    session, tokens = _new_session(user)
+    
+    db.add(session)
+    await db.commit()
+    
+    return tokens
+
+
+async def revoke_session_async(db: AsyncSession, refresh_token: str) -> bool:
+    """Revoke a session by refresh token"""
+    result = await db.execute(
+        update(Session)
+        .where(Session.token_hash == hash_refresh_token(refresh_token), Session.is_revoked == False)
+        .values(is_revoked=True)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def rotate_session_async(db: AsyncSession, refresh_token: str) -> Optional[TokenResponse]:
+    """
+    Exchange a refresh token for a new token pair, retiring the old session row.
+    
+    Returns None if the token is invalid, expired, revoked or already rotated;
+    of two concurrent refreshes with the same token only one succeeds.
+    """
+    payload = verify_token(refresh_token, expected_type="refresh")
+    if not payload or not payload.get("sub"):
+        return None
+    
+    retired = await db.execute(
+        delete(Session).where(
+            Session.token_hash == hash_refresh_token(refresh_token),
+            Session.user_id == payload["sub"],
+            Session.is_revoked == False,
+            Session.expires_at > datetime.utcnow()
+        )
+    )
+    if retired.rowcount != 1:
+        await db.rollback()
+        return None
+    
+    user = await db.get(User, payload["sub"])
+    if not user:
+        await db.rollback()
+        return None
+    
+    session, tokens = _new_session(user)
+    db.add(session)
+    await db.commit()
+    return tokens
+
+
+async def compact_sessions(batch_size: int = SESSION_COMPACTION_BATCH) -> int:
+    """
+    Delete expired and revoked sessions in batches, committing between
+    batches so no single transaction holds the write lock for long.
+    """
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            stale_ids = (
+                select(Session.id)
+                .where(or_(Session.expires_at <= datetime.utcnow(), Session.is_revoked == True))
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = await db.execute(delete(Session).where(Session.id.in_(stale_ids)))
+            await db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+        await asyncio.sleep(0)  # let requests in between batches
+
+
+class SessionCompactor:
+    """Background task that runs compact_sessions every SESSION_COMPACTION_INTERVAL seconds"""
+    
+    def __init__(self, interval: float = SESSION_COMPACTION_INTERVAL):
+        self.interval = interval
+        self.deleted = 0
+        self.runs = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.deleted += await compact_sessions()
+                self.runs += 1
+            except Exception:
+                pass  # try again next interval
+            await asyncio.sleep(self.interval)
+    
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    def stats(self) -> dict:
+        return {"runs": self.runs, "deleted": self.deleted}
+
+
+# ============================================
+# Cached Current-User Dependencies
+# ============================================
+
+def user_info(user: User) -> UserInfo:
+    return UserInfo(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        avatar_url=user.avatar_url,
+        provider=user.provider
+    )
+
+
+async def get_cached_user(token: str) -> Optional[UserInfo]:
+    """
+    Resolve an access token to its user through the token and user caches;
+    only a user-cache miss opens a database session.
+    """
+    payload = verify_token(token)
+    if not payload or not payload.get("sub"):
+        return None
+    user_id = payload["sub"]
+    
+    if AUTH_CACHE_ENABLED:
+        entry = _user_cache.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            _user_cache.move_to_end(user_id)
+            _auth_cache_stats["user_hits"] += 1
+            return entry[1]
+        _auth_cache_stats["user_misses"] += 1
+    
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+    if not user:
+        return None
+    
+    info = user_info(user)
+    if AUTH_CACHE_ENABLED:
+        _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL, info)
+        while len(_user_cache) > USER_CACHE_MAX_ENTRIES:
+            _user_cache.popitem(last=False)
+    return info
+
+
+def _bearer_token(request: Request) -> Optional[str]:
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.replace("Bearer ", "")
+
+
+async def optional_user(request: Request) -> Optional[UserInfo]:
+    """FastAPI dependency: the signed-in user, or None for anonymous requests"""
+    token = _bearer_token(request)
+    return await get_cached_user(token) if token else None
+
+
+async def require_user(request: Request) -> UserInfo:
+    """FastAPI dependency: the signed-in user; 401 otherwise"""
+    token = _bearer_token(request)
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing authorization header")
+    
+    user = await get_cached_user(token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return user
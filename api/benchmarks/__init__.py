@@ -0,0 +1,5 @@
+"""
+Gridiron Benchmarks
+Offline micro and load benchmarks; run from the api/ directory, e.g.
+`python -m benchmarks.bench_http_pool`
+"""
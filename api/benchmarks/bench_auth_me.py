@@ -0,0 +1,65 @@
+"""
+Requests/sec on /auth/me with and without the auth cache
+(in-process ASGI transport, so only API-side work is measured)
+
+Usage: python -m benchmarks.bench_auth_me [--requests 2000] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import httpx  # noqa: E402
+
+import auth  # noqa: E402
+from main import app  # noqa: E402
+from models import AsyncSessionLocal, async_engine  # noqa: E402
+
+
+async def make_token() -> str:
+    async with AsyncSessionLocal() as db:
+        user = await auth.create_or_update_user_async(db, "bench@gridiron", "Bench", None, "google")
+        tokens = await auth.create_session_for_user_async(db, user)
+    return tokens.access_token
+
+
+async def run(client: httpx.AsyncClient, token: str, n: int, concurrency: int) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            response = await client.get("/auth/me", headers=headers)
+            assert response.status_code == 200, response.text
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    elapsed = time.perf_counter() - started
+    # Per-request latency from Little's law: concurrency / throughput
+    return {"requests_per_s": round(n / elapsed, 1), "latency_ms": round(elapsed / n * 1000 * concurrency, 3)}
+
+
+async def main(n: int, concurrency: int) -> None:
+    token = await make_token()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for enabled in (False, True):
+            auth.AUTH_CACHE_ENABLED = enabled
+            await run(client, token, 100, concurrency)  # warm up
+            print(f"auth cache {'on ' if enabled else 'off'}: {await run(client, token, n, concurrency)}")
+    print(auth.get_auth_cache_stats())
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
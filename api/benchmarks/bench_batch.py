@@ -0,0 +1,116 @@
+"""
+Batch analysis: a dashboard's worth of queries (with duplicates) as
+concurrent single analyses vs one analyze_batch, against a stand-in LLM and
+single-threaded stand-in R replicas that charge a fixed cost per request.
+Reports wall time, R requests and LLM calls for each
+
+Usage: python -m benchmarks.bench_batch [--replicas 1] [--request-cost 0.05] [--runs 3]
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+os.environ["SCRIPT_CACHE_TTL"] = "0"  # every run reaches the stand-ins
+os.environ["RESULT_CACHE_TTL"] = "0"
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+
+from benchmarks.standins import make_llm_handler, make_r_handler, serve  # noqa: E402
+
+DASHBOARD = [
+    "Chiefs offense EPA per play this season",
+    "Bills 3rd down success rate",
+    "Which teams have the best offensive EPA?",
+    "Eagles defense allowed EPA",
+    "Ravens 4th quarter passing efficiency",
+    "How do teams perform in the red zone when trailing?",
+    "Which quarterbacks are best under pressure?",
+    "chiefs offense epa per play this season",  # duplicate after normalization
+    "Bills 3rd-down success rate?",  # duplicate after normalization
+    "Which teams have the best offensive EPA?",
+]
+
+
+def make_plumber_handler(request_cost: float, script_cost: float, counts: dict):
+    """R stand-in that serves one request at a time, like Plumber, and counts them"""
+    base = make_r_handler(latency=script_cost)
+    lock = threading.Lock()
+
+    class PlumberHandler(base):
+        def do_POST(self):
+            with lock:
+                counts["r_requests"] += 1
+                time.sleep(request_cost)
+                super().do_POST()
+
+    return PlumberHandler
+
+
+def make_counting_llm_handler(counts: dict):
+    base = make_llm_handler(first_token_latency=0.15, tokens_per_second=400)
+
+    class CountingLLMHandler(base):
+        def do_POST(self):
+            counts["llm_calls"] += 1
+            super().do_POST()
+
+    return CountingLLMHandler
+
+
+async def run(runs: int, counts: dict) -> None:
+    from chains import analyze_batch, cached_analyze_query
+    from http_clients import close_http_clients, start_http_clients
+    from r_client import r_pool
+
+    await start_http_clients()
+
+    async def singles() -> int:
+        memos = await asyncio.gather(*(cached_analyze_query(q) for q in DASHBOARD))
+        return sum(1 for memo, _ in memos if memo.get("error"))
+
+    async def batch() -> int:
+        errors = 0
+        async for indexes, memo, _ in analyze_batch(DASHBOARD):
+            errors += len(indexes) * bool(memo.get("error"))
+        return errors
+
+    for name, mode in (("single", singles), ("batch", batch)):
+        samples = []
+        for _ in range(runs):
+            counts.update(r_requests=0, llm_calls=0)
+            started = time.perf_counter()
+            errors = await mode()
+            samples.append(time.perf_counter() - started)
+            assert errors == 0, f"{name}: {errors} items failed"
+        median = sorted(samples)[len(samples) // 2] * 1000
+        print(f"{name:>6}: {median:7.0f} ms  {counts['r_requests']:3} R requests  {counts['llm_calls']:3} LLM calls")
+
+    await r_pool.stop()
+    await close_http_clients()
+
+
+def main(replicas: int, request_cost: float, runs: int) -> None:
+    counts = {"r_requests": 0, "llm_calls": 0}
+    # Stand-in URLs must be in place before r_client and llm are first imported
+    servers = [serve(make_plumber_handler(request_cost, 0.02, counts)) for _ in range(replicas)]
+    llm_server, llm_url = serve(make_counting_llm_handler(counts))
+    os.environ["R_SERVICE_URLS"] = ",".join(url for _, url in servers)
+    os.environ["OPENROUTER_BASE_URL"] = llm_url
+    try:
+        print(f"{len(DASHBOARD)} queries, {replicas} R replica(s), {request_cost * 1000:.0f} ms per R request")
+        asyncio.run(run(runs, counts))
+    finally:
+        llm_server.shutdown()
+        for server, _ in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--replicas", type=int, default=1)
+    parser.add_argument("--request-cost", type=float, default=0.05)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    main(args.replicas, args.request_cost, args.runs)
@@ -0,0 +1,140 @@
+"""
+Columnar engine check and timing on a synthetic play-by-play Parquet fixture:
+verifies translated dplyr scripts against a plain-Python reference, then times
+the router's templates end to end (translate + DuckDB execute)
+
+Usage: python -m benchmarks.bench_columnar [--plays 100000] [--runs 50]
+"""
+
+import argparse
+import csv
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import duckdb
+
+from chains import route_query
+from columnar import ColumnarEngine
+
+TEAMS = ["BUF", "KC", "SEA", "SF", "PHI", "DET", "BAL", "GB"]
+
+
+def write_fixture(path: str, plays: int, seed: int = 7) -> list:
+    """Random but plausible plays; returns them as dicts for the reference"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(plays):
+        posteam, defteam = rng.sample(TEAMS, 2)
+        play_type = rng.choice(["pass", "pass", "run", "run", "punt", None])
+        epa = round(rng.gauss(0.02, 1.4), 4) if play_type else None
+        rows.append({
+            "play_id": i,
+            "posteam": posteam,
+            "defteam": defteam,
+            "season": rng.choice([2024, 2025]),
+            "down": rng.choice([1, 2, 3, 4, None]),
+            "qtr": rng.randint(1, 5),
+            "play_type": play_type,
+            "yardline_100": rng.randint(1, 99),
+            "epa": epa,
+            "success": float(epa > 0) if epa is not None else None,
+            "cpoe": round(rng.gauss(0, 9), 3) if play_type == "pass" and rng.random() < 0.9 else None,
+        })
+
+    csv_path = path + ".csv"
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    columns = (
+        "{'play_id': 'INTEGER', 'posteam': 'VARCHAR', 'defteam': 'VARCHAR', 'season': 'INTEGER', "
+        "'down': 'DOUBLE', 'qtr': 'DOUBLE', 'play_type': 'VARCHAR', 'yardline_100': 'DOUBLE', "
+        "'epa': 'DOUBLE', 'success': 'DOUBLE', 'cpoe': 'DOUBLE'}"
+    )
+    duckdb.execute(
+        f"COPY (SELECT * FROM read_csv('{csv_path}', header = true, columns = {columns})) "
+        f"TO '{path}' (FORMAT parquet)"
+    )
+    os.remove(csv_path)
+    return rows
+
+
+def mean(values: list) -> float:
+    return round(statistics.fmean(values), 3) if values else None
+
+
+def check(engine: ColumnarEngine, rows: list) -> None:
+    latest = max(r["season"] for r in rows)
+
+    # Single team, situational (router template)
+    result = engine.run(route_query("What is KC's EPA per play on third down?")[1])["result"]
+    plays = [r for r in rows if r["posteam"] == "KC" and r["season"] == latest and r["down"] == 3 and r["epa"] is not None]
+    assert result["plays"] == len(plays), result
+    assert abs(result["epa_per_play"] - mean([r["epa"] for r in plays])) < 1e-3, result
+
+    # League ranking, defense sorted best (lowest EPA allowed) first
+    result = engine.run(route_query("Which teams have the best passing defense by EPA?")[1])["result"]
+    expected = {}
+    for r in rows:
+        if r["season"] == latest and r["play_type"] == "pass" and r["epa"] is not None:
+            expected.setdefault(r["defteam"], []).append(r["epa"])
+    ranking = sorted(expected, key=lambda team: mean(expected[team]))
+    assert result["defteam"] == ranking, (result["defteam"], ranking)
+
+    # Hand-written pipeline: assignment, mutate, grouped summarise, arrange, head
+    script = """
+    explosive <- pbp_data %>%
+      filter(play_type == "run", !is.na(epa)) %>%
+      mutate(big = ifelse(epa > 1.5, 1, 0)) %>%
+      group_by(posteam) %>%
+      summarise(plays = n(), big_rate = round(sum(big) / plays, 3)) %>%
+      arrange(desc(big_rate), posteam) %>%
+      head(3)
+    explosive
+    """
+    result = engine.run(script)["result"]
+    runs = {}
+    for r in rows:
+        if r["play_type"] == "run" and r["epa"] is not None:
+            runs.setdefault(r["posteam"], []).append(r["epa"] > 1.5)
+    rates = sorted(((-round(sum(v) / len(v), 3), team) for team, v in runs.items()))[:3]
+    assert result["posteam"] == [team for _, team in rates], (result, rates)
+
+    print("checks passed")
+
+
+def main(plays: int, runs: int) -> None:
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "pbp.parquet")
+    rows = write_fixture(path, plays)
+
+    engine = ColumnarEngine(parquet_path=path)
+    engine.load()
+    print(f"loaded {engine.rows} plays in {engine.load_ms} ms")
+    check(engine, rows)
+
+    for query in (
+        "Compare Chiefs vs Bills offense this season",
+        "Who has the best 3rd down defense in the NFL?",
+        "Seahawks passing EPA trend by season",
+    ):
+        name, script = route_query(query)
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            engine.run(script)
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        print(f"{name:16} p50 {samples[len(samples) // 2]:.2f} ms  p95 {samples[int(len(samples) * 0.95)]:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plays", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    main(args.plays, args.runs)
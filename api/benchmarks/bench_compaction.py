@@ -0,0 +1,52 @@
+"""
+Chain B prompt size before and after result compaction, for typical R
+result shapes (estimated tokens, ~4 characters each)
+
+Usage: python -m benchmarks.bench_compaction
+"""
+
+import json
+import random
+
+from chains import build_memo_messages
+from compaction import compact_result, estimate_tokens
+
+TEAMS = [
+    "ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB",
+    "HOU", "IND", "JAX", "KC", "LA", "LAC", "LV", "MIA", "MIN", "NE", "NO", "NYG",
+    "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS",
+]
+
+
+def results() -> dict:
+    rng = random.Random(3)
+    ranking = {
+        "posteam": TEAMS,
+        "plays": [rng.randint(900, 1200) for _ in TEAMS],
+        "epa_per_play": [rng.gauss(0, 0.08) for _ in TEAMS],
+        "success_rate": [rng.uniform(0.38, 0.52) for _ in TEAMS],
+        "cpoe": [rng.gauss(0, 2.5) for _ in TEAMS],
+        "early_down_epa": [rng.gauss(0, 0.1) for _ in TEAMS],
+        "third_down_rate": [rng.uniform(0.3, 0.5) for _ in TEAMS],
+    }
+    weekly = {
+        "week": list(range(1, 19)) * 2,
+        "season": [2024] * 18 + [2025] * 18,
+        "epa_per_play": [rng.gauss(0.05, 0.15) for _ in range(36)],
+    }
+    summary = {"plays": 412, "epa_per_play": 0.1234567, "success_rate": 0.4712345}
+    return {"32-team ranking": ranking, "weekly trend": weekly, "one-row summary": summary}
+
+
+def main() -> None:
+    for name, data in results().items():
+        before = estimate_tokens(json.dumps(data, indent=2))
+        after = estimate_tokens(compact_result(data))
+        prompt = estimate_tokens(build_memo_messages("query", data)[1]["content"])
+        print(f"{name:16} data tokens {before:5} -> {after:4} ({1 - after / before:.0%} smaller), prompt {prompt}")
+    print()
+    print(compact_result(results()["32-team ranking"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Lookup latency of the in-memory aggregate cube on a synthetic cube
+sized like two seasons of play-by-play (~100k cells)
+
+Usage: python -m benchmarks.bench_cube [--lookups 2000]
+"""
+
+import argparse
+import random
+import time
+
+from cube import AggregateCube
+
+TEAMS = [
+    "ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB",
+    "HOU", "IND", "JAX", "KC", "LA", "LAC", "LV", "MIA", "MIN", "NE", "NO", "NYG",
+    "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS",
+]
+PLAY_TYPES = ["pass", "run", "punt", "field_goal", "kickoff", "no_play"]
+
+
+def synthetic_columns(seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    columns = {name: [] for name in (
+        "posteam", "defteam", "season", "down", "qtr", "play_type",
+        "plays", "epa_n", "epa_sum", "success_sum", "cpoe_n", "cpoe_sum",
+    )}
+    for posteam in TEAMS:
+        for defteam in rng.sample([t for t in TEAMS if t != posteam], 14):
+            for season in (2024, 2025):
+                for down in (None, 1, 2, 3, 4):
+                    for qtr in (1, 2, 3, 4, 5):
+                        for play_type in PLAY_TYPES:
+                            plays = rng.randint(1, 12)
+                            row = (posteam, defteam, season, down, qtr, play_type, plays, plays,
+                                   rng.gauss(0, 1.4) * plays, rng.randint(0, plays),
+                                   plays if play_type == "pass" else 0,
+                                   rng.gauss(0, 8) * plays if play_type == "pass" else 0)
+                            for name, value in zip(columns, row):
+                                columns[name].append(value)
+    return columns
+
+
+def timed(fn, n: int) -> dict:
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 1),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 1),
+    }
+
+
+def main(lookups: int) -> None:
+    columns = synthetic_columns()
+    started = time.perf_counter()
+    cube = AggregateCube(columns, "bench")
+    print(f"indexed {cube.cells} cells in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    rng = random.Random(1)
+
+    def team_season_down():
+        # Fresh filter combinations so the memo never answers
+        cube._memo.clear()
+        return cube.query(posteam=rng.choice(TEAMS), season=rng.choice((2024, 2025)), down=rng.randint(1, 4))
+
+    def ranking():
+        cube._memo.clear()
+        return cube.query(by="posteam", season=2024, play_type="pass")
+
+    def memoized():
+        return cube.query(posteam="KC", season=2024, down=3)
+
+    print("team/season/down (cold):", timed(team_season_down, lookups))
+    print("ranking by posteam (cold):", timed(ranking, max(1, lookups // 20)))
+    print("team/season/down (memo):", timed(memoized, lookups))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.lookups)
@@ -0,0 +1,87 @@
+"""
+Event-loop lag while auth writes run: sync SQLAlchemy calls made directly
+from async handlers vs the async database layer
+
+Usage: python -m benchmarks.bench_db_event_loop [--logins 200] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# Point the models at a throwaway database before they are imported
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from auth import (  # noqa: E402
+    create_or_update_user, create_or_update_user_async,
+    create_session_for_user, create_session_for_user_async
+)
+from models import AsyncSessionLocal, SessionLocal, async_engine, init_db  # noqa: E402
+
+
+async def measure_lag(stop: asyncio.Event, samples: list, interval: float = 0.005) -> None:
+    """Record how late a periodic tick wakes up: the event-loop lag"""
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - expected))
+
+
+async def sync_login(i: int) -> None:
+    db = SessionLocal()
+    try:
+        user = create_or_update_user(db, f"user{i % 50}@bench", "Bench", None, "google")
+        create_session_for_user(db, user)
+    finally:
+        db.close()
+
+
+async def async_login(i: int) -> None:
+    async with AsyncSessionLocal() as db:
+        user = await create_or_update_user_async(db, f"user{i % 50}@bench", "Bench", None, "google")
+        await create_session_for_user_async(db, user)
+
+
+async def run(login, n: int, concurrency: int) -> dict:
+    samples: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop, samples))
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with gate:
+            await login(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    samples.sort()
+    pick = lambda p: round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 2) if samples else 0.0
+    return {
+        "logins_per_s": round(n / elapsed, 1),
+        "lag_p50_ms": pick(0.5),
+        "lag_p99_ms": pick(0.99),
+        "lag_max_ms": round(samples[-1] * 1000, 2) if samples else 0.0,
+    }
+
+
+async def main(n: int, concurrency: int) -> None:
+    init_db()
+    print(f"sync  (blocking loop): {await run(sync_login, n, concurrency)}")
+    print(f"async (non-blocking) : {await run(async_login, n, concurrency)}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
@@ -0,0 +1,117 @@
+"""
+Query decomposition: checks that merged sub-script results equal the whole
+script (on the DuckDB engine over a synthetic Parquet fixture), then times
+comparison queries whole vs decomposed against stand-in R replicas whose
+execution time grows with the number of teams or seasons in a script
+
+Usage: python -m benchmarks.bench_decompose [--replicas 3] [--per-entity 0.15] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+
+os.environ["SCRIPT_CACHE_TTL"] = "0"  # every run reaches the stand-ins
+
+from benchmarks.standins import JSONHandler, serve  # noqa: E402
+
+QUERIES = [
+    "Compare Chiefs vs Bills offense this season",
+    "Packers vs Bears vs Vikings vs Lions offensive efficiency",
+    "Chiefs vs Bills vs Ravens vs Bengals vs Steelers vs Browns defense",
+    "Seahawks passing EPA in 2022 vs 2023 vs 2024",
+]
+
+
+def make_scaling_handler(base: float, per_entity: float):
+    """/execute takes base + per_entity x (teams + seasons named in the script)"""
+    class ScalingRHandler(JSONHandler):
+        def do_GET(self):
+            self._reply(200, {"status": "ok", "data_loaded": True, "total_plays": 1, "seasons": [2025]})
+
+        def do_POST(self):
+            script = json.loads(self._read_body())["script"]
+            teams = re.findall(r'"([A-Z]{2,3})"', script)
+            seasons = [int(s) for s in re.findall(r"\b(20\d\d)\b", script)]
+            time.sleep(base + per_entity * (len(teams) + len(seasons)))
+            if seasons:
+                result = {"season": seasons, "epa_per_play": [round(0.01 * (s - 2020), 3) for s in seasons]}
+            else:
+                result = {"posteam": teams, "epa_per_play": [round(0.01 * len(t) + i * 0.001, 3) for i, t in enumerate(teams)]}
+            self._reply(200, {"success": True, "result": result})
+
+    return ScalingRHandler
+
+
+def check_equivalence() -> None:
+    from benchmarks.bench_columnar import write_fixture
+    from chains import decompose_query, merge_frames, route_query
+    from columnar import ColumnarEngine
+
+    path = os.path.join(tempfile.mkdtemp(), "pbp.parquet")
+    write_fixture(path, 20000)
+    engine = ColumnarEngine(parquet_path=path)
+    engine.load()
+
+    queries = [q.replace("2022 vs 2023 vs ", "").replace("2024", "2024 vs 2025") for q in QUERIES]
+    queries += ["Which teams are better on 3rd down, KC or SF or SEA?", "Eagles vs Lions defense allowed EPA"]
+    for query in queries:
+        plan = decompose_query(query, 3)
+        if plan is None:
+            continue
+        whole = engine.run(route_query(query)[1])["result"]
+        parts = merge_frames([engine.run(s)["result"] for s in plan["scripts"]], plan["order_by"], plan["descending"])
+        assert whole == parts, (query, whole, parts)
+        print(f"equivalent ({len(plan['scripts'])} parts): {query}")
+
+
+async def time_queries(replicas: int, per_entity: float, runs: int) -> None:
+    import chains
+    from chains import execute_plan, generate_r_script
+    from columnar import execute_script
+    from http_clients import close_http_clients
+    from r_client import r_pool
+
+    for query in QUERIES:
+        script, route = await generate_r_script(query)
+        timings = {}
+        for mode in ("whole", "decomposed"):
+            samples = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                if mode == "whole":
+                    result = await execute_script(script)
+                else:
+                    result = await execute_plan(query, script, route)
+                assert result["success"], result
+                samples.append(time.perf_counter() - started)
+            timings[mode] = round(sorted(samples)[len(samples) // 2] * 1000)
+        print(f"{timings['whole']:>6} ms whole  {timings['decomposed']:>6} ms decomposed  {query}")
+    print(chains.get_router_stats()["decomposed"], f"over {replicas} replicas")
+    await r_pool.stop()
+    await close_http_clients()
+
+
+def main(replicas: int, per_entity: float, runs: int) -> None:
+    # Replica URLs must be in place before r_client is first imported
+    servers = [serve(make_scaling_handler(0.02, per_entity)) for _ in range(replicas)]
+    os.environ["R_SERVICE_URLS"] = ",".join(url for _, url in servers)
+    try:
+        check_equivalence()
+        asyncio.run(time_queries(replicas, per_entity, runs))
+    finally:
+        for server, _ in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--replicas", type=int, default=3)
+    parser.add_argument("--per-entity", type=float, default=0.15)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    main(args.replicas, args.per_entity, args.runs)
@@ -0,0 +1,68 @@
+"""
+Per-request latency: fresh httpx client per call vs the shared pooled client
+
+Usage: python -m benchmarks.bench_http_pool [--requests 500]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks.standins import serve
+from http_clients import close_http_clients, get_http_client
+
+
+def summarize(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3),
+    }
+
+
+async def fresh_client(url: str, n: int) -> list:
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            await client.get(url)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def pooled_client(url: str, n: int) -> list:
+    client = get_http_client("r_service")
+    await client.get(url)  # warm the pool
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        await client.get(url)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def main(n: int) -> None:
+    server, base_url = serve()
+    url = f"{base_url}/health"
+    try:
+        fresh = summarize(await fresh_client(url, n))
+        pooled = summarize(await pooled_client(url, n))
+    finally:
+        await close_http_clients()
+        server.shutdown()
+
+    print(f"requests per mode: {n}")
+    print(f"fresh client : {fresh}")
+    print(f"pooled client: {pooled}")
+    print(f"saved per request: {round(fresh['mean_ms'] - pooled['mean_ms'], 3)} ms (mean)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,337 @@
+"""
+Load test for the API against local stand-ins for OpenRouter and the R
+service: p50/p95/p99 latency and requests/sec per scenario and concurrency,
+emitted as JSON so runs can be compared between commits
+
+Usage: python -m benchmarks.bench_load [--scenarios analyze,auth_me,auth_refresh]
+           [--concurrency 1,8,32] [--requests 200] [--cold]
+           [--mix queries.txt | --mix-db sqlite:///./gridiron.db] [--output run.json]
+       python -m benchmarks.bench_load --compare before.json after.json [--threshold 0.1]
+
+The API runs under uvicorn in a subprocess with its own SQLite database.
+--mix replays a file of queries (one per line, or JSON lines with a "query"
+field); --mix-db replays the most recent query_history rows of a recorded
+database in their original order. --target skips the stand-ins and drives an
+already running API; auth scenarios then mint sessions through the
+DATABASE_URL and JWT_SECRET_KEY in the environment, which must match it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks.bench_router import QUERY_MIX
+from benchmarks.standins import make_llm_handler, make_r_handler, serve
+
+API_DIR = Path(__file__).resolve().parent.parent
+SCENARIOS = ("analyze", "auth_me", "auth_refresh")
+
+
+def log(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+# ============================================
+# Query Mixes
+# ============================================
+
+def load_mix(path: str) -> list:
+    queries = []
+    for line in Path(path).read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        queries.append(json.loads(line)["query"] if line.startswith("{") else line)
+    return queries
+
+
+def load_history_mix(url: str, limit: int) -> list:
+    """Most recent recorded queries, oldest first, from a query_history table"""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT query FROM query_history ORDER BY created_at DESC LIMIT :limit"),
+            {"limit": limit}
+        ).fetchall()
+    engine.dispose()
+    return [row[0] for row in reversed(rows)]
+
+
+# ============================================
+# Server Under Test
+# ============================================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(env: dict, workers: int) -> tuple:
+    """uvicorn main:app in a subprocess; returns (process, base_url) once /health answers"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=API_DIR, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    give_up_at = time.monotonic() + 60
+    while time.monotonic() < give_up_at:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with status {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=5).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("API did not become healthy within 60s")
+
+
+async def mint_sessions(count: int) -> dict:
+    """One user with `count` sessions, created directly in the API's database"""
+    import auth
+    from models import AsyncSessionLocal, async_engine, init_db
+
+    init_db()
+    async with AsyncSessionLocal() as db:
+        user = await auth.create_or_update_user_async(db, "loadtest@gridiron", "Load Test", None, "google")
+        tokens = [await auth.create_session_for_user_async(db, user) for _ in range(count)]
+    await async_engine.dispose()
+    return {
+        "access_token": tokens[0].access_token,
+        "refresh_tokens": [t.refresh_token for t in tokens],
+    }
+
+
+# ============================================
+# Scenarios
+# ============================================
+
+async def hit_analyze(client: httpx.AsyncClient, ctx: dict, worker: int, n: int) -> int:
+    response = await client.post("/analyze", json={"query": ctx["mix"][n % len(ctx["mix"])]})
+    return response.status_code
+
+
+async def hit_auth_me(client: httpx.AsyncClient, ctx: dict, worker: int, n: int) -> int:
+    response = await client.get("/auth/me", headers={"Authorization": f"Bearer {ctx['access_token']}"})
+    return response.status_code
+
+
+async def hit_auth_refresh(client: httpx.AsyncClient, ctx: dict, worker: int, n: int) -> int:
+    # Refresh tokens are single use, so each worker walks its own rotation chain
+    response = await client.post("/auth/refresh", json={"refresh_token": ctx["refresh_tokens"][worker]})
+    if response.status_code == 200:
+        ctx["refresh_tokens"][worker] = response.json()["refresh_token"]
+    return response.status_code
+
+
+HITS = {"analyze": hit_analyze, "auth_me": hit_auth_me, "auth_refresh": hit_auth_refresh}
+
+
+def percentile(samples: list, p: float) -> float:
+    return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 2)
+
+
+async def drive(client: httpx.AsyncClient, scenario: str, concurrency: int, requests: int, ctx: dict) -> dict:
+    """`requests` calls spread over `concurrency` closed-loop workers"""
+    hit = HITS[scenario]
+    samples, statuses = [], Counter()
+    issued = 0
+
+    async def worker(index: int):
+        nonlocal issued
+        while issued < requests:
+            issued += 1
+            n = issued
+            started = time.perf_counter()
+            try:
+                status = str(await hit(client, ctx, index, n))
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            samples.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    samples.sort()
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "statuses": dict(statuses),
+        "requests_per_s": round(len(samples) / elapsed, 1),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+        "p99_ms": percentile(samples, 0.99),
+    }
+
+
+async def run_all(base_url: str, scenarios: list, levels: list, requests: int, ctx: dict) -> list:
+    results = []
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        for scenario in scenarios:
+            for concurrency in levels:
+                await drive(client, scenario, concurrency, min(requests, 2 * concurrency), ctx)  # warm up
+                result = await drive(client, scenario, concurrency, requests, ctx)
+                log(f"{scenario:13} c={concurrency:<4} {result['requests_per_s']:>8} req/s  "
+                    f"p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+                    f"p99 {result['p99_ms']:>8} ms  errors {result['errors']}")
+                results.append(result)
+    return results
+
+
+# ============================================
+# Comparing Runs
+# ============================================
+
+def compare(before_path: str, after_path: str, threshold: float) -> int:
+    """Side-by-side p50/p99/throughput; exit status 1 when a row regressed past `threshold`"""
+    before, after = (json.loads(Path(p).read_text()) for p in (before_path, after_path))
+    previous = {(r["scenario"], r["concurrency"]): r for r in before["results"]}
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+
+    regressions = 0
+    for row in after["results"]:
+        old = previous.get((row["scenario"], row["concurrency"]))
+        if old is None:
+            continue
+        change = {key: (row[key] - old[key]) / old[key] if old[key] else 0.0
+                  for key in ("p50_ms", "p99_ms", "requests_per_s")}
+        regressed = change["p99_ms"] > threshold or change["requests_per_s"] < -threshold
+        regressions += regressed
+        print(f"{row['scenario']:13} c={row['concurrency']:<4} "
+              f"p50 {old['p50_ms']:>8} -> {row['p50_ms']:>8} ({change['p50_ms']:+.0%})  "
+              f"p99 {old['p99_ms']:>8} -> {row['p99_ms']:>8} ({change['p99_ms']:+.0%})  "
+              f"req/s {old['requests_per_s']:>8} -> {row['requests_per_s']:>8} ({change['requests_per_s']:+.0%})"
+              f"{'  REGRESSED' if regressed else ''}")
+    return 1 if regressions else 0
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(args) -> None:
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    if args.mix:
+        mix = load_mix(args.mix)
+    elif args.mix_db:
+        mix = load_history_mix(args.mix_db, args.mix_limit)
+    else:
+        mix = QUERY_MIX
+    if not mix:
+        raise SystemExit("The query mix is empty")
+
+    servers, process = [], None
+    if args.target:
+        base_url = args.target
+    else:
+        r_server, r_url = serve(make_r_handler(latency=args.r_latency, result_rows=args.r_rows))
+        llm_server, llm_url = serve(make_llm_handler(args.llm_first_token, args.llm_tokens_per_s))
+        servers = [r_server, llm_server]
+
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/loadtest.db"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        os.environ.setdefault("JWT_SECRET_KEY", "loadtest-secret")
+        env = {
+            **os.environ,
+            "R_SERVICE_URL": r_url,
+            "R_SERVICE_URLS": r_url,
+            "OPENROUTER_BASE_URL": llm_url,
+            "OPENROUTER_API_KEY": "loadtest",
+        }
+        if args.cold:
+            env.update({"RESULT_CACHE_TTL": "0", "SCRIPT_CACHE_TTL": "0"})
+        env.update(kv.split("=", 1) for kv in args.server_env)
+        process, base_url = start_api(env, args.server_workers)
+
+    try:
+        ctx = {"mix": mix}
+        if {"auth_me", "auth_refresh"} & set(scenarios):
+            ctx.update(asyncio.run(mint_sessions(max(levels))))
+        results = asyncio.run(run_all(base_url, scenarios, levels, args.requests, ctx))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        for server in servers:
+            server.shutdown()
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "target": args.target or "standins",
+            "requests": args.requests,
+            "mix_size": len(mix),
+            "cold": args.cold,
+            "r_latency": args.r_latency,
+            "r_rows": args.r_rows,
+            "llm_first_token": args.llm_first_token,
+            "llm_tokens_per_s": args.llm_tokens_per_s,
+            "server_workers": args.server_workers,
+            "server_env": args.server_env,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--mix", help="file of queries to replay for /analyze")
+    parser.add_argument("--mix-db", help="database URL whose query_history is replayed")
+    parser.add_argument("--mix-limit", type=int, default=1000)
+    parser.add_argument("--cold", action="store_true", help="disable the result and script caches")
+    parser.add_argument("--r-latency", type=float, default=0.05, help="stand-in R execution seconds")
+    parser.add_argument("--r-rows", type=int, default=32, help="rows in the stand-in R result")
+    parser.add_argument("--llm-first-token", type=float, default=0.2, help="stand-in LLM seconds to first token")
+    parser.add_argument("--llm-tokens-per-s", type=float, default=200.0)
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--target", help="drive an already running API instead of the stand-ins")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--threshold", type=float, default=0.1, help="--compare regression threshold")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+    main(args)
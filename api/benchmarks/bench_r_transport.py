@@ -0,0 +1,80 @@
+"""
+/execute result transport, API side: parsing a play-level data frame sent as
+JSON (what Plumber emits) vs an Arrow IPC stream, then building the Chain B
+table and, last, the full raw_data for the response
+
+Usage: python -m benchmarks.bench_r_transport [--runs 20]
+"""
+
+import argparse
+import json
+import random
+import time
+
+import pyarrow as pa
+
+from arrow_ipc import read_ipc_stream
+from compaction import compact_result
+
+TEAMS = ["BUF", "KC", "SEA", "SF", "PHI", "DET", "BAL", "GB"]
+
+
+def plays(n: int, seed: int = 5) -> dict:
+    rng = random.Random(seed)
+    return {
+        "game_id": [f"2025_{rng.randint(1, 18):02d}_{rng.choice(TEAMS)}_{rng.choice(TEAMS)}" for _ in range(n)],
+        "posteam": [rng.choice(TEAMS) for _ in range(n)],
+        "down": [rng.choice([1, 2, 3, 4, None]) for _ in range(n)],
+        "ydstogo": [rng.randint(1, 20) for _ in range(n)],
+        "yardline_100": [rng.randint(1, 99) for _ in range(n)],
+        "play_type": [rng.choice(["pass", "run", "punt", None]) for _ in range(n)],
+        "epa": [round(rng.gauss(0.02, 1.4), 6) for _ in range(n)],
+        "wp": [round(rng.random(), 6) for _ in range(n)],
+        "cpoe": [round(rng.gauss(0, 9), 4) if rng.random() < 0.6 else None for _ in range(n)],
+    }
+
+
+def ipc_bytes(columns: dict) -> bytes:
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def p50(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main(runs: int) -> None:
+    for n in (5000, 50000):
+        columns = plays(n)
+        json_body = json.dumps({"success": True, "result": columns}).encode()
+        arrow_body = ipc_bytes(columns)
+
+        json_parse = p50(lambda: json.loads(json_body), runs)
+        json_prompt = p50(lambda: compact_result(json.loads(json_body)["result"]), runs)
+        arrow_parse = p50(lambda: read_ipc_stream(arrow_body), runs)
+        arrow_prompt = p50(lambda: compact_result(read_ipc_stream(arrow_body)), runs)
+        arrow_full = p50(lambda: read_ipc_stream(arrow_body).to_pydict(), runs)
+
+        assert compact_result(read_ipc_stream(arrow_body)) == compact_result(columns)
+        print(f"{n} plays")
+        print(f"  json   {len(json_body):>10,} B  parse {json_parse:7.2f} ms  parse + Chain B table {json_prompt:7.2f} ms")
+        print(
+            f"  arrow  {len(arrow_body):>10,} B  parse {arrow_parse:7.2f} ms  parse + Chain B table {arrow_prompt:7.2f} ms"
+            f"  (+ full raw_data lists {arrow_full:.2f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    main(args.runs)
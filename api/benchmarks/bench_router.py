@@ -0,0 +1,50 @@
+"""
+Template router hit rate and routing time over a representative query mix
+(queries that miss would go to Chain A)
+
+Usage: python -m benchmarks.bench_router [--repeat 200]
+"""
+
+import argparse
+import time
+
+from chains import route_query
+
+QUERY_MIX = [
+    "Compare Chiefs vs Ravens offense this season",
+    "Who has the best 3rd down defense in the NFL?",
+    "Seahawks vs 49ers red zone efficiency",
+    "How has the Bills offense changed since 2020?",
+    "Chiefs red zone efficiency trend over last 5 years",
+    "What is SEA's EPA per play on third down in 2024?",
+    "Which teams have the best passing EPA?",
+    "Eagles CPOE in the 4th quarter",
+    "Lions rushing success rate",
+    "Rank every defense by EPA allowed in 2025",
+    "Packers vs Bears vs Vikings vs Lions offensive efficiency",
+    "Steelers defense 2024 vs 2025",
+    # Shapes the templates do not cover
+    "Seahawks rushing attack 2018 vs now",
+    "Is Mahomes better than Allen?",
+    "How many touchdowns did the Lions score at home?",
+    "Which QB has the highest CPOE when trailing in the 4th quarter?",
+]
+
+
+def main(repeat: int) -> None:
+    for query in QUERY_MIX:
+        routed = route_query(query)
+        print(f"{routed[0] if routed else 'llm':16} {query}")
+
+    started = time.perf_counter()
+    hits = sum(1 for _ in range(repeat) for query in QUERY_MIX if route_query(query))
+    elapsed = time.perf_counter() - started
+    lookups = repeat * len(QUERY_MIX)
+    print({"hit_rate": round(hits / lookups, 3), "route_us": round(elapsed / lookups * 1e6, 1)})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.repeat)
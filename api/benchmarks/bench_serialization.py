@@ -0,0 +1,113 @@
+"""
+Encode time and bytes on the wire for /analyze payloads: stdlib json (the
+previous response path) vs orjson vs MessagePack, raw and gzip/brotli compressed
+
+Usage: python -m benchmarks.bench_serialization [--runs 20]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+
+import orjson
+
+from compression import COMPRESSION_BROTLI_QUALITY, COMPRESSION_GZIP_LEVEL
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TEAMS = [
+    "ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB",
+    "HOU", "IND", "JAX", "KC", "LA", "LAC", "LV", "MIA", "MIN", "NE", "NO", "NYG",
+    "NYJ", "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS",
+]
+
+
+def ranking(rng: random.Random) -> dict:
+    return {
+        "posteam": TEAMS,
+        "plays": [rng.randint(900, 1200) for _ in TEAMS],
+        "epa_per_play": [rng.gauss(0, 0.08) for _ in TEAMS],
+        "success_rate": [rng.uniform(0.38, 0.52) for _ in TEAMS],
+        "cpoe": [rng.gauss(0, 2.5) for _ in TEAMS],
+        "early_down_epa": [rng.gauss(0, 0.1) for _ in TEAMS],
+        "third_down_rate": [rng.uniform(0.3, 0.5) for _ in TEAMS],
+    }
+
+
+def plays(rng: random.Random, n: int) -> dict:
+    return {
+        "play_id": list(range(n)),
+        "posteam": [rng.choice(TEAMS) for _ in range(n)],
+        "down": [rng.choice([1, 2, 3, 4, None]) for _ in range(n)],
+        "yardline_100": [rng.randint(1, 99) for _ in range(n)],
+        "play_type": [rng.choice(["pass", "run", "punt"]) for _ in range(n)],
+        "epa": [rng.gauss(0.02, 1.4) for _ in range(n)],
+        "wp": [rng.random() for _ in range(n)],
+    }
+
+
+def payload(raw_data: dict) -> dict:
+    """Shape of an AnalyzeResponse"""
+    return {
+        "success": True,
+        "query": "query",
+        "r_code": "pbp_data %>% filter(...)",
+        "memo": "## Summary\n" + "Analysis text. " * 80,
+        "chart_config": {"type": "bar", "xKey": "posteam", "yKeys": ["epa_per_play"]},
+        "raw_data": raw_data,
+        "error": None,
+    }
+
+
+def encoders() -> dict:
+    result = {
+        "json": lambda c: json.dumps(c, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode(),
+        "orjson": lambda c: orjson.dumps(c, default=str, option=orjson.OPT_NON_STR_KEYS),
+    }
+    if msgpack is not None:
+        result["msgpack"] = lambda c: msgpack.packb(c, default=str)
+    return result
+
+
+def timed(fn, content, runs: int) -> tuple:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        body = fn(content)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return body, samples[len(samples) // 2]
+
+
+def main(runs: int) -> None:
+    rng = random.Random(11)
+    cases = {
+        "32-team ranking": payload(ranking(rng)),
+        "5k plays": payload(plays(rng, 5000)),
+        "50k plays": payload(plays(rng, 50000)),
+    }
+    for name, content in cases.items():
+        print(name)
+        for encoder, fn in encoders().items():
+            body, encode_ms = timed(fn, content, runs)
+            sizes = f"raw {len(body):>9,} B  gzip {len(gzip.compress(body, COMPRESSION_GZIP_LEVEL)):>9,} B"
+            if brotli is not None:
+                sizes += f"  br {len(brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)):>9,} B"
+            print(f"  {encoder:8} encode p50 {encode_ms:8.3f} ms  {sizes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    main(args.runs)
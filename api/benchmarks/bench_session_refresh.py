@@ -0,0 +1,91 @@
+"""
+Refresh-token rotation latency against a large sessions table,
+and the time compact_sessions takes to clear out its stale rows
+
+Usage: python -m benchmarks.bench_session_refresh [--rows 1000000] [--refreshes 500] [--compact]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+import auth  # noqa: E402
+from models import AsyncSessionLocal, Session, async_engine, init_db  # noqa: E402
+
+
+async def seed(rows: int, user_id: str) -> None:
+    """Fill the table with a realistic mix: mostly expired or revoked, some live"""
+    now = datetime.utcnow()
+    batch = []
+    async with AsyncSessionLocal() as db:
+        for i in range(rows):
+            batch.append({
+                "id": str(uuid.uuid4()),
+                "user_id": f"user-{i % 50000}" if i % 10 else user_id,
+                "token_hash": uuid.uuid4().hex + uuid.uuid4().hex,
+                "created_at": now - timedelta(days=40),
+                "expires_at": now + timedelta(days=1) if i % 4 == 0 else now - timedelta(days=10),
+                "is_revoked": i % 7 == 0,
+            })
+            if len(batch) == 50000:
+                await db.execute(insert(Session), batch)
+                batch = []
+        if batch:
+            await db.execute(insert(Session), batch)
+        await db.commit()
+
+
+async def main(rows: int, refreshes: int, compact: bool) -> None:
+    init_db()
+    async with AsyncSessionLocal() as db:
+        user = await auth.create_or_update_user_async(db, "bench@gridiron", "Bench", None, "google")
+        tokens = await auth.create_session_for_user_async(db, user)
+
+    started = time.perf_counter()
+    await seed(rows, user.id)
+    print(f"seeded {rows} sessions in {time.perf_counter() - started:.1f}s")
+
+    latencies = []
+    refresh_token = tokens.refresh_token
+    for _ in range(refreshes):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            rotated = await auth.rotate_session_async(db, refresh_token)
+            latencies.append(time.perf_counter() - started)
+        assert rotated is not None
+        refresh_token = rotated.refresh_token
+
+    latencies.sort()
+    print({
+        "refreshes": refreshes,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+    })
+
+    if compact:
+        started = time.perf_counter()
+        deleted = await auth.compact_sessions()
+        async with AsyncSessionLocal() as db:
+            remaining = (await db.execute(select(func.count()).select_from(Session))).scalar()
+        print(f"compacted {deleted} sessions in {time.perf_counter() - started:.1f}s, {remaining} left")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--refreshes", type=int, default=500)
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.refreshes, args.compact))
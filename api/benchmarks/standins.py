@@ -0,0 +1,194 @@
+"""
+Local stand-in servers for benchmarks
+Small HTTP/1.1 keep-alive servers that run in a background thread
+"""
+
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler that answers every request with a small JSON body"""
+
+    protocol_version = "HTTP/1.1"
+    payload = {"status": "ok"}
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        self._reply(200, self.payload)
+
+    def do_POST(self):
+        self._read_body()
+        self._reply(200, self.payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Threaded server that ignores clients hanging up (e.g. cancelled hedges)"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def serve(handler_cls=JSONHandler, host: str = "127.0.0.1", port: int = 0):
+    """Start a threaded server; returns (server, base_url). Call server.shutdown() to stop."""
+    server = QuietServer((host, port), handler_cls)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def make_r_handler(
+    latency: float = 0.02,
+    slow_fraction: float = 0.0,
+    slow_latency: float = 0.5,
+    result_rows: int = 1,
+    batch: bool = True
+):
+    """
+    Stand-in for the R Plumber service with injected latency.
+    `slow_fraction` of /execute calls take `slow_latency` instead, to model tails.
+    /execute answers a `result_rows`-row team table (JSON transport only);
+    /execute_batch (404 unless `batch`) runs its scripts one after another.
+    """
+    teams = ["BAL", "KC", "SEA", "SF"]
+    result = {
+        "team": [teams[i % len(teams)] for i in range(result_rows)],
+        "epa_per_play": [round(0.12 - i * 0.001, 3) for i in range(result_rows)],
+    }
+
+    class FakeRHandler(JSONHandler):
+        def do_GET(self):
+            if self.path.startswith("/health"):
+                self._reply(200, {
+                    "status": "ok", "data_loaded": True,
+                    "total_plays": 98765, "seasons": [2024, 2025]
+                })
+            elif self.path.startswith("/teams"):
+                self._reply(200, {"success": True, "teams": teams})
+            elif self.path.startswith("/schema"):
+                self._reply(200, {"success": True, "total_columns": 372, "key_columns": [
+                    {"name": "posteam", "type": "character", "sample": teams},
+                    {"name": "epa", "type": "numeric", "sample": [0.5, -1.2, 0.03]},
+                ]})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            body = self._read_body()
+            if self.path.startswith("/execute_batch"):
+                if not batch:
+                    self._reply(404, {"error": "not found"})
+                    return
+                scripts = json.loads(body or b"{}").get("scripts", [])
+                results = []
+                for _ in scripts:
+                    time.sleep(slow_latency if random.random() < slow_fraction else latency)
+                    results.append({"success": True, "result": result})
+                self._reply(200, {"success": True, "results": results})
+                return
+            delay = slow_latency if random.random() < slow_fraction else latency
+            time.sleep(delay)
+            self._reply(200, {"success": True, "result": result})
+
+    return FakeRHandler
+
+
+R_SCRIPT_REPLY = """pbp_data |>
+  filter(posteam == "SEA", !is.na(epa)) |>
+  summarize(plays = n(), epa_per_play = round(mean(epa, na.rm = TRUE), 3))"""
+
+MEMO_REPLY = """Seattle's offense is humming
+Seattle gains <span class="positive">+0.12</span> EPA per play, top ten in the league, \
+with a <strong>47%</strong> success rate driven by early-down passing.
+```json
+{"type": "dot", "xLabel": "Team", "yLabel": "EPA/Play", "data": []}
+```"""
+
+
+def message_text(message: dict) -> str:
+    """Text of a chat message whose content is a string or a list of parts"""
+    content = message.get("content") or ""
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content)
+
+
+def make_llm_handler(first_token_latency: float = 0.2, tokens_per_second: float = 100.0):
+    """
+    Stand-in for OpenRouter's OpenAI-compatible /chat/completions.
+    Code prompts (Chain A) get an R script, others a memo with a chart block;
+    replies arrive after `first_token_latency` and then at `tokens_per_second`
+    (~4 characters per token), streamed as SSE when the request asks for it.
+    """
+    class FakeLLMHandler(JSONHandler):
+        def do_POST(self):
+            request = json.loads(self._read_body() or b"{}")
+            messages = request.get("messages", [])
+            system = "".join(message_text(m) for m in messages if m["role"] == "system")
+            content = R_SCRIPT_REPLY if "pbp_data" in system else MEMO_REPLY
+            tokens = [content[i:i + 4] for i in range(0, len(content), 4)]
+            usage = {
+                "prompt_tokens": sum(len(message_text(m)) for m in messages) // 4,
+                "completion_tokens": len(tokens),
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": request.get("model", "bench")}
+
+            time.sleep(first_token_latency)
+            if not request.get("stream"):
+                time.sleep(len(tokens) / tokens_per_second)
+                self._reply(200, {**base, "object": "chat.completion", "usage": usage, "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }]})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            chunk = {**base, "object": "chat.completion.chunk"}
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(1 / tokens_per_second)
+                self._event({**chunk, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+            self._event({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            self._event({**chunk, "choices": [], "usage": usage})
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+
+        def _event(self, data: dict) -> None:
+            self._chunk(f"data: {json.dumps(data)}\n\n".encode())
+
+        def _chunk(self, data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return FakeLLMHandler
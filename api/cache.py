@@ -0,0 +1,270 @@
+"""
+Gridiron Result Cache
+Versioned memo cache in front of analyze_query, keyed on the normalized
+query plus the version of the data the answering engine read
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from serialization import jsonable
+
+# Configuration
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")  # 'memory' or 'sqlite'
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", "./result_cache.db")
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "86400"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000"))
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share a cache entry"""
+    return re.sub(r"[^a-z0-9]+", " ", query.lower()).strip()
+
+
+def data_version_from_health(health: dict) -> Optional[str]:
+    """Fingerprint the loaded nflfastR data from an R /health payload"""
+    if health.get("status") != "ok" or not health.get("data_loaded"):
+        return None
+
+    seasons = health.get("seasons") or []
+    if not isinstance(seasons, list):
+        seasons = [seasons]
+
+    fingerprint = json.dumps(
+        {"total_plays": health.get("total_plays"), "seasons": sorted(seasons)},
+        sort_keys=True
+    )
+    return hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+
+
+# ============================================
+# Backends
+# ============================================
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL"""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, ttl: float = RESULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, version, value)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def contains(self, key: str) -> bool:
+        """Live entry present; unlike get, leaves its LRU position alone"""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def set(self, key: str, value: Any, version: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def purge_versions(self, keep: str, prefix: str = "") -> int:
+        """Drop every entry (whose version starts with `prefix`) not built against `keep`"""
+        stale = [
+            k for k, (_, version, _) in self._entries.items()
+            if version != keep and version.startswith(prefix)
+        ]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """SQLite-backed LRU cache with per-entry TTL that survives restarts"""
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str = RESULT_CACHE_PATH,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl: float = RESULT_CACHE_TTL
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_result_cache_last_access ON result_cache (last_access)"
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM result_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE result_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(row[0])
+
+    def contains(self, key: str) -> bool:
+        """Live entry present; unlike get, leaves last_access alone"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM result_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def set(self, key: str, value: Any, version: str) -> None:
+        now = time.time()
+        payload = json.dumps(value, default=jsonable)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, version, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, version, payload, now + self.ttl, now)
+            )
+            self._conn.execute(
+                "DELETE FROM result_cache WHERE key IN ("
+                "SELECT key FROM result_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def purge_versions(self, keep: str, prefix: str = "") -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM result_cache WHERE version != ? AND substr(version, 1, ?) = ?",
+                (keep, len(prefix), prefix)
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+
+# ============================================
+# Result Cache
+# ============================================
+
+class ResultCache:
+    """
+    Memo cache keyed on (data version, engine scope, normalized query).
+    Each scope ('r', 'duckdb') tracks its own data version, so a new R
+    data version only purges R-answered entries and vice versa.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.versions: dict = {}  # scope -> latest data version seen
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def _run(self, fn, *args):
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    @staticmethod
+    def make_key(query: str, version: str, scope: str = "r") -> str:
+        return hashlib.sha256(f"{version}:{scope}:{normalize_query(query)}".encode()).hexdigest()
+
+    async def observe_version(self, version: str, scope: str = "r") -> None:
+        """Purge a scope's entries built against older data once a new version shows up"""
+        if version == self.versions.get(scope):
+            return
+        self.versions[scope] = version
+        purged = await self._run(self.backend.purge_versions, f"{scope}:{version}", f"{scope}:")
+        if purged:
+            self.invalidations += purged
+
+    async def _fetch(self, query: str, version: str, scope: str) -> Optional[dict]:
+        await self.observe_version(version, scope)
+        return await self._run(self.backend.get, self.make_key(query, version, scope))
+
+    async def get(self, query: str, version: str, scope: str = "r") -> Optional[dict]:
+        return await self.lookup(query, {scope: version})
+
+    async def lookup(self, query: str, versions: dict) -> Optional[dict]:
+        """First memo cached under any {scope: version}, in order, counted as one hit or miss"""
+        memo = None
+        for scope, version in versions.items():
+            memo = await self._fetch(query, version, scope)
+            if memo is not None:
+                break
+        if memo is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return memo
+
+    async def contains(self, query: str, version: str, scope: str = "r") -> bool:
+        """Whether a memo is cached, without counting a hit or miss (for background work)"""
+        await self.observe_version(version, scope)
+        return await self._run(self.backend.contains, self.make_key(query, version, scope))
+
+    async def set(self, query: str, version: str, memo: dict, scope: str = "r") -> None:
+        await self._run(self.backend.set, self.make_key(query, version, scope), memo, f"{scope}:{version}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "data_version": self.versions.get("r"),
+            "snapshot_version": self.versions.get("duckdb"),
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidated": self.invalidations
+        }
+
+
+def create_result_cache() -> ResultCache:
+    """Build the result cache from environment configuration"""
+    if RESULT_CACHE_BACKEND == "sqlite":
+        return ResultCache(SQLiteCacheBackend())
+    return ResultCache(MemoryCacheBackend())
@@ -4,22 +4,30 @@ Chain A: User Query → R Script
 Chain B: R Result → Memo + Chart Config
 """
 
-import os
+import asyncio
 import json
-from openai import AsyncOpenAI
-from typing import Optional
+import os
+import re
+import time
+from collections import deque
+from collections.abc import Mapping
+from typing import AsyncIterator, Optional
 from pathlib import Path
 
-from r_client import execute_r_script
-
-# OpenRouter configuration
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+from r_client import r_pool
+from columnar import EXECUTION_ENGINE, cache_versions, execute_script, execute_scripts
+from cache import create_result_cache, normalize_query
+from llm import PromptTemplate, complete, stream, system_message
+from compaction import compact_result
+from metrics import cache_lookups, stage_timer
 
 # Model selection
 CODE_MODEL = "anthropic/claude-3.5-sonnet"  # Best for code generation
 SUMMARY_MODEL = "meta-llama/llama-3.1-8b-instruct"  # Fast for text synthesis
 
+# Memo cache in front of analyze_query
+result_cache = create_result_cache()
+
 # Load analytics framework
 FRAMEWORK_PATH = Path(__file__).parent / "prompts" / "nfl_analytics_framework.md"
 
@@ -86,28 +94,20 @@ Chart types: "dot" (ranking), "slope" (before/after), "sparkline" (trend)
 """
 
 
-async def get_client() -> AsyncOpenAI:
-    """Get configured OpenAI client for OpenRouter"""
-    return AsyncOpenAI(
-        api_key=OPENROUTER_API_KEY,
-        base_url=OPENROUTER_BASE_URL,
-    )
+# Chain A system prompt, re-rendered only when the framework file changes
+CODE_PROMPT = PromptTemplate(CODE_SYSTEM_PROMPT, FRAMEWORK_PATH)
 
 
 async def chain_a_generate_r_script(query: str) -> str:
     """
     Chain A: Convert natural language query to R script
     """
-    client = await get_client()
-    framework = load_analytics_framework()
-    
-    response = await client.chat.completions.create(
-        model=CODE_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": CODE_SYSTEM_PROMPT.format(framework=framework)
-            },
+    r_code = await complete(
+        "chain_a",
+        CODE_MODEL,
+        [
+            # Static framework prefix, cached provider-side across requests
+            system_message(CODE_PROMPT.render(), cache=True),
             {
                 "role": "user",
                 "content": f"Generate R code for this query: {query}"
@@ -117,8 +117,6 @@ async def chain_a_generate_r_script(query: str) -> str:
         max_tokens=1000,
     )
     
-    r_code = response.choices[0].message.content or ""
-    
     # Clean up code block markers if present
     r_code = r_code.strip()
     if r_code.startswith("```r"):
@@ -133,35 +131,377 @@ async def chain_a_generate_r_script(query: str) -> str:
     return r_code.strip()
 
 
-async def chain_b_synthesize_memo(query: str, data: dict) -> dict:
+# ============================================
+# Template Router
+# ============================================
+# Recognized query shapes are answered with vetted R templates instead of
+# Chain A. Slot values are only ever whitelisted team codes and integers,
+# so nothing from the query text reaches R verbatim.
+
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+
+TEAM_ALIASES = {
+    "ARI": ("cardinals", "arizona"), "ATL": ("falcons", "atlanta"),
+    "BAL": ("ravens", "baltimore"), "BUF": ("bills", "buffalo"),
+    "CAR": ("panthers", "carolina"), "CHI": ("bears", "chicago"),
+    "CIN": ("bengals", "cincinnati"), "CLE": ("browns", "cleveland"),
+    "DAL": ("cowboys", "dallas"), "DEN": ("broncos", "denver"),
+    "DET": ("lions", "detroit"), "GB": ("packers", "green bay"),
+    "HOU": ("texans", "houston"), "IND": ("colts", "indianapolis"),
+    "JAX": ("jaguars", "jags", "jacksonville"), "KC": ("chiefs", "kansas city"),
+    "LA": ("rams",), "LAC": ("chargers",),
+    "LV": ("raiders", "las vegas"), "MIA": ("dolphins", "miami"),
+    "MIN": ("vikings", "minnesota"), "NE": ("patriots", "pats", "new england"),
+    "NO": ("saints", "new orleans"), "NYG": ("giants",),
+    "NYJ": ("jets",), "PHI": ("eagles", "philadelphia"),
+    "PIT": ("steelers", "pittsburgh"), "SEA": ("seahawks", "seattle"),
+    "SF": ("49ers", "niners", "san francisco"), "TB": ("buccaneers", "bucs", "tampa bay"),
+    "TEN": ("titans", "tennessee"), "WAS": ("commanders", "washington", "redskins"),
+}
+
+_TEAM_PATTERNS = [
+    (code, re.compile(r"\b(?:" + "|".join(re.escape(a) for a in aliases) + r")\b", re.IGNORECASE))
+    for code, aliases in TEAM_ALIASES.items()
+]
+_TEAM_CODE = re.compile(r"\b(" + "|".join(TEAM_ALIASES) + r")\b")  # upper-case only
+_KNOWN_CAPITALIZED = {w for aliases in TEAM_ALIASES.values() for a in aliases for w in a.split()}
+_KNOWN_CAPITALIZED |= {"nfl", "epa", "cpoe", "afc", "nfc"}
+
+_ORDINALS = {"1st": 1, "first": 1, "2nd": 2, "second": 2, "3rd": 3, "third": 3, "4th": 4, "fourth": 4}
+_ORDINAL = r"(1st|2nd|3rd|4th|first|second|third|fourth)"
+
+# Anything the templates cannot express goes to Chain A
+_UNSUPPORTED = re.compile(
+    r"\b(player|qb|quarterback|receiver|wr|rb|running back|tight end|rookie|coach"
+    r"|yards?|touchdowns?|tds?|turnovers?|interceptions?|sacks?|fumbles?|penalt\w*|points?|scor\w*"
+    r"|air yards|wp|win prob\w*|pressure|blitz|formation|motion|coverage|targets?|drives?"
+    r"|two[- ]minute|goal[- ]to[- ]go|goal line|home|away|road|week|games?|playoffs?|weather"
+    r"|when|while|after|before|leading|trailing|tied|against|predict\w*|will|per game|percent\w*)\b",
+    re.IGNORECASE
+)
+_MEASURE = re.compile(r"\b(epa|success|cpoe|efficien\w*|offen[cs]\w*|defen[cs]\w*|perform\w*)\b", re.IGNORECASE)
+_RANKING = re.compile(r"\b(best|worst|top|bottom|rank\w*|leads?|league|most|least|which teams?|who has)\b", re.IGNORECASE)
+_TREND = re.compile(r"\b(trend\w*|over time|by season|each season|per season|year[- ]over[- ]year|since|chang\w*|evolv\w*)\b", re.IGNORECASE)
+
+
+def extract_slots(query: str) -> Optional[dict]:
     """
-    Chain B: Convert R result to memo with chart config
+    Pull team codes, seasons, situation and metric slots out of a query.
+    Returns None when the query mentions something the templates can't answer.
     """
-    client = await get_client()
+    if _UNSUPPORTED.search(query):
+        return None
     
-    response = await client.chat.completions.create(
-        model=SUMMARY_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": MEMO_SYSTEM_PROMPT
-            },
-            {
-                "role": "user",
-                "content": f"""Original question: {query}
+    found = [(m.start(), code) for code, pattern in _TEAM_PATTERNS for m in pattern.finditer(query)]
+    found += [(m.start(), m.group(1)) for m in _TEAM_CODE.finditer(query)]
+    teams = list(dict.fromkeys(code for _, code in sorted(found)))
+    
+    # Capitalized words we can't place are usually player names
+    for word in re.findall(r"\b[A-Z][a-z]+\b", query)[1:]:
+        if word.lower() not in _KNOWN_CAPITALIZED:
+            return None
+    
+    text = query.lower()
+    passing = bool(re.search(r"\b(pass|passes|passing|through the air)\b", text))
+    rushing = bool(re.search(r"\b(run|runs|rush|rushes|rushing|running game|ground game)\b", text))
+    since = re.search(r"\bsince (\d{4})\b", text)
+    last_n = re.search(r"\b(?:last|past) (\d+) (?:years|seasons)\b", text)
+    
+    return {
+        "teams": teams,
+        "seasons": sorted({int(y) for y in re.findall(r"\b(19\d\d|20\d\d)\b", text)}),
+        "since": int(since.group(1)) if since else None,
+        "last_n": int(last_n.group(1)) if last_n else None,
+        "downs": sorted({_ORDINALS[o] for o in re.findall(_ORDINAL + r"[\s-]+downs?\b", text)}),
+        "quarters": sorted({_ORDINALS[o] for o in re.findall(_ORDINAL + r"[\s-]+(?:quarter|qtr)s?\b", text)}),
+        "play_type": "pass" if passing and not rushing else "run" if rushing and not passing else None,
+        "red_zone": bool(re.search(r"\bred[- ]?zone\b", text)),
+        "team_column": "defteam" if re.search(r"\b(defen[cs]\w*|allow\w*)\b", text) else "posteam",
+        "cpoe": "cpoe" in text or (passing and not rushing),
+        "measure": bool(_MEASURE.search(text)),
+        "ranking": bool(_RANKING.search(text)),
+        "trend": bool(_TREND.search(text)),
+    }
 
-Data from analysis:
-{json.dumps(data, indent=2)}
 
-Write a brief memo and suggest chart configuration."""
+def _r_list(values: list, quote: bool = False) -> str:
+    return ", ".join(f'"{v}"' if quote else str(v) for v in values)
+
+
+def _filter_clauses(slots: dict, all_seasons: bool = False) -> list:
+    clauses = []
+    if slots["since"]:
+        clauses.append(f"season >= {slots['since']}")
+    elif slots["last_n"]:
+        clauses.append(f"season > max(season) - {slots['last_n']}")
+    elif len(slots["seasons"]) == 1:
+        clauses.append(f"season == {slots['seasons'][0]}")
+    elif slots["seasons"]:
+        clauses.append(f"season %in% c({_r_list(slots['seasons'])})")
+    elif not all_seasons:
+        clauses.append("season == max(season)")  # current season by default
+    
+    if slots["downs"]:
+        clauses.append(f"down %in% c({_r_list(slots['downs'])})")
+    if slots["quarters"]:
+        clauses.append(f"qtr %in% c({_r_list(slots['quarters'])})")
+    if slots["play_type"]:
+        clauses.append(f'play_type == "{slots["play_type"]}"')
+    if slots["red_zone"]:
+        clauses.append("yardline_100 <= 20")
+    clauses.append("!is.na(epa)")
+    return clauses
+
+
+def _summary(slots: dict) -> str:
+    lines = [
+        "plays = n()",
+        "epa_per_play = round(mean(epa, na.rm = TRUE), 3)",
+        "success_rate = round(mean(success, na.rm = TRUE), 3)",
+    ]
+    if slots["cpoe"]:
+        lines.append("cpoe = round(mean(cpoe, na.rm = TRUE), 2)")
+    return "summarize(\n    " + ",\n    ".join(lines) + "\n  )"
+
+
+def render_template(name: str, slots: dict) -> str:
+    """Fill one of the vetted R templates from extracted slots"""
+    column = slots["team_column"]
+    # Lower EPA allowed is better for a defense
+    best_first = "arrange(epa_per_play)" if column == "defteam" else "arrange(desc(epa_per_play))"
+    
+    if name == "team_trend":
+        clauses = [f'{column} == "{slots["teams"][0]}"'] + _filter_clauses(slots, all_seasons=True)
+        tail = f"group_by(season) |>\n  {_summary(slots)} |>\n  arrange(season)"
+    elif name == "team_comparison":
+        clauses = [f"{column} %in% c({_r_list(slots['teams'], quote=True)})"] + _filter_clauses(slots)
+        tail = f"group_by({column}) |>\n  {_summary(slots)} |>\n  {best_first}"
+    elif name == "league_ranking":
+        clauses = _filter_clauses(slots)
+        tail = f"group_by({column}) |>\n  {_summary(slots)} |>\n  {best_first}"
+    else:  # team_summary
+        clauses = [f'{column} == "{slots["teams"][0]}"'] + _filter_clauses(slots)
+        tail = _summary(slots)
+    
+    return f"pbp_data |>\n  filter({', '.join(clauses)}) |>\n  {tail}"
+
+
+def match_template(query: str) -> Optional[tuple[str, dict]]:
+    """Template name and slots for a query, or None when no template fits"""
+    if not ROUTER_ENABLED:
+        return None
+    
+    slots = extract_slots(query)
+    if slots is None or not slots["measure"]:
+        return None
+    
+    teams = slots["teams"]
+    if len(teams) >= 2:
+        name = "team_comparison"  # Paradigm 1
+    elif len(teams) == 1 and (slots["trend"] or slots["last_n"] or len(slots["seasons"]) > 1):
+        name = "team_trend"  # Paradigm 2
+    elif len(teams) == 1:
+        name = "team_summary"  # Paradigm 3, or a single-team Paradigm 1
+    elif slots["ranking"] and not slots["trend"]:
+        name = "league_ranking"  # Paradigm 1 across the league
+    else:
+        return None
+    
+    return name, slots
+
+
+def route_query(query: str) -> Optional[tuple[str, str]]:
+    """
+    Match a query to an R template.
+    Returns (template name, R script), or None to fall back to Chain A.
+    """
+    matched = match_template(query)
+    if matched is None:
+        return None
+    name, slots = matched
+    return name, render_template(name, slots)
+
+
+_router_stats = {"hits": 0, "misses": 0}
+_route_latencies: dict = {}
+
+
+def _route_latency(route: str) -> dict:
+    if route not in _route_latencies:
+        _route_latencies[route] = {"count": 0, "script_ms": deque(maxlen=500), "total_ms": deque(maxlen=500)}
+    return _route_latencies[route]
+
+
+def record_route_latency(route: str, started: float) -> None:
+    """Record end-to-end pipeline latency for a query served via `route`"""
+    _route_latency(route)["total_ms"].append((time.perf_counter() - started) * 1000)
+
+
+async def generate_r_script(query: str) -> tuple[str, str]:
+    """
+    R script for a query from the template router, falling back to Chain A.
+    Returns the script and the route that produced it ('llm' for Chain A).
+    """
+    started = time.perf_counter()
+    return await script_for_route(query, route_query(query), started)
+
+
+async def script_for_route(query: str, routed: Optional[tuple[str, str]], started: float) -> tuple[str, str]:
+    """generate_r_script for a query whose route_query result is already known"""
+    cache_lookups.inc(cache="router", outcome="hit" if routed else "miss")
+    if routed:
+        _router_stats["hits"] += 1
+        route, r_script = routed
+    else:
+        _router_stats["misses"] += 1
+        with stage_timer("chain_a"):
+            route, r_script = "llm", await chain_a_generate_r_script(query)
+    latency = _route_latency(route)
+    latency["count"] += 1
+    latency["script_ms"].append((time.perf_counter() - started) * 1000)
+    return r_script, route
+
+
+def get_router_stats() -> dict:
+    """Router hit rate and per-template script and end-to-end latency"""
+    def percentile(samples, p: float) -> float:
+        ordered = sorted(samples)
+        if not ordered:
+            return 0.0
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 2)
+    
+    lookups = _router_stats["hits"] + _router_stats["misses"]
+    return {
+        "enabled": ROUTER_ENABLED,
+        "hits": _router_stats["hits"],
+        "misses": _router_stats["misses"],
+        "hit_rate": round(_router_stats["hits"] / lookups, 3) if lookups else 0.0,
+        "routes": {
+            route: {
+                "count": samples["count"],
+                "script_p50_ms": percentile(samples["script_ms"], 0.5),
+                "total_p50_ms": percentile(samples["total_ms"], 0.5),
+                "total_p95_ms": percentile(samples["total_ms"], 0.95),
             }
-        ],
-        temperature=0.7,
-        max_tokens=800,
-    )
+            for route, samples in _route_latencies.items()
+        },
+        "decomposed": _decompose_stats,
+    }
+
+
+# ============================================
+# Query Decomposition
+# ============================================
+# Comparison and multi-season trend templates split into independent
+# sub-scripts over subsets of their teams or seasons. The parts run
+# concurrently on different R replicas and are row-bound back into the
+# frame the whole script would have produced.
+
+DECOMPOSE_QUERIES = os.getenv("DECOMPOSE_QUERIES", "true").lower() == "true"
+DECOMPOSE_MAX_PARTS = int(os.getenv("DECOMPOSE_MAX_PARTS", "4"))
+
+_decompose_stats = {"queries": 0, "parts": 0}
+
+
+def decompose_query(query: str, parts: int) -> Optional[dict]:
+    """
+    Split a routed query into at most `parts` sub-scripts.
+    Returns {"scripts", "order_by", "descending"} or None when the query
+    has nothing to split or fewer than two parts are available.
+    """
+    matched = match_template(query) if DECOMPOSE_QUERIES and parts > 1 else None
+    if matched is None:
+        return None
+    
+    name, slots = matched
+    if name == "team_comparison":
+        key, order_by, descending = "teams", "epa_per_play", slots["team_column"] == "posteam"
+    elif name == "team_trend" and len(slots["seasons"]) > 1 and not slots["since"] and not slots["last_n"]:
+        key, order_by, descending = "seasons", "season", False
+    else:
+        return None
     
-    content = response.choices[0].message.content or ""
+    values = slots[key]
+    chunks = [values[i::parts] for i in range(min(parts, len(values)))]
+    return {
+        "scripts": [render_template(name, {**slots, key: chunk}) for chunk in chunks],
+        "order_by": order_by,
+        "descending": descending,
+    }
+
+
+def merge_frames(frames: list, order_by: str, descending: bool = False) -> dict:
+    """
+    Row-bind {column: values} frames (a scalar column is a one-row frame)
+    and sort by `order_by`, missing values last. A single merged row is
+    unboxed to scalars, as Plumber's JSON would have it.
+    """
+    columns = list(dict.fromkeys(column for frame in frames for column in frame))
+    rows = []
+    for frame in frames:
+        values = {c: v if isinstance(v, list) else [v] for c, v in frame.items()}
+        count = max((len(v) for v in values.values()), default=0)
+        rows.extend({c: values[c][i] if c in values else None for c in columns} for i in range(count))
     
+    present = [row for row in rows if row.get(order_by) is not None]
+    missing = [row for row in rows if row.get(order_by) is None]
+    rows = sorted(present, key=lambda row: row[order_by], reverse=descending) + missing
+    if len(rows) == 1:
+        return dict(rows[0])
+    return {column: [row[column] for row in rows] for column in columns}
+
+
+def available_parallelism(engine: Optional[str] = None) -> int:
+    """
+    Sub-scripts worth running at once: one per healthy R replica. DuckDB
+    already spreads a single query across its threads, so it gets one.
+    """
+    if (engine or EXECUTION_ENGINE) != "r":
+        return 1
+    healthy = sum(1 for replica in r_pool.replicas if replica.healthy)
+    return min(DECOMPOSE_MAX_PARTS, healthy)
+
+
+async def execute_plan(query: str, r_script: str, route: str, engine: Optional[str] = None) -> dict:
+    """
+    Run a query's script, decomposed into concurrent parts when its template
+    allows it and more than one worker is available, else as a whole
+    """
+    plan = decompose_query(query, available_parallelism(engine)) if route != "llm" else None
+    if plan is None:
+        return await execute_script(r_script, engine)
+    
+    _decompose_stats["queries"] += 1
+    _decompose_stats["parts"] += len(plan["scripts"])
+    results = await asyncio.gather(*(execute_script(script, engine) for script in plan["scripts"]))
+    for result in results:
+        if not result.get("success"):
+            return result
+    return {
+        "success": True,
+        "result": merge_frames([r.get("result") or {} for r in results], plan["order_by"], plan["descending"]),
+        "engine": "duckdb" if all(r.get("engine") == "duckdb" for r in results) else "r",
+    }
+
+
+def build_memo_messages(query: str, data: dict) -> list:
+    """Build the Chain B prompt for a query and its R result, compacted to a token budget"""
+    return [
+        system_message(MEMO_SYSTEM_PROMPT),
+        {
+            "role": "user",
+            "content": f"""Original question: {query}
+
+Data from analysis:
+{compact_result(data)}
+
+Write a brief memo and suggest chart configuration."""
+        }
+    ]
+
+
+def parse_memo(content: str) -> dict:
+    """Split a Chain B completion into headline, summary and chart config"""
     # Parse response
     lines = content.strip().split('\n')
     headline = lines[0].strip('#').strip() if lines else "Analysis Results"
@@ -191,29 +531,284 @@ Write a brief memo and suggest chart configuration."""
     }
 
 
-async def analyze_query(query: str) -> dict:
+async def chain_b_synthesize_memo(query: str, data: dict) -> dict:
     """
-    Main analysis pipeline:
-    1. Generate R code from query
-    2. Execute R code
-    3. Synthesize memo from results
+    Chain B: Convert R result to memo with chart config
     """
-    # Chain A: Generate R code
-    r_script = await chain_a_generate_r_script(query)
+    content = await complete(
+        "chain_b",
+        SUMMARY_MODEL,
+        build_memo_messages(query, data),
+        temperature=0.7,
+        max_tokens=800,
+    )
+    
+    return parse_memo(content)
+
+
+async def chain_b_stream_memo(query: str, data: dict) -> AsyncIterator[str]:
+    """
+    Chain B, streamed: yield memo text deltas as the model produces them
+    """
+    async for delta in stream(
+        "chain_b",
+        SUMMARY_MODEL,
+        build_memo_messages(query, data),
+        temperature=0.7,
+        max_tokens=800,
+    ):
+        yield delta
+
+
+def r_error_memo(r_script: str, r_result: dict) -> dict:
+    """Memo returned when the R service could not run the generated script"""
+    return {
+        "headline": "Analysis Error",
+        "summary": f"<p>Could not execute analysis: {r_result.get('error', 'Unknown error')}</p>",
+        "error": r_result.get("error"),
+        "raw_data": {"r_script": r_script}
+    }
+
+
+async def _analyze(query: str, engine: Optional[str] = None) -> tuple[dict, str]:
+    """analyze_query, plus the engine that executed the script"""
+    started = time.perf_counter()
+    r_script, route = await generate_r_script(query)
     
     # Execute R script
-    r_result = await execute_r_script(r_script)
+    with stage_timer("execute"):
+        r_result = await execute_plan(query, r_script, route, engine)
     
     if not r_result.get("success"):
-        return {
-            "headline": "Analysis Error",
-            "summary": f"<p>Could not execute analysis: {r_result.get('error', 'Unknown error')}</p>",
-            "error": r_result.get("error"),
-            "raw_data": {"r_script": r_script}
-        }
+        return r_error_memo(r_script, r_result), r_result.get("engine", "r")
     
     # Chain B: Synthesize memo
-    memo = await chain_b_synthesize_memo(query, r_result.get("result", {}))
+    with stage_timer("chain_b"):
+        memo = await chain_b_synthesize_memo(query, r_result.get("result", {}))
     memo["raw_data"] = r_result.get("result")
     
+    record_route_latency(route, started)
+    return memo, r_result["engine"]
+
+
+async def analyze_query(query: str, engine: Optional[str] = None) -> dict:
+    """
+    Main analysis pipeline:
+    1. Generate R code from query (template router, else Chain A)
+    2. Execute R code
+    3. Synthesize memo from results
+    """
+    memo, _ = await _analyze(query, engine)
+    return memo
+
+
+async def cache_memo(query: str, memo: dict, executed_on: str, versions: dict) -> None:
+    """Cache a memo under the data version of the engine that answered it"""
+    version = versions.get(executed_on)
+    if version and not memo.get("error"):
+        await result_cache.set(query, version, memo, executed_on)
+
+
+async def analyze_and_cache(query: str, versions: dict, engine: Optional[str] = None) -> dict:
+    """Run analyze_query and cache the memo against the `versions` read before it started"""
+    memo, executed_on = await _analyze(query, engine)
+    await cache_memo(query, memo, executed_on, versions)
     return memo
+
+
+async def cached_analyze_query(query: str, engine: Optional[str] = None) -> tuple[dict, bool]:
+    """
+    Run analyze_query behind the versioned result cache.
+    
+    Returns the memo and whether it was served from cache. Failed analyses
+    are never cached, and nothing is cached while the data version of the
+    engine that answered is unknown.
+    """
+    versions = await cache_versions(engine)
+    if versions:
+        memo = await result_cache.lookup(query, versions)
+        cache_lookups.inc(cache="result", outcome="miss" if memo is None else "hit")
+        if memo is not None:
+            return memo, True
+    
+    return await analyze_and_cache(query, versions, engine), False
+
+
+async def stream_analyze_query(query: str, engine: Optional[str] = None) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Streaming variant of cached_analyze_query.
+    
+    Yields (event, data) pairs as each stage completes:
+    script, executing, r_result, token (memo text deltas), chart, and
+    finally memo, which carries the same shape as analyze_query's result.
+    """
+    versions = await cache_versions(engine)
+    if versions:
+        memo = await result_cache.lookup(query, versions)
+        cache_lookups.inc(cache="result", outcome="miss" if memo is None else "hit")
+        if memo is not None:
+            yield "memo", memo
+            return
+    
+    started = time.perf_counter()
+    r_script, route = await generate_r_script(query)
+    yield "script", {"r_script": r_script, "route": route}
+    
+    yield "executing", {}
+    with stage_timer("execute"):
+        r_result = await execute_plan(query, r_script, route, engine)
+    
+    if not r_result.get("success"):
+        yield "memo", r_error_memo(r_script, r_result)
+        return
+    
+    data = r_result.get("result", {})
+    yield "r_result", {"columns": list(data) if isinstance(data, Mapping) else []}
+    
+    content = ""
+    with stage_timer("chain_b"):
+        async for delta in chain_b_stream_memo(query, data):
+            content += delta
+            yield "token", {"text": delta}
+    
+    memo = parse_memo(content)
+    if memo.get("chart"):
+        yield "chart", memo["chart"]
+    
+    memo["raw_data"] = data
+    await cache_memo(query, memo, r_result["engine"], versions)
+    
+    record_route_latency(route, started)
+    yield "memo", memo
+
+
+# ============================================
+# Batch Analysis
+# ============================================
+# Dashboards ask for many queries at once. A batch analyzes each distinct
+# query once, writes the shared Chain A prompt prefix to the provider cache
+# with its first call before the rest read it concurrently, runs every
+# script in one multi-script R request and synthesizes memos concurrently.
+
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "50"))
+BATCH_SCRIPT_CONCURRENCY = int(os.getenv("BATCH_SCRIPT_CONCURRENCY", "8"))
+BATCH_MEMO_CONCURRENCY = int(os.getenv("BATCH_MEMO_CONCURRENCY", "8"))
+
+_batch_stats = {"batches": 0, "queries": 0, "duplicates": 0, "cache_hits": 0, "errors": 0}
+
+
+def error_memo(error: str) -> dict:
+    """Memo for a batch item whose pipeline raised"""
+    return {
+        "headline": "Analysis Error",
+        "summary": f"<p>An error occurred while processing your query: {error}</p>",
+        "error": error
+    }
+
+
+async def analyze_batch(queries: list, engine: Optional[str] = None) -> AsyncIterator[tuple[list, dict, bool]]:
+    """
+    Analyze many queries, yielding (indexes, memo, cache_hit) as each
+    distinct query finishes. Queries that normalize to the same text are
+    analyzed once and reported for every index they appear at. A failure
+    in one query's script, execution or memo only affects that item.
+    """
+    groups: dict = {}
+    for index, query in enumerate(queries):
+        groups.setdefault(normalize_query(query), []).append(index)
+    _batch_stats["batches"] += 1
+    _batch_stats["queries"] += len(queries)
+    _batch_stats["duplicates"] += len(queries) - len(groups)
+    
+    versions = await cache_versions(engine)
+    todo = []  # (query, indexes) not served from the result cache
+    for indexes in groups.values():
+        query = queries[indexes[0]]
+        if versions:
+            memo = await result_cache.lookup(query, versions)
+            cache_lookups.inc(cache="result", outcome="miss" if memo is None else "hit")
+            if memo is not None:
+                _batch_stats["cache_hits"] += 1
+                yield indexes, memo, True
+                continue
+        todo.append((query, indexes))
+    if not todo:
+        return
+    
+    started = time.perf_counter()
+    scripts = await _batch_scripts([query for query, _ in todo])
+    
+    # Every script that was generated goes to R in one request
+    runnable = [i for i, script in enumerate(scripts) if not isinstance(script, Exception)]
+    results: dict = {}
+    try:
+        with stage_timer("execute"):
+            executed = await execute_scripts([scripts[i][0] for i in runnable], engine)
+        results = dict(zip(runnable, executed))
+    except Exception as e:  # Overloaded included: the whole batch was shed
+        results = {i: e for i in runnable}
+    
+    memo_gate = asyncio.Semaphore(BATCH_MEMO_CONCURRENCY)
+    
+    async def finish(position: int) -> tuple[list, dict]:
+        query, indexes = todo[position]
+        outcome = scripts[position] if position not in results else results[position]
+        if isinstance(outcome, Exception):
+            return indexes, error_memo(str(outcome))
+        r_script, route = scripts[position]
+        if not outcome.get("success"):
+            return indexes, r_error_memo(r_script, outcome)
+        data = outcome.get("result", {})
+        try:
+            async with memo_gate:
+                with stage_timer("chain_b"):
+                    memo = await chain_b_synthesize_memo(query, data)
+        except Exception as e:
+            return indexes, error_memo(str(e))
+        memo["raw_data"] = data
+        await cache_memo(query, memo, outcome["engine"], versions)
+        record_route_latency(route, started)
+        return indexes, memo
+    
+    tasks = [asyncio.ensure_future(finish(position)) for position in range(len(todo))]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            indexes, memo = await next_done
+            if memo.get("error"):
+                _batch_stats["errors"] += 1
+            yield indexes, memo, False
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _batch_scripts(queries: list) -> list:
+    """
+    (script, route) per query, or the exception that stopped it. Router
+    matches are immediate; the first Chain A call runs alone so the cached
+    system prompt is written once, then the rest run BATCH_SCRIPT_CONCURRENCY at a time.
+    """
+    gate = asyncio.Semaphore(BATCH_SCRIPT_CONCURRENCY)
+    
+    routes = [route_query(query) for query in queries]
+    
+    async def script_for(i: int):
+        try:
+            async with gate:
+                return await script_for_route(queries[i], routes[i], time.perf_counter())
+        except Exception as e:
+            return e
+    
+    scripts: list = [None] * len(queries)
+    needs_llm = [i for i, routed in enumerate(routes) if routed is None]
+    if len(needs_llm) > 1:
+        scripts[needs_llm[0]] = await script_for(needs_llm[0])
+    rest = [i for i in range(len(queries)) if scripts[i] is None]
+    for i, script in zip(rest, await asyncio.gather(*(script_for(i) for i in rest))):
+        scripts[i] = script
+    return scripts
+
+
+def get_batch_stats() -> dict:
+    """Batch request totals: queries, duplicates folded, cache hits and failed items"""
+    return dict(_batch_stats)
@@ -0,0 +1,712 @@
+"""
+Gridiron Columnar Engine
+Runs the restricted dplyr subset allowed by CODE_SYSTEM_PROMPT in-process on
+DuckDB over local nflfastR Parquet snapshots, as an alternative to the R service
+"""
+
+import asyncio
+import codecs
+import glob
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Optional
+
+try:
+    import duckdb
+except ImportError:  # optional: only needed for EXECUTION_ENGINE=duckdb
+    duckdb = None
+
+from r_client import execute_r_script, execute_r_scripts, get_data_version
+
+# Configuration
+EXECUTION_ENGINE = os.getenv("EXECUTION_ENGINE", "r")  # 'r' or 'duckdb'
+PBP_PARQUET_PATH = os.getenv("PBP_PARQUET_PATH", "./data/pbp/*.parquet")
+COLUMNAR_THREADS = int(os.getenv("COLUMNAR_THREADS", "0"))  # 0 = all cores
+
+ENGINES = ("r", "duckdb")
+
+
+class UnsupportedScript(Exception):
+    """The script uses R outside the subset this engine can translate"""
+
+
+# ============================================
+# R Parser
+# ============================================
+# Just enough R to read dplyr pipelines: literals, names, calls with named
+# arguments, the usual operators, |> / %>% pipes and `<-` assignment.
+
+_TOKEN = re.compile(r"""
+    (?P<ws>[ \t\r]+|\#[^\n]*)
+  | (?P<nl>[\n;])
+  | (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?L?)
+  | (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<name>`[^`]+`|[A-Za-z.][A-Za-z0-9._]*(?:::[A-Za-z.][A-Za-z0-9._]*)?)
+  | (?P<op>\|>|%[^%\s]*%|<-|==|!=|<=|>=|&&|\|\||[-+*/^<>!&|(),=\[\]])
+""", re.VERBOSE)
+
+# A newline after one of these continues the expression
+_CONTINUES = {"|>", "<-", "==", "!=", "<=", ">=", "&&", "||", "+", "-", "*", "/", "^", "<", ">", "!", "&", "|", "(", ",", "="}
+
+
+def tokenize(script: str) -> list:
+    tokens = []
+    depth = 0
+    pos = 0
+    while pos < len(script):
+        match = _TOKEN.match(script, pos)
+        if not match:
+            raise UnsupportedScript(f"Unexpected character {script[pos]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "ws":
+            continue
+        if kind == "nl":
+            if depth == 0 and tokens and tokens[-1] != ("nl", "\n") and not (
+                tokens[-1][0] == "op" and (tokens[-1][1] in _CONTINUES or tokens[-1][1].startswith("%"))
+            ):
+                tokens.append(("nl", "\n"))
+            continue
+        if kind == "op" and value in "([":
+            depth += 1
+        elif kind == "op" and value in ")]":
+            depth -= 1
+        if kind == "num":
+            value = float(value.rstrip("L")) if re.search(r"[.eE]", value) else int(value.rstrip("L"))
+        elif kind == "str":
+            # Only backslash sequences are unescaped; other characters pass through intact
+            value = codecs.decode(value[1:-1].encode("latin-1", "backslashreplace"), "unicode_escape")
+        elif kind == "name":
+            value = value.strip("`").split("::")[-1]
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over R operator precedence; pipes are desugared into calls"""
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, ahead: int = 0) -> tuple:
+        index = self.pos + ahead
+        return self.tokens[index] if index < len(self.tokens) else ("eof", None)
+
+    def take(self, value=None) -> tuple:
+        token = self.peek()
+        if value is not None and token[1] != value:
+            raise UnsupportedScript(f"Expected {value!r}, found {token[1]!r}")
+        self.pos += 1
+        return token
+
+    def at(self, *values) -> bool:
+        token = self.peek()
+        return token[0] == "op" and token[1] in values
+
+    def program(self) -> list:
+        statements = []
+        while self.peek()[0] != "eof":
+            if self.peek()[0] == "nl":
+                self.take()
+                continue
+            statements.append(self.assignment())
+        return statements
+
+    def assignment(self):
+        node = self.or_()
+        if self.at("<-"):
+            self.take()
+            if node[0] != "name":
+                raise UnsupportedScript("Only simple assignment is supported")
+            return ("assign", node[1], self.assignment())
+        return node
+
+    def _binary(self, operand, ops: tuple):
+        node = operand()
+        while self.at(*ops):
+            op = self.take()[1]
+            node = ("binop", op, node, operand())
+        return node
+
+    def or_(self):
+        return self._binary(self.and_, ("|", "||"))
+
+    def and_(self):
+        return self._binary(self.not_, ("&", "&&"))
+
+    def not_(self):
+        if self.at("!"):
+            self.take()
+            return ("unop", "!", self.not_())
+        return self.comparison()
+
+    def comparison(self):
+        return self._binary(self.additive, ("==", "!=", "<", "<=", ">", ">="))
+
+    def additive(self):
+        return self._binary(self.multiplicative, ("+", "-"))
+
+    def multiplicative(self):
+        return self._binary(self.special, ("*", "/"))
+
+    def special(self):
+        node = self.unary()
+        while self.peek()[0] == "op" and (self.peek()[1] == "|>" or self.peek()[1].startswith("%")):
+            op = self.take()[1]
+            right = self.unary()
+            if op in ("|>", "%>%"):
+                if right[0] != "call":
+                    raise UnsupportedScript("Pipe into a non-call")
+                node = ("call", right[1], [(None, node)] + right[2])
+            else:
+                node = ("binop", op, node, right)
+        return node
+
+    def unary(self):
+        if self.at("-", "+"):
+            op = self.take()[1]
+            return ("unop", op, self.unary())
+        return self.power()
+
+    def power(self):
+        node = self.postfix()
+        if self.at("^"):
+            self.take()
+            return ("binop", "^", node, self.unary())
+        return node
+
+    def postfix(self):
+        node = self.primary()
+        while self.at("("):
+            if node[0] != "name":
+                raise UnsupportedScript("Only named functions can be called")
+            self.take("(")
+            args = []
+            while not self.at(")"):
+                name = None
+                if self.peek()[0] in ("name", "str") and self.peek(1) == ("op", "="):
+                    name = self.take()[1]
+                    self.take("=")
+                args.append((name, self.assignment()))
+                if not self.at(")"):
+                    self.take(",")
+            self.take(")")
+            node = ("call", node[1], args)
+        if self.at("["):
+            raise UnsupportedScript("Indexing is not supported")
+        return node
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == "op" and value == "(":
+            node = self.assignment()
+            self.take(")")
+            return node
+        if kind in ("num", "str"):
+            return (kind, value)
+        if kind == "name":
+            if value in ("TRUE", "FALSE", "T", "F"):
+                return ("bool", value in ("TRUE", "T"))
+            if value in ("NA", "NA_real_", "NA_integer_", "NA_character_", "NULL"):
+                return ("na",)
+            return ("name", value)
+        raise UnsupportedScript(f"Unexpected token {value!r}")
+
+
+# ============================================
+# dplyr → SQL
+# ============================================
+
+AGGREGATES = {"mean", "sum", "n", "min", "max", "median", "sd", "var", "n_distinct"}
+VERBS = {
+    "filter", "select", "mutate", "group_by", "ungroup", "summarize", "summarise",
+    "arrange", "head", "slice_head", "tail", "count",
+}
+_BINOPS = {
+    "==": "=", "!=": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">=",
+    "&": "AND", "&&": "AND", "|": "OR", "||": "OR",
+    "+": "+", "-": "-", "*": "*", "/": "/", "^": "^",
+}
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def quote_str(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class _Relation:
+    """A translated intermediate result: CTE name, columns and dplyr grouping/order state"""
+
+    def __init__(self, name: str, columns: list, groups: list = None, order: list = None):
+        self.name = name
+        self.columns = columns
+        self.groups = groups or []
+        self.order = order or []
+
+    def like(self, **changes) -> "_Relation":
+        state = {"columns": self.columns, "groups": self.groups, "order": self.order, **changes}
+        return _Relation(self.name, **state)
+
+    def group_sql(self) -> list:
+        return [quote_ident(g) for g in self.groups]
+
+
+class _Translator:
+    """Turns a parsed pipeline into one SQL statement built from CTEs"""
+
+    def __init__(self, columns: list):
+        self.ctes: list = []
+        self.env = {"pbp_data": _Relation("pbp_data", list(columns))}
+
+    def add_cte(self, sql: str, source: _Relation, **changes) -> _Relation:
+        name = f"s{len(self.ctes)}"
+        self.ctes.append(f"{name} AS ({sql})")
+        return _Relation(name, **{"columns": source.columns, "groups": source.groups, "order": source.order, **changes})
+
+    def translate(self, statements: list) -> str:
+        result = None
+        for statement in statements:
+            if statement[0] == "assign":
+                self.env[statement[1]] = self.relation(statement[2])
+            else:
+                result = self.relation(statement)
+        if result is None:
+            raise UnsupportedScript("Script has no result expression")
+
+        order = f" ORDER BY {', '.join(result.order)}" if result.order else ""
+        final = f"SELECT * FROM {result.name}{order}"
+        return f"WITH {', '.join(self.ctes)} {final}" if self.ctes else final
+
+    # Relations
+
+    def relation(self, node) -> _Relation:
+        if node[0] == "name":
+            if node[1] not in self.env:
+                raise UnsupportedScript(f"Unknown data frame {node[1]!r}")
+            return self.env[node[1]]
+        if node[0] != "call" or node[1] not in VERBS:
+            raise UnsupportedScript(f"Unsupported step: {node[1] if node[0] == 'call' else node[0]}")
+        args = node[2]
+        if not args or args[0][0] is not None:
+            raise UnsupportedScript(f"{node[1]}() needs a data frame")
+        source = self.relation(args[0][1])
+        return getattr(self, f"verb_{node[1]}")(source, args[1:])
+
+    def verb_filter(self, source: _Relation, args: list) -> _Relation:
+        conditions = [self.expr(arg, source) for name, arg in args if name is None]
+        if not conditions:
+            return source
+        where = " AND ".join(f"({c})" for c in conditions)
+        clause = "QUALIFY" if " OVER (" in where else "WHERE"
+        return self.add_cte(f"SELECT * FROM {source.name} {clause} {where}", source)
+
+    def verb_select(self, source: _Relation, args: list) -> _Relation:
+        keep, drop = [], []
+        for _, arg in args:
+            if arg[0] == "unop" and arg[1] == "-" and arg[2][0] == "name":
+                drop.append(arg[2][1])
+            elif arg[0] == "name":
+                keep.append(arg[1])
+            else:
+                raise UnsupportedScript("select() supports column names only")
+        if keep and drop:
+            raise UnsupportedScript("select() cannot mix kept and dropped columns")
+        columns = keep or [c for c in source.columns if c not in drop]
+        # dplyr keeps grouping columns even when they are not selected
+        columns = [g for g in source.groups if g not in columns] + columns
+        order = f" ORDER BY {', '.join(source.order)}" if source.order else ""  # may sort on a dropped column
+        sql = f"SELECT {', '.join(quote_ident(c) for c in columns)} FROM {source.name}{order}"
+        return self.add_cte(sql, source, columns=columns, order=[])
+
+    def verb_mutate(self, source: _Relation, args: list) -> _Relation:
+        aliases: dict = {}
+        for name, arg in args:
+            if name is None:
+                raise UnsupportedScript("mutate() arguments must be named")
+            aliases[name] = self.expr(arg, source, aliases=aliases)
+        # Existing columns are replaced in place, new ones are appended
+        columns = [
+            f"{aliases[c]} AS {quote_ident(c)}" if c in aliases else quote_ident(c)
+            for c in source.columns
+        ]
+        added = [name for name in aliases if name not in source.columns]
+        columns += [f"{aliases[name]} AS {quote_ident(name)}" for name in added]
+        sql = f"SELECT {', '.join(columns)} FROM {source.name}"
+        return self.add_cte(sql, source, columns=source.columns + added)
+
+    def verb_group_by(self, source: _Relation, args: list) -> _Relation:
+        groups = []
+        for name, arg in args:
+            if name == ".add" and arg == ("bool", True):
+                groups = source.groups + groups
+                continue
+            if arg[0] != "name":
+                raise UnsupportedScript("group_by() supports column names only")
+            groups.append(arg[1])
+        return source.like(groups=groups)
+
+    def verb_ungroup(self, source: _Relation, args: list) -> _Relation:
+        return source.like(groups=[])
+
+    def verb_summarize(self, source: _Relation, args: list) -> _Relation:
+        aliases: dict = {}
+        groups_mode = None
+        for name, arg in args:
+            if name == ".groups":
+                groups_mode = arg[1] if arg[0] == "str" else None
+                continue
+            if name is None:
+                raise UnsupportedScript("summarize() arguments must be named")
+            aliases[name] = self.expr(arg, source, aggregate=True, aliases=aliases)
+        columns = source.group_sql() + [f"{sql} AS {quote_ident(name)}" for name, sql in aliases.items()]
+        group_by = f" GROUP BY {', '.join(source.group_sql())}" if source.groups else ""
+        sql = f"SELECT {', '.join(columns)} FROM {source.name}{group_by}"
+
+        # dplyr drops the last grouping level unless told otherwise
+        if groups_mode == "keep":
+            groups = source.groups
+        elif groups_mode == "drop":
+            groups = []
+        else:
+            groups = source.groups[:-1]
+        return self.add_cte(
+            sql, source,
+            columns=source.groups + list(aliases), groups=groups,
+            order=[f"{g} ASC NULLS LAST" for g in source.group_sql()]
+        )
+
+    verb_summarise = verb_summarize
+
+    def verb_count(self, source: _Relation, args: list) -> _Relation:
+        extra = []
+        for name, arg in args:
+            if name is not None or arg[0] != "name":
+                raise UnsupportedScript("count() supports column names only")
+            extra.append(arg[1])
+        grouped = source.like(groups=source.groups + extra)
+        counted = self.verb_summarize(grouped, [("n", ("call", "n", []))])
+        return counted.like(groups=source.groups)
+
+    def verb_arrange(self, source: _Relation, args: list) -> _Relation:
+        order = []
+        for _, arg in args:
+            if arg[0] == "call" and arg[1] == "desc" and len(arg[2]) == 1:
+                order.append(f"{self.expr(arg[2][0][1], source)} DESC NULLS LAST")
+            else:
+                order.append(f"{self.expr(arg, source)} ASC NULLS LAST")
+        return source.like(order=order)
+
+    def _limit_count(self, args: list) -> int:
+        if not args:
+            return 6
+        name, value = args[0]
+        if value[0] != "num" or name not in (None, "n"):
+            raise UnsupportedScript("head()/tail() need a literal row count")
+        return int(value[1])
+
+    def verb_head(self, source: _Relation, args: list) -> _Relation:
+        order = f" ORDER BY {', '.join(source.order)}" if source.order else ""
+        return self.add_cte(f"SELECT * FROM {source.name}{order} LIMIT {self._limit_count(args)}", source)
+
+    def verb_slice_head(self, source: _Relation, args: list) -> _Relation:
+        if source.groups:
+            raise UnsupportedScript("slice_head() on grouped data is not supported")
+        return self.verb_head(source, args or [("n", ("num", 1))])
+
+    def verb_tail(self, source: _Relation, args: list) -> _Relation:
+        window = f"ORDER BY {', '.join(source.order)}" if source.order else ""
+        numbered = (
+            f"SELECT *, row_number() OVER ({window}) AS __row, count(*) OVER () AS __rows "
+            f"FROM {source.name}"
+        )
+        sql = (
+            f"SELECT * EXCLUDE (__row, __rows) FROM ({numbered}) "
+            f"WHERE __row > __rows - {self._limit_count(args)} ORDER BY __row"
+        )
+        return self.add_cte(sql, source, order=[])
+
+    # Expressions
+
+    def expr(self, node, source: _Relation, aggregate: bool = False, aliases: dict = None) -> str:
+        aliases = aliases or {}
+        kind = node[0]
+
+        if kind == "num":
+            return repr(node[1])
+        if kind == "str":
+            return quote_str(node[1])
+        if kind == "bool":
+            return "TRUE" if node[1] else "FALSE"
+        if kind == "na":
+            return "NULL"
+        if kind == "name":
+            if node[1] in aliases:
+                return f"({aliases[node[1]]})"
+            return quote_ident(node[1])
+
+        if kind == "unop":
+            operand = self.expr(node[2], source, aggregate, aliases)
+            return f"(NOT {operand})" if node[1] == "!" else f"({node[1]}{operand})"
+
+        if kind == "binop":
+            op, left, right = node[1], node[2], node[3]
+            if op == "%in%":
+                if right[0] != "call" or right[1] != "c":
+                    raise UnsupportedScript("%in% needs a c(...) vector")
+                values = ", ".join(self.expr(v, source, aggregate, aliases) for _, v in right[2])
+                return f"({self.expr(left, source, aggregate, aliases)} IN ({values}))"
+            if op not in _BINOPS:
+                raise UnsupportedScript(f"Unsupported operator {op}")
+            left_sql = self.expr(left, source, aggregate, aliases)
+            right_sql = self.expr(right, source, aggregate, aliases)
+            if op == "/":
+                return f"({left_sql} / NULLIF(CAST({right_sql} AS DOUBLE), 0))"
+            return f"({left_sql} {_BINOPS[op]} {right_sql})"
+
+        if kind == "call":
+            return self.call(node[1], node[2], source, aggregate, aliases)
+
+        raise UnsupportedScript(f"Unsupported expression {kind}")
+
+    def call(self, name: str, args: list, source: _Relation, aggregate: bool, aliases: dict) -> str:
+        positional = [self.expr(a, source, aggregate, aliases) for n, a in args if n is None]
+        named = {n: a for n, a in args if n is not None}
+
+        if name in AGGREGATES:
+            # Outside summarize() an aggregate is a window over the current groups
+            partition = f"PARTITION BY {', '.join(source.group_sql())}" if source.groups else ""
+            over = "" if aggregate else f" OVER ({partition})"
+            na_rm = named.get("na.rm", ("bool", False))[1] is True
+            if name == "n":
+                return f"count(*){over}"
+            if not positional:
+                raise UnsupportedScript(f"{name}() needs an argument")
+            x = positional[0]
+            sql = {
+                "mean": f"avg(CAST({x} AS DOUBLE)){over}",
+                "sum": f"sum({x}){over}",
+                "min": f"min({x}){over}",
+                "max": f"max({x}){over}",
+                "median": f"median({x}){over}",
+                "sd": f"stddev_samp({x}){over}",
+                "var": f"var_samp({x}){over}",
+                "n_distinct": f"count(DISTINCT {x}){over}",
+            }[name]
+            if name in ("n_distinct",) or na_rm:
+                return sql
+            # Without na.rm = TRUE, R returns NA if any input is NA
+            return f"(CASE WHEN count({x}){over} = count(*){over} THEN {sql} END)"
+
+        if name == "round":
+            digits = positional[1] if len(positional) > 1 else self.expr(named.get("digits", ("num", 0)), source)
+            return f"round({positional[0]}, {digits})"
+        if name == "is.na":
+            return f"({positional[0]} IS NULL)"
+        if name in ("ifelse", "if_else"):
+            if len(positional) != 3:
+                raise UnsupportedScript(f"{name}() needs three arguments")
+            return f"(CASE WHEN {positional[0]} THEN {positional[1]} ELSE {positional[2]} END)"
+        if name == "between":
+            return f"({positional[0]} BETWEEN {positional[1]} AND {positional[2]})"
+        if name == "abs":
+            return f"abs({positional[0]})"
+        if name == "sqrt":
+            return f"sqrt({positional[0]})"
+        if name in ("pmin", "pmax"):
+            return f"{'least' if name == 'pmin' else 'greatest'}({', '.join(positional)})"
+        if name == "as.numeric":
+            return f"CAST({positional[0]} AS DOUBLE)"
+        if name == "as.integer":
+            return f"CAST({positional[0]} AS INTEGER)"
+        if name == "as.character":
+            return f"CAST({positional[0]} AS VARCHAR)"
+        raise UnsupportedScript(f"Unsupported function {name}()")
+
+
+def translate(script: str, columns: list) -> str:
+    """Translate an R dplyr script into a single DuckDB query over `pbp_data` with `columns`"""
+    return _Translator(columns).translate(_Parser(tokenize(script)).program())
+
+
+# ============================================
+# Engine
+# ============================================
+
+def _to_result(columns: list, rows: list):
+    """Shape rows like the R service's JSON: column lists, unboxed for one row"""
+    def clean(value):
+        if isinstance(value, float):
+            return None if value != value else round(value, 4)  # NaN -> null, jsonlite's 4 digits
+        if isinstance(value, (int, str, bool)) or value is None:
+            return value
+        return str(value)
+
+    data = {name: [clean(row[i]) for row in rows] for i, name in enumerate(columns)}
+    if len(rows) == 1:
+        return {name: values[0] for name, values in data.items()}
+    return data
+
+
+class ColumnarEngine:
+    """
+    DuckDB holding the play-by-play snapshot in memory.
+    Queries run on worker threads, so the event loop stays free and DuckDB
+    can use every core for each scan.
+    """
+
+    def __init__(self, parquet_path: str = PBP_PARQUET_PATH, threads: int = COLUMNAR_THREADS):
+        self.parquet_path = parquet_path
+        self.threads = threads
+        self.columns: list = []
+        self.rows = 0
+        self.load_ms = 0.0
+        self.executed = 0
+        self.unsupported = 0
+        self.errors = 0
+        self.execute_ms = 0.0
+        self._conn = None
+        self._snapshot_version: Optional[str] = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return duckdb is not None
+
+    def _file_fingerprint(self) -> str:
+        files = sorted(glob.glob(self.parquet_path))
+        stamps = [f"{path}:{os.stat(path).st_size}:{os.stat(path).st_mtime_ns}" for path in files]
+        return hashlib.sha256("|".join(stamps).encode()).hexdigest()[:16]
+
+    def snapshot_version(self) -> str:
+        """Fingerprint of the Parquet files loaded (or that the next load would read)"""
+        return self._snapshot_version or self._file_fingerprint()
+
+    def load(self) -> None:
+        """Load the Parquet snapshot into an in-memory table (once)"""
+        with self._load_lock:
+            if self._conn is not None:
+                return
+            if duckdb is None:
+                raise RuntimeError("duckdb is not installed")
+            started = time.perf_counter()
+            conn = duckdb.connect()
+            if self.threads:
+                conn.execute(f"SET threads = {int(self.threads)}")
+            snapshot_version = self._file_fingerprint()
+            conn.execute(f"CREATE TABLE pbp_data AS SELECT * FROM read_parquet({quote_str(self.parquet_path)})")
+            self.columns = [row[0] for row in conn.execute("DESCRIBE pbp_data").fetchall()]
+            self.rows = conn.execute("SELECT count(*) FROM pbp_data").fetchone()[0]
+            self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+            self._snapshot_version = snapshot_version
+            self._conn = conn
+
+    def run(self, script: str) -> dict:
+        """Translate and run a script; raises UnsupportedScript if it can't be translated"""
+        self.load()
+        try:
+            sql = translate(script, self.columns)
+        except UnsupportedScript:
+            self.unsupported += 1
+            raise
+
+        started = time.perf_counter()
+        cursor = self._conn.cursor()
+        try:
+            relation = cursor.execute(sql)
+            columns = [d[0] for d in relation.description]
+            rows = relation.fetchall()
+        except duckdb.Error as e:
+            self.errors += 1
+            return {"success": False, "error": str(e)}
+        finally:
+            cursor.close()
+        self.executed += 1
+        self.execute_ms += (time.perf_counter() - started) * 1000
+        return {"success": True, "result": _to_result(columns, rows)}
+
+    async def execute(self, script: str) -> dict:
+        return await asyncio.to_thread(self.run, script)
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "loaded": self._conn is not None,
+            "snapshot_version": self._snapshot_version,
+            "rows": self.rows,
+            "load_ms": self.load_ms,
+            "executed": self.executed,
+            "unsupported": self.unsupported,
+            "errors": self.errors,
+            "avg_execute_ms": round(self.execute_ms / self.executed, 2) if self.executed else 0.0,
+        }
+
+
+columnar_engine = ColumnarEngine()
+
+
+async def cache_versions(engine: Optional[str] = None) -> dict:
+    """
+    {scope: data version} for every engine that may answer on `engine`, in
+    result-cache lookup order. DuckDB answers from its Parquet snapshot, so
+    its entries are keyed on the snapshot fingerprint and stay usable while R
+    is down; scripts it hands to R are keyed on R's data version.
+    """
+    engine = engine or EXECUTION_ENGINE
+    versions = {}
+    if engine == "duckdb" and columnar_engine.available:
+        versions["duckdb"] = columnar_engine.snapshot_version()
+    r_version = await get_data_version()
+    if r_version:
+        versions["r"] = r_version
+    return versions
+
+
+async def execute_script(script: str, engine: Optional[str] = None) -> dict:
+    """
+    Run an analysis script on the chosen engine ('r' or 'duckdb').
+    DuckDB falls back to the R service for scripts outside its dplyr subset,
+    or when duckdb or the Parquet snapshot is unavailable. The result's
+    'engine' names the engine that actually ran it.
+    """
+    engine = engine or EXECUTION_ENGINE
+    if engine == "duckdb" and columnar_engine.available:
+        try:
+            return {**await columnar_engine.execute(script), "engine": "duckdb"}
+        except UnsupportedScript:
+            pass
+        except Exception:
+            columnar_engine.errors += 1
+    return {**await execute_r_script(script), "engine": "r"}
+
+
+async def execute_scripts(scripts: list, engine: Optional[str] = None) -> list:
+    """
+    execute_script for many scripts at once: DuckDB runs the ones it can and
+    everything left goes to R as one multi-script request. Results are in order.
+    """
+    engine = engine or EXECUTION_ENGINE
+    results: list = [None] * len(scripts)
+    for_r = list(range(len(scripts)))
+    if engine == "duckdb" and columnar_engine.available:
+        for_r = []
+        for index, script in enumerate(scripts):
+            try:
+                results[index] = {**await columnar_engine.execute(script), "engine": "duckdb"}
+            except UnsupportedScript:
+                for_r.append(index)
+            except Exception:
+                columnar_engine.errors += 1
+                for_r.append(index)
+    if for_r:
+        batch = await execute_r_scripts([scripts[index] for index in for_r])
+        for index, result in zip(for_r, batch):
+            results[index] = {**result, "engine": "r"}
+    return results
@@ -0,0 +1,170 @@
+"""
+Gridiron Result Compaction
+Encodes R results as compact, budgeted tables for the Chain B prompt
+"""
+
+import json
+import math
+import os
+
+from arrow_ipc import ArrowResult
+from serialization import jsonable
+
+# Configuration
+COMPACT_RESULTS = os.getenv("COMPACT_RESULTS", "true").lower() == "true"
+COMPACT_TOP_N = int(os.getenv("COMPACT_TOP_N", "10"))
+COMPACT_BOTTOM_N = int(os.getenv("COMPACT_BOTTOM_N", "5"))
+COMPACT_SIG_DIGITS = int(os.getenv("COMPACT_SIG_DIGITS", "3"))
+COMPACT_TOKEN_BUDGET = int(os.getenv("COMPACT_TOKEN_BUDGET", "1500"))
+
+_stats = {"results": 0, "tokens_before": 0, "tokens_after": 0, "truncated": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count (~4 characters per token for English and numbers)"""
+    return math.ceil(len(text) / 4)
+
+
+def round_sig(value, digits: int = COMPACT_SIG_DIGITS):
+    """Round floats to significant digits; other values pass through"""
+    if isinstance(value, bool) or not isinstance(value, float):
+        return value
+    if value == 0 or not math.isfinite(value):
+        return value
+    rounded = round(value, digits - 1 - math.floor(math.log10(abs(value))))
+    return int(rounded) if rounded.is_integer() else rounded
+
+
+def _cell(value) -> str:
+    if value is None:
+        return "NA"
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"), default=jsonable)
+    return str(round_sig(value)).replace("|", "/")
+
+
+def _is_table(data) -> bool:
+    """R data frames arrive as {column: [values]} with equal-length columns"""
+    if isinstance(data, ArrowResult):
+        return len(data) > 0 and data.num_rows != 1  # one row reads as scalars
+    if not isinstance(data, dict) or not data:
+        return False
+    lengths = {len(v) if isinstance(v, list) else 1 for v in data.values()}
+    return len(lengths) == 1 and any(isinstance(v, list) for v in data.values())
+
+
+def _table(data: dict, top_n: int, bottom_n: int) -> list:
+    columns = list(data)
+    if isinstance(data, ArrowResult):
+        total = data.num_rows
+    else:
+        values = [v if isinstance(v, list) else [v] for v in data.values()]
+        total = len(values[0])
+    keep = list(range(total))
+    if total > top_n + bottom_n:
+        keep = list(range(top_n)) + list(range(total - bottom_n, total))
+    if isinstance(data, ArrowResult):
+        # Only the kept rows leave Arrow
+        kept = data.take(keep)
+        values, keep = [kept[c] for c in columns], list(range(len(keep)))
+
+    lines = ["|".join(columns)]
+    for position, row in enumerate(keep):
+        if position == top_n and total > top_n + bottom_n:
+            lines.append(f"... {total - top_n - bottom_n} rows omitted ...")
+        lines.append("|".join(_cell(column[row]) for column in values))
+    if total > len(keep):
+        lines.append(f"({total} rows total; first {top_n} and last {bottom_n} shown)")
+    return lines
+
+
+def _longest(data) -> int:
+    """Most rows (or list values) any single table or list in the result has"""
+    if _is_table(data):
+        if isinstance(data, ArrowResult):
+            return data.num_rows
+        return max(len(v) if isinstance(v, list) else 1 for v in data.values())
+    if isinstance(data, (dict, ArrowResult)):
+        return max((_longest(value) for value in data.values()), default=0)
+    if isinstance(data, list):
+        return len(data)
+    return 1
+
+
+def _encode(data, top_n: int, bottom_n: int) -> list:
+    if _is_table(data):
+        return _table(data, top_n, bottom_n)
+    if isinstance(data, (dict, ArrowResult)):
+        lines = []
+        for key, value in data.items():
+            if isinstance(value, dict):
+                lines.append(f"{key}:")
+                lines.extend("  " + line for line in _encode(value, top_n, bottom_n))
+            elif isinstance(value, list) and len(value) != 1:
+                lines.append(f"{key}: {_encode(value, top_n, bottom_n)[0]}")
+            else:
+                lines.append(f"{key}: {_cell(value[0] if isinstance(value, list) else value)}")
+        return lines
+    if isinstance(data, list):
+        shown = data
+        if len(data) > top_n + bottom_n:
+            shown = data[:top_n] + (data[-bottom_n:] if bottom_n else [])
+        line = ", ".join(_cell(v) for v in shown)
+        if len(shown) < len(data):
+            line += f" ({len(data)} values total; first {top_n} and last {bottom_n} shown)"
+        return [line]
+    return [_cell(data)]
+
+
+def compact_result(
+    data,
+    top_n: int = COMPACT_TOP_N,
+    bottom_n: int = COMPACT_BOTTOM_N,
+    token_budget: int = COMPACT_TOKEN_BUDGET
+) -> str:
+    """
+    Pipe-separated table (or key: value lines) for an R result, with numbers
+    rounded to COMPACT_SIG_DIGITS and long results cut to the first top_n and
+    last bottom_n rows. Row caps shrink until the text fits token_budget;
+    as a last resort the text itself is cut. Either way of dropping data
+    counts the result as truncated.
+    """
+    if isinstance(data, ArrowResult):
+        before = math.ceil(data.json_length() / 4)
+    else:
+        before = estimate_tokens(json.dumps(data, indent=2, default=jsonable))
+    if not COMPACT_RESULTS:
+        _record(before, before, truncated=False)
+        return json.dumps(data, indent=2, default=jsonable)
+
+    text = "\n".join(_encode(data, top_n, bottom_n))
+    while estimate_tokens(text) > token_budget and (top_n > 1 or bottom_n > 0):
+        top_n, bottom_n = max(1, top_n // 2), bottom_n // 2
+        text = "\n".join(_encode(data, top_n, bottom_n))
+    truncated = _longest(data) > top_n + bottom_n  # rows were left out
+    if estimate_tokens(text) > token_budget:
+        text = text[:token_budget * 4] + "\n... (truncated to fit the token budget)"
+        truncated = True
+
+    _record(before, estimate_tokens(text), truncated)
+    return text
+
+
+def _record(before: int, after: int, truncated: bool) -> None:
+    _stats["results"] += 1
+    _stats["tokens_before"] += before
+    _stats["tokens_after"] += after
+    _stats["truncated"] += int(truncated)
+
+
+def get_compaction_stats() -> dict:
+    """Estimated Chain B data tokens before (indented JSON) and after compaction"""
+    before, after = _stats["tokens_before"], _stats["tokens_after"]
+    return {
+        "enabled": COMPACT_RESULTS,
+        "results": _stats["results"],
+        "tokens_before": before,
+        "tokens_after": after,
+        "reduction": round(1 - after / before, 3) if before else 0.0,
+        "truncated": _stats["truncated"],
+    }
@@ -0,0 +1,225 @@
+"""
+Gridiron Aggregate Cube
+In-memory indexed copy of the R service's team/situation aggregate cube
+"""
+
+import asyncio
+import os
+import time
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+from cache import data_version_from_health
+from r_client import get_data_version, r_pool
+
+# Configuration
+CUBE_ENABLED = os.getenv("CUBE_ENABLED", "true").lower() == "true"
+CUBE_MEMO_ENTRIES = int(os.getenv("CUBE_MEMO_ENTRIES", "4096"))
+
+DIMENSIONS = ("posteam", "defteam", "season", "down", "qtr", "play_type")
+MEASURES = ("plays", "epa_n", "epa_sum", "success_sum", "cpoe_n", "cpoe_sum")
+TEAM_DIMENSIONS = ("posteam", "defteam")
+
+
+def _metrics(totals: list) -> dict:
+    plays, epa_n, epa_sum, success_sum, cpoe_n, cpoe_sum = totals
+    return {
+        "plays": int(plays),
+        "epa_per_play": round(epa_sum / epa_n, 4) if epa_n else None,
+        "success_rate": round(success_sum / epa_n, 4) if epa_n else None,
+        "cpoe": round(cpoe_sum / cpoe_n, 2) if cpoe_n else None,
+    }
+
+
+def _dimension_values(dimension: str, values: list) -> list:
+    """
+    R's NA reaches numeric dimensions (down, qtr) as null or the string "NA";
+    both become None so the column sorts and filters as integers
+    """
+    if dimension in TEAM_DIMENSIONS or dimension == "play_type":
+        return list(values)
+    return [None if value is None or value == "NA" else int(value) for value in values]
+
+
+class AggregateCube:
+    """
+    Cube cells with an inverted index per dimension.
+    A lookup walks the index of its most selective filter, checks the other
+    filters against the cell columns and sums the matches; results are
+    memoized per filter set.
+    """
+
+    def __init__(self, columns: dict, version: Optional[str] = None):
+        self.version = version
+        self.cells = len(columns["plays"])
+        self._dims = [_dimension_values(d, columns[d]) for d in DIMENSIONS]
+        self._measures = [array("d", (v or 0 for v in columns[m])) for m in MEASURES]
+        self._index: dict = {}
+        for dim, values in zip(DIMENSIONS, self._dims):
+            index: dict = {}
+            for row, value in enumerate(values):
+                index.setdefault(value, array("I")).append(row)
+            self._index[dim] = index
+        self._memo: OrderedDict = OrderedDict()
+        self.lookups = 0
+        self.memo_hits = 0
+
+    def values(self, dimension: str) -> list:
+        return sorted(v for v in self._index[dimension] if v is not None)
+
+    @staticmethod
+    def _normalize(dimension: str, value):
+        if value is None:
+            return None
+        values = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+        if dimension in TEAM_DIMENSIONS:
+            values = (str(v).upper() for v in values)
+        elif dimension != "play_type":
+            values = (int(v) for v in values)
+        return frozenset(values)
+
+    def _rows(self, filters: dict) -> Optional[list]:
+        """Rows matching every filter, or None for all rows"""
+        if not filters:
+            return None
+
+        def candidates(dim):
+            index = self._index[dim]
+            return [row for value in filters[dim] for row in index.get(value, ())]
+
+        # Walk the most selective dimension's index, check the rest column-wise
+        sizes = {dim: sum(len(self._index[dim].get(v, ())) for v in wanted) for dim, wanted in filters.items()}
+        driver = min(sizes, key=sizes.get)
+        rows = candidates(driver)
+        for dim, wanted in filters.items():
+            if dim != driver:
+                column = self._dims[DIMENSIONS.index(dim)]
+                rows = [row for row in rows if column[row] in wanted]
+        return rows
+
+    def _sum(self, rows) -> list:
+        if rows is None:
+            return [sum(column) for column in self._measures]
+        return [sum(map(column.__getitem__, rows)) for column in self._measures]
+
+    def query(self, by: Optional[str] = None, **filters) -> dict:
+        """
+        Roll up every cell matching `filters` (dimension=value or list of values),
+        optionally broken down by one dimension.
+        """
+        unknown = set(filters) - set(DIMENSIONS) | ({by} - set(DIMENSIONS) if by else set())
+        if unknown:
+            raise ValueError(f"Unknown cube dimension: {', '.join(sorted(unknown))}")
+
+        normalized = {d: self._normalize(d, v) for d, v in filters.items()}
+        normalized = {d: v for d, v in normalized.items() if v is not None}
+        key = (by, tuple(sorted(normalized.items(), key=lambda item: item[0])))
+
+        self.lookups += 1
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            self.memo_hits += 1
+            return self._memo[key]
+
+        rows = self._rows(normalized)
+        result = {"filters": {d: sorted(v) for d, v in normalized.items()}, **_metrics(self._sum(rows))}
+        if by:
+            groups: dict = {}
+            by_values = self._dims[DIMENSIONS.index(by)]
+            for row in range(self.cells) if rows is None else rows:
+                groups.setdefault(by_values[row], []).append(row)
+            result["by"] = by
+            result["groups"] = sorted(
+                ({by: value, **_metrics(self._sum(group_rows))} for value, group_rows in groups.items()),
+                key=lambda group: (group[by] is None, group[by])
+            )
+
+        self._memo[key] = result
+        if len(self._memo) > CUBE_MEMO_ENTRIES:
+            self._memo.popitem(last=False)
+        return result
+
+
+class CubeClient:
+    """
+    Fetches the cube from R once per data version and keeps it in memory.
+    Lookups never wait on R once a cube is loaded; a newer data version is
+    loaded in the background while the current cube keeps serving.
+    """
+
+    def __init__(self):
+        self.cube: Optional[AggregateCube] = None
+        self.loads = 0
+        self.load_failures = 0
+        self.load_ms = 0.0
+        self._requested_version: Optional[str] = None
+        self._loading: Optional[asyncio.Task] = None
+
+    async def _load(self) -> Optional[AggregateCube]:
+        started = time.perf_counter()
+        try:
+            response = await r_pool.request("GET", "/cube", hedge=False, timeout=60.0)
+            payload = response.json() if response.status_code == 200 else {}
+        except Exception:
+            payload = {}
+        if not payload.get("success"):
+            self.load_failures += 1
+            return self.cube
+
+        version = data_version_from_health({
+            "status": "ok",
+            "data_loaded": True,
+            "total_plays": payload.get("total_plays"),
+            "seasons": payload.get("seasons"),
+        })
+        self.cube = AggregateCube(payload["columns"], version)
+        self.loads += 1
+        self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+        return self.cube
+
+    def refresh(self) -> asyncio.Task:
+        """Start loading the cube unless a load is already running"""
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.create_task(self._load())
+        return self._loading
+
+    async def get(self) -> Optional[AggregateCube]:
+        """The current cube; waits for the first load, refreshes on data version change"""
+        if not CUBE_ENABLED:
+            return None
+        if self.cube is None:
+            return await asyncio.shield(self.refresh())
+
+        version = await get_data_version()
+        if version and version != self.cube.version and version != self._requested_version:
+            self._requested_version = version  # one reload attempt per new version
+            self.refresh()
+        return self.cube
+
+    async def start(self) -> None:
+        if CUBE_ENABLED:
+            self.refresh()
+
+    async def stop(self) -> None:
+        if self._loading is not None:
+            self._loading.cancel()
+            await asyncio.gather(self._loading, return_exceptions=True)
+            self._loading = None
+
+    def stats(self) -> dict:
+        cube = self.cube
+        return {
+            "enabled": CUBE_ENABLED,
+            "loaded": cube is not None,
+            "version": cube.version if cube else None,
+            "cells": cube.cells if cube else 0,
+            "loads": self.loads,
+            "load_failures": self.load_failures,
+            "load_ms": self.load_ms,
+            "lookups": cube.lookups if cube else 0,
+            "memo_hits": cube.memo_hits if cube else 0,
+        }
+
+
+cube_client = CubeClient()
@@ -0,0 +1,185 @@
+"""
+Gridiron Query History
+Write-behind recorder that batches QueryHistory inserts off the request path,
+plus keyset-paginated per-user history reads
+"""
+
+import asyncio
+import base64
+import os
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, insert, or_, select
+
+from models import AsyncSessionLocal, QueryHistory
+
+# Configuration
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "100"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "2"))
+HISTORY_MAX_BUFFER = int(os.getenv("HISTORY_MAX_BUFFER", "10000"))
+
+ANONYMOUS_USER = "anonymous"
+
+
+class HistoryRecorder:
+    """
+    Buffers history events in memory and writes them in one transaction
+    once HISTORY_BATCH_SIZE events are waiting or HISTORY_FLUSH_INTERVAL passes.
+    Events beyond HISTORY_MAX_BUFFER are dropped rather than slowing requests.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL,
+        max_buffer: int = HISTORY_MAX_BUFFER
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: list = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def record(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        headline: Optional[str] = None,
+        latency_ms: Optional[int] = None,
+        cache_hit: bool = False,
+        error: Optional[str] = None
+    ) -> None:
+        """Queue one history event; never touches the database"""
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+
+        self._buffer.append({
+            "id": str(uuid.uuid4()),
+            "user_id": user_id or ANONYMOUS_USER,
+            "query": query,
+            "response_headline": headline,
+            "latency_ms": latency_ms,
+            "cache_hit": cache_hit,
+            "error": error,
+            "created_at": datetime.utcnow(),
+        })
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Write everything buffered so far in a single transaction"""
+        if not self._buffer:
+            return 0
+
+        batch, self._buffer = self._buffer, []
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(QueryHistory), batch)
+                await db.commit()
+        except Exception:
+            # Keep the events for the next flush, within the buffer bound
+            self.failed_flushes += 1
+            room = max(0, self.max_buffer - len(self._buffer))
+            self.dropped += max(0, len(batch) - room)
+            self._buffer = batch[:room] + self._buffer
+            return 0
+
+        self.written += len(batch)
+        self.batches += 1
+        return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+# ============================================
+# History Reads
+# ============================================
+
+def encode_cursor(created_at: datetime, history_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{history_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Optional[tuple]:
+    try:
+        created_at, history_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), history_id
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+async def get_user_history(user_id: str, limit: int = 20, cursor: Optional[str] = None) -> dict:
+    """
+    Newest-first history for one user.
+    Keyset pagination over (created_at, id) keeps every page an index range
+    scan on ix_query_history_user_created, however deep the client pages.
+    """
+    stmt = select(QueryHistory).where(QueryHistory.user_id == user_id)
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, history_id = position
+        stmt = stmt.where(or_(
+            QueryHistory.created_at < created_at,
+            and_(QueryHistory.created_at == created_at, QueryHistory.id < history_id)
+        ))
+
+    stmt = stmt.order_by(QueryHistory.created_at.desc(), QueryHistory.id.desc()).limit(limit + 1)
+
+    async with AsyncSessionLocal() as db:
+        rows = list((await db.execute(stmt)).scalars())
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+
+    return {
+        "items": [
+            {
+                "id": row.id,
+                "query": row.query,
+                "headline": row.response_headline,
+                "latency_ms": row.latency_ms,
+                "cache_hit": row.cache_hit,
+                "error": row.error,
+                "created_at": row.created_at,
+            }
+            for row in page
+        ],
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,99 @@
+"""
+Gridiron HTTP Clients
+Application-scoped pooled httpx clients, one per upstream
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+# Configuration
+# One client serves every R replica, so the pool grows with the replica count:
+# each replica needs room for its admitted scripts, a hedged duplicate and a probe
+R_REPLICA_COUNT = len([
+    url for url in os.getenv("R_SERVICE_URLS", os.getenv("R_SERVICE_URL", "http://localhost:8787")).split(",")
+    if url.strip()
+])
+R_CONNECTIONS_PER_REPLICA = int(os.getenv("R_CONNECTIONS_PER_REPLICA", "4"))
+R_MAX_CONNECTIONS = int(os.getenv("R_MAX_CONNECTIONS", str(R_REPLICA_COUNT * R_CONNECTIONS_PER_REPLICA)))
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@dataclass(frozen=True)
+class Upstream:
+    """Connection pool and timeout settings for one upstream service"""
+    timeout: httpx.Timeout
+    limits: httpx.Limits
+    http2: bool = False
+
+
+UPSTREAMS = {
+    # Plumber is single-threaded, so a few keep-alive connections per replica are plenty
+    "r_service": Upstream(
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=R_MAX_CONNECTIONS,
+            max_keepalive_connections=R_MAX_CONNECTIONS,
+            keepalive_expiry=30.0
+        ),
+    ),
+    "google": Upstream(
+        timeout=httpx.Timeout(10.0, connect=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+        http2=True,
+    ),
+    "twitter": Upstream(
+        timeout=httpx.Timeout(10.0, connect=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+        http2=True,
+    ),
+}
+
+_clients: dict = {}
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    upstream = UPSTREAMS[name]
+    return httpx.AsyncClient(
+        timeout=upstream.timeout,
+        limits=upstream.limits,
+        http2=upstream.http2 and _http2_available(),
+    )
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """
+    Get the shared client for an upstream.
+
+    Clients are normally opened by start_http_clients() from the app lifespan;
+    one is created lazily if a module is used outside the app (scripts, benchmarks).
+    """
+    client: Optional[httpx.AsyncClient] = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        _clients[name] = client
+    return client
+
+
+async def start_http_clients() -> None:
+    """Open a pooled client for every configured upstream"""
+    for name in UPSTREAMS:
+        get_http_client(name)
+
+
+async def close_http_clients() -> None:
+    """Close every pooled client and drop its connections"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
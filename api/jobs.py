@@ -0,0 +1,338 @@
+"""
+Gridiron Analysis Jobs
+Submit-and-poll job mode for analyze_query with a bounded worker pool
+"""
+
+import asyncio
+import json
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import delete, or_, select, update
+
+from models import AnalysisJob, AsyncSessionLocal
+from serialization import jsonable
+
+# Configuration
+JOB_STORE = os.getenv("JOB_STORE", "memory")  # 'memory' or 'sqlite'
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "1000"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_SWEEP_INTERVAL = float(os.getenv("JOB_SWEEP_INTERVAL", "5"))
+
+FINISHED = ("done", "failed")
+
+
+class JobQueueFull(Exception):
+    """Raised when no more jobs can be accepted"""
+
+
+# ============================================
+# Stores
+# ============================================
+
+class MemoryJobStore:
+    """Job state kept in this process only"""
+
+    def __init__(self):
+        self._jobs: dict = {}
+
+    async def create(self, job_id: str, query: str, engine: Optional[str] = None) -> dict:
+        now = datetime.utcnow()
+        job = {
+            "id": job_id, "query": query, "engine": engine, "status": "queued",
+            "claimed_by": None, "lease_expires_at": None,
+            "result": None, "error": None, "created_at": now, "updated_at": now
+        }
+        self._jobs[job_id] = job
+        return dict(job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def claim(self, job_id: str, owner: str, lease_until: datetime) -> bool:
+        """Atomically move a job from queued to running under `owner`'s lease"""
+        job = self._jobs.get(job_id)
+        if not job or job["status"] != "queued":
+            return False
+        job.update(status="running", claimed_by=owner, lease_expires_at=lease_until, updated_at=datetime.utcnow())
+        return True
+
+    async def renew(self, job_id: str, owner: str, lease_until: datetime) -> bool:
+        """Extend the lease on a running job; False once the job is no longer owner's"""
+        job = self._jobs.get(job_id)
+        if not job or job["status"] != "running" or job["claimed_by"] != owner:
+            return False
+        job["lease_expires_at"] = lease_until
+        return True
+
+    async def finish(self, job_id: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        job = self._jobs.get(job_id)
+        if job:
+            job["status"] = "failed" if error else "done"
+            job["result"] = result
+            job["error"] = error
+            job["updated_at"] = datetime.utcnow()
+
+    async def recover(self, now: datetime) -> list:
+        """Requeue running jobs whose lease has expired and return every queued job id"""
+        for job in self._jobs.values():
+            if job["status"] == "running" and (job["lease_expires_at"] is None or job["lease_expires_at"] < now):
+                job.update(status="queued", claimed_by=None, lease_expires_at=None)
+        return [j["id"] for j in self._jobs.values() if j["status"] == "queued"]
+
+    async def purge(self, finished_before: datetime) -> int:
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in FINISHED and job["updated_at"] < finished_before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore:
+    """
+    Job state in the `analysis_jobs` table, so queued work survives a restart
+    and any replica sharing the database can pick it up or report on it.
+    """
+
+    @staticmethod
+    def _to_dict(job: AnalysisJob) -> dict:
+        return {
+            "id": job.id,
+            "query": job.query,
+            "engine": job.engine,
+            "status": job.status,
+            "claimed_by": job.claimed_by,
+            "lease_expires_at": job.lease_expires_at,
+            "result": json.loads(job.result) if job.result else None,
+            "error": job.error,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+        }
+
+    async def create(self, job_id: str, query: str, engine: Optional[str] = None) -> dict:
+        async with AsyncSessionLocal() as db:
+            job = AnalysisJob(id=job_id, query=query, engine=engine, status="queued")
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+            return self._to_dict(job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(AnalysisJob, job_id)
+            return self._to_dict(job) if job else None
+
+    async def claim(self, job_id: str, owner: str, lease_until: datetime) -> bool:
+        """Atomically move a job from queued to running under `owner`'s lease"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id, AnalysisJob.status == "queued")
+                .values(
+                    status="running", claimed_by=owner, lease_expires_at=lease_until,
+                    updated_at=datetime.utcnow()
+                )
+            )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def renew(self, job_id: str, owner: str, lease_until: datetime) -> bool:
+        """Extend the lease on a running job; False once the job is no longer owner's"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(AnalysisJob)
+                .where(
+                    AnalysisJob.id == job_id,
+                    AnalysisJob.status == "running",
+                    AnalysisJob.claimed_by == owner
+                )
+                .values(lease_expires_at=lease_until)
+            )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def finish(self, job_id: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id)
+                .values(
+                    status="failed" if error else "done",
+                    result=json.dumps(result, default=jsonable) if result is not None else None,
+                    error=error,
+                    updated_at=datetime.utcnow()
+                )
+            )
+            await db.commit()
+
+    async def recover(self, now: datetime) -> list:
+        """Requeue running jobs whose lease has expired and return every queued job id"""
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(AnalysisJob)
+                .where(
+                    AnalysisJob.status == "running",
+                    or_(AnalysisJob.lease_expires_at.is_(None), AnalysisJob.lease_expires_at < now)
+                )
+                .values(status="queued", claimed_by=None, lease_expires_at=None)
+            )
+            await db.commit()
+            result = await db.execute(select(AnalysisJob.id).where(AnalysisJob.status == "queued"))
+            return list(result.scalars())
+
+    async def purge(self, finished_before: datetime) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(AnalysisJob)
+                .where(AnalysisJob.status.in_(FINISHED), AnalysisJob.updated_at < finished_before)
+            )
+            await db.commit()
+            return result.rowcount
+
+
+# ============================================
+# Worker Pool
+# ============================================
+
+class JobQueue:
+    """
+    Bounded pool of workers draining submitted analysis jobs.
+
+    A worker holds a lease on the job it runs and renews it every third of
+    the lease while the analysis is in progress, so the sweep only requeues
+    jobs whose worker stopped renewing (crashed or was killed), however long
+    a healthy analysis takes.
+    """
+
+    def __init__(
+        self,
+        store,
+        runner: Callable[[str, Optional[str]], Awaitable[dict]],
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_QUEUE_MAX,
+        lease_seconds: float = JOB_LEASE_SECONDS
+    ):
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._queued_ids: set = set()
+        self._done_events: dict = {}
+        self._tasks: list = []
+        self.completed = 0
+        self.failed = 0
+
+    def _enqueue(self, job_id: str) -> None:
+        if job_id not in self._queued_ids:
+            self._queued_ids.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def submit(self, query: str, engine: Optional[str] = None) -> dict:
+        """Persist a new job and hand it to the worker pool"""
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull("Job queue is full")
+        job = await self.store.create(str(uuid.uuid4()), query, engine)
+        self._done_events[job["id"]] = asyncio.Event()
+        self._enqueue(job["id"])
+        return job
+
+    async def get(self, job_id: str, wait: float = 0) -> Optional[dict]:
+        """Get a job, optionally long-polling up to `wait` seconds for it to finish"""
+        job = await self.store.get(job_id)
+        deadline = asyncio.get_running_loop().time() + wait
+        while job and job["status"] not in FINISHED:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            event = self._done_events.get(job_id)
+            try:
+                if event is not None:
+                    await asyncio.wait_for(event.wait(), timeout=remaining)
+                else:
+                    # Job owned by another replica: poll the shared store
+                    await asyncio.sleep(min(0.5, remaining))
+            except asyncio.TimeoutError:
+                pass
+            job = await self.store.get(job_id)
+        return job
+
+    def _lease_until(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Keep renewing the lease on a running job until cancelled"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.store.renew(job_id, self.owner, self._lease_until())
+            except Exception:
+                pass  # try again next beat; the lease has slack for two misses
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._queued_ids.discard(job_id)
+            try:
+                if not await self.store.claim(job_id, self.owner, self._lease_until()):
+                    continue
+                job = await self.store.get(job_id)
+                heartbeat = asyncio.create_task(self._heartbeat(job_id))
+                try:
+                    result = await self.runner(job["query"], job.get("engine"))
+                    await self.store.finish(job_id, result=result)
+                    self.completed += 1
+                except Exception as e:
+                    await self.store.finish(job_id, error=str(e))
+                    self.failed += 1
+                finally:
+                    heartbeat.cancel()
+            finally:
+                event = self._done_events.pop(job_id, None)
+                if event is not None:
+                    event.set()
+                self._queue.task_done()
+
+    async def _sweep(self) -> None:
+        """Pick up queued jobs from restarts or other replicas and purge old results"""
+        while True:
+            now = datetime.utcnow()
+            for job_id in await self.store.recover(now):
+                self._enqueue(job_id)
+            await self.store.purge(now - timedelta(seconds=JOB_RETENTION_SECONDS))
+            await asyncio.sleep(JOB_SWEEP_INTERVAL)
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+
+def create_job_store():
+    """Build the job store from environment configuration"""
+    if JOB_STORE == "sqlite":
+        return SQLiteJobStore()
+    return MemoryJobStore()
@@ -0,0 +1,196 @@
+"""
+Gridiron LLM Gateway
+One long-lived OpenRouter client, cached prompt assembly and per-call usage stats
+"""
+
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import openai
+from openai import AsyncOpenAI
+
+from metrics import llm_tokens
+from resilience import RetryableError, call_with_resilience, parse_retry_after
+
+# OpenRouter configuration
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+# Number of recent calls kept for /health
+LLM_RECENT_CALLS = int(os.getenv("LLM_RECENT_CALLS", "100"))
+
+_client: Optional[AsyncOpenAI] = None
+_recent_calls: deque = deque(maxlen=LLM_RECENT_CALLS)
+_stage_totals: dict = {}
+
+
+def get_llm_client() -> AsyncOpenAI:
+    """Get the shared OpenRouter client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=OPENROUTER_API_KEY,
+            base_url=OPENROUTER_BASE_URL,
+            max_retries=0,  # retries are handled by the resilience layer
+        )
+    return _client
+
+
+async def close_llm_client() -> None:
+    """Close the shared client and its connection pool"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+# ============================================
+# Prompt Assembly
+# ============================================
+
+class PromptTemplate:
+    """
+    System prompt with a file-backed section, rendered once and re-rendered
+    only when the file's modification time changes.
+    """
+
+    def __init__(self, template: str, path: Path, field: str = "framework"):
+        self.template = template
+        self.path = path
+        self.field = field
+        self._mtime: Optional[int] = None
+        self._rendered: Optional[str] = None
+
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def render(self) -> str:
+        mtime = self._current_mtime()
+        if self._rendered is None or mtime != self._mtime:
+            try:
+                section = self.path.read_text()
+            except FileNotFoundError:
+                section = ""
+            self._rendered = self.template.format(**{self.field: section})
+            self._mtime = mtime
+        return self._rendered
+
+
+def system_message(content: str, cache: bool = False) -> dict:
+    """
+    Build a system message. With cache=True the content is marked as a
+    cacheable prefix so providers that support prompt caching (Anthropic via
+    OpenRouter) bill and serve the repeated prefix from cache.
+    """
+    if not cache:
+        return {"role": "system", "content": content}
+    return {
+        "role": "system",
+        "content": [
+            {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
+        ]
+    }
+
+
+# ============================================
+# Calls and Usage
+# ============================================
+
+async def _create(**kwargs):
+    """Create a completion, retrying 429/5xx/connection errors under the OpenRouter breaker"""
+    client = get_llm_client()
+
+    async def attempt():
+        try:
+            return await client.chat.completions.create(**kwargs)
+        except (openai.RateLimitError, openai.InternalServerError) as e:
+            raise RetryableError(
+                str(e), retry_after=parse_retry_after(e.response.headers.get("retry-after"))
+            ) from e
+        except openai.APIConnectionError as e:
+            raise RetryableError(str(e)) from e
+
+    return await call_with_resilience("openrouter", attempt)
+
+
+def record_usage(stage: str, model: str, usage, latency: float) -> dict:
+    """Record token counts and latency for one completed call"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    call = {
+        "stage": stage,
+        "model": model,
+        "input_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "latency_ms": round(latency * 1000, 1),
+    }
+    _recent_calls.append(call)
+
+    totals = _stage_totals.setdefault(stage, {
+        "calls": 0, "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "latency_ms": 0.0
+    })
+    totals["calls"] += 1
+    for field in ("input_tokens", "output_tokens", "cached_tokens", "latency_ms"):
+        totals[field] += call[field]
+    for kind in ("input", "output", "cached"):
+        llm_tokens.observe(call[f"{kind}_tokens"], stage=stage, type=kind)
+    return call
+
+
+async def complete(stage: str, model: str, messages: list, **params) -> str:
+    """Run a chat completion through the shared client and record its usage"""
+    started = time.perf_counter()
+
+    response = await _create(
+        model=model,
+        messages=messages,
+        extra_body={"usage": {"include": True}},
+        **params
+    )
+
+    record_usage(stage, model, response.usage, time.perf_counter() - started)
+    return response.choices[0].message.content or ""
+
+
+async def stream(stage: str, model: str, messages: list, **params) -> AsyncIterator[str]:
+    """Stream a chat completion, yielding text deltas; usage is recorded at the end"""
+    started = time.perf_counter()
+    usage = None
+
+    response = await _create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+        extra_body={"usage": {"include": True}},
+        **params
+    )
+
+    async for chunk in response:
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+    record_usage(stage, model, usage, time.perf_counter() - started)
+
+
+def get_llm_stats() -> dict:
+    """Per-stage token and latency totals plus the most recent calls"""
+    stages = {}
+    for stage, totals in _stage_totals.items():
+        calls = totals["calls"]
+        stages[stage] = {
+            "calls": calls,
+            "input_tokens": totals["input_tokens"],
+            "output_tokens": totals["output_tokens"],
+            "cached_tokens": totals["cached_tokens"],
+            "avg_latency_ms": round(totals["latency_ms"] / calls, 1) if calls else 0.0,
+        }
+    return {"stages": stages, "recent": list(_recent_calls)[-10:]}
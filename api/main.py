@@ -3,37 +3,111 @@ Gridiron FastAPI Backend
 NFL Analytics Orchestrator with OAuth Authentication
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
-from sqlalchemy.orm import Session as DBSession
+from datetime import datetime
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
+import asyncio
+import orjson
 import secrets
+import time
 
-from chains import analyze_query
-from r_client import check_r_health
-from models import init_db, get_db
+from chains import (
+    cached_analyze_query, stream_analyze_query, analyze_batch, result_cache,
+    get_router_stats, get_batch_stats, BATCH_MAX_QUERIES
+)
+from r_client import check_r_health, get_script_cache_stats, get_transport_stats, r_admission, r_pool
+from columnar import ENGINES, columnar_engine
+from compaction import get_compaction_stats
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, current_timings, render_metrics
+from serialization import ORJSONResponse, MsgPackResponse, jsonable, wants_msgpack
+from admission import Overloaded
+from resilience import breaker_states
+from models import init_db, get_async_db
+from http_clients import start_http_clients, close_http_clients
+from llm import close_llm_client, get_llm_stats
+from jobs import JobQueue, JobQueueFull, create_job_store
+from history import HistoryRecorder, get_user_history
+from warming import CacheWarmer
+from oauth_state import create_oauth_state_store
+from cube import DIMENSIONS as CUBE_DIMENSIONS, cube_client
 from auth import (
     get_google_auth_url, exchange_google_code, get_google_user_info,
     get_twitter_auth_url, exchange_twitter_code, get_twitter_user_info,
-    create_or_update_user, create_session_for_user, get_user_from_token,
-    verify_token, revoke_session, TokenResponse, FRONTEND_URL
+    create_or_update_user_async, create_session_for_user_async,
+    revoke_session_async, TokenResponse, UserInfo, FRONTEND_URL,
+    optional_user, require_user, get_auth_cache_stats,
+    rotate_session_async, SessionCompactor
 )
 
 # Initialize database
 init_db()
 
+
+JOB_OVERLOAD_RETRIES = 3
+
+
+async def run_analysis_job(query: str, engine: Optional[str] = None) -> dict:
+    """Job worker entry point: same cached pipeline as /analyze"""
+    for attempt in range(JOB_OVERLOAD_RETRIES):
+        try:
+            memo, cache_hit = await cached_analyze_query(query, engine)
+            if cache_hit:
+                cache_warmer.note_hit(query)
+            return memo
+        except Overloaded as e:
+            # Jobs can afford to wait out a burst instead of failing
+            if attempt == JOB_OVERLOAD_RETRIES - 1:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+job_queue = JobQueue(create_job_store(), run_analysis_job)
+history_recorder = HistoryRecorder()
+session_compactor = SessionCompactor()
+cache_warmer = CacheWarmer()
+
+# OAuth state and PKCE verifiers, pending until the provider calls back
+oauth_states = create_oauth_state_store()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared upstream resources on startup and release them on shutdown"""
+    await start_http_clients()
+    await r_pool.start()
+    await cube_client.start()
+    await job_queue.start()
+    await history_recorder.start()
+    await session_compactor.start()
+    await oauth_states.start()
+    await cache_warmer.start()
+    yield
+    await cache_warmer.stop()
+    await oauth_states.stop()
+    await session_compactor.stop()
+    await job_queue.stop()
+    await history_recorder.stop()
+    await cube_client.stop()
+    await r_pool.stop()
+    await close_http_clients()
+    await close_llm_client()
+
+
 app = FastAPI(
     title="Gridiron API",
     description="NFL Analytics powered by nflfastR and LLM",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Store OAuth state and PKCE verifiers (use Redis in production)
-oauth_states: dict = {}
-
 # CORS for SvelteKit frontend
 app.add_middleware(
     CORSMiddleware,
@@ -47,12 +121,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# gzip/brotli for complete responses over COMPRESSION_MIN_SIZE; SSE streams pass through
+app.add_middleware(CompressionMiddleware)
+
+# Per-stage Server-Timing header and request latency histograms for /metrics
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed load with 503 + Retry-After instead of queueing past the deadline"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 
 # Pydantic Models
 class AnalyzeRequest(BaseModel):
     query: str
+    engine: Optional[str] = None  # 'r' or 'duckdb'; defaults to EXECUTION_ENGINE
+
+
+class BatchAnalyzeRequest(BaseModel):
+    queries: list[str]
+    engine: Optional[str] = None
 
 
 class ChartConfig(BaseModel):
@@ -70,6 +167,17 @@ class AnalyzeResponse(BaseModel):
     error: Optional[str] = None
 
 
+class JobResponse(BaseModel):
+    id: str
+    query: str
+    engine: Optional[str] = None
+    status: str  # 'queued', 'running', 'done', 'failed'
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
 class RefreshRequest(BaseModel):
     refresh_token: str
 
@@ -83,25 +191,75 @@ async def health_check():
     return {
         "status": "ok",
         "api": "healthy",
-        "r_service": r_status
+        "r_service": r_status,
+        "result_cache": result_cache.stats(),
+        "script_cache": get_script_cache_stats(),
+        "r_transport": get_transport_stats(),
+        "llm": get_llm_stats(),
+        "jobs": job_queue.stats(),
+        "r_admission": r_admission.stats(),
+        "r_pool": r_pool.stats(),
+        "breakers": breaker_states(),
+        "history": history_recorder.stats(),
+        "auth_cache": get_auth_cache_stats(),
+        "session_compaction": session_compactor.stats(),
+        "oauth_states": oauth_states.stats(),
+        "cube": cube_client.stats(),
+        "router": get_router_stats(),
+        "batch": get_batch_stats(),
+        "cache_warming": cache_warmer.stats(),
+        "columnar": columnar_engine.stats(),
+        "compaction": get_compaction_stats()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: stage latency, token, payload size and cache histograms"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
+
 # Analysis Endpoint
 @app.post("/analyze", response_model=AnalyzeResponse)
-async def analyze(request: AnalyzeRequest):
+async def analyze(
+    request: AnalyzeRequest,
+    user: Optional[UserInfo] = Depends(optional_user),
+    accept: Optional[str] = Header(default=None)
+):
     """
     Main analysis endpoint.
     Takes a natural language query, generates R code, executes it,
     and synthesizes a memo with visualization config.
+    Send `Accept: application/msgpack` to get the response, raw_data
+    included, as MessagePack instead of JSON.
     """
     if not request.query or not request.query.strip():
         raise HTTPException(status_code=400, detail="Query is required")
+    if request.engine and request.engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of: {', '.join(ENGINES)}")
     
+    started = time.perf_counter()
+    user_id = user.id if user else None
     try:
-        result = await analyze_query(request.query)
+        result, cache_hit = await cached_analyze_query(request.query, request.engine)
+        if cache_hit:
+            cache_warmer.note_hit(request.query)
+        history_recorder.record(
+            request.query, user_id, headline=result.get("headline"),
+            latency_ms=elapsed_ms(started), cache_hit=cache_hit, error=result.get("error")
+        )
+        if wants_msgpack(accept):
+            return MsgPackResponse(AnalyzeResponse(**result).model_dump())
         return result
+    except Overloaded as e:
+        history_recorder.record(request.query, user_id, latency_ms=elapsed_ms(started), error=str(e))
+        raise
     except Exception as e:
+        history_recorder.record(request.query, user_id, latency_ms=elapsed_ms(started), error=str(e))
         return AnalyzeResponse(
             headline="Analysis Error",
             summary=f"An error occurred while processing your query: {str(e)}",
@@ -109,6 +267,202 @@ async def analyze(request: AnalyzeRequest):
         )
 
 
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {orjson.dumps(data, default=jsonable).decode()}\n\n"
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(request: AnalyzeRequest, user: Optional[UserInfo] = Depends(optional_user)):
+    """
+    Streaming analysis endpoint.
+    Emits Server-Sent Events as each stage completes (script, executing,
+    r_result, token, chart); the final `memo` event carries an AnalyzeResponse.
+    """
+    if not request.query or not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query is required")
+    if request.engine and request.engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of: {', '.join(ENGINES)}")
+    
+    started = time.perf_counter()
+    user_id = user.id if user else None
+    
+    async def event_source():
+        ran_pipeline = False
+        try:
+            async for event, data in stream_analyze_query(request.query, request.engine):
+                if event == "script":
+                    ran_pipeline = True
+                if event == "memo":
+                    # Headers went out before any stage ran; send the breakdown here
+                    yield format_sse("timing", {**current_timings(), "total": elapsed_ms(started)})
+                    data = AnalyzeResponse(**data).model_dump()
+                    if not ran_pipeline:
+                        cache_warmer.note_hit(request.query)
+                    history_recorder.record(
+                        request.query, user_id, headline=data["headline"],
+                        latency_ms=elapsed_ms(started), cache_hit=not ran_pipeline, error=data["error"]
+                    )
+                yield format_sse(event, data)
+        except Overloaded as e:
+            # Headers are already sent, so report the shed in the final event
+            error = AnalyzeResponse(
+                headline="Service Busy",
+                summary=f"<p>Too many analyses are running. Please retry in {e.retry_after} seconds.</p>",
+                error=str(e)
+            )
+            history_recorder.record(request.query, user_id, latency_ms=elapsed_ms(started), error=str(e))
+            yield format_sse("memo", error.model_dump())
+        except Exception as e:
+            error = AnalyzeResponse(
+                headline="Analysis Error",
+                summary=f"An error occurred while processing your query: {str(e)}",
+                error=str(e)
+            )
+            history_recorder.record(request.query, user_id, latency_ms=elapsed_ms(started), error=str(e))
+            yield format_sse("memo", error.model_dump())
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/analyze/batch")
+async def analyze_batch_endpoint(request: BatchAnalyzeRequest, user: Optional[UserInfo] = Depends(optional_user)):
+    """
+    Batch analysis endpoint for dashboards.
+    Emits one `item` event per query (index, query, cache_hit and an
+    AnalyzeResponse as memo) in completion order, then a `done` event with
+    totals. Duplicate queries are analyzed once; a failed item does not
+    affect the others.
+    """
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="At least one query is required")
+    if len(request.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_QUERIES} queries per batch")
+    for index, query in enumerate(request.queries):
+        if not query or not query.strip():
+            raise HTTPException(status_code=400, detail=f"Query {index} is empty")
+    if request.engine and request.engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of: {', '.join(ENGINES)}")
+    
+    started = time.perf_counter()
+    user_id = user.id if user else None
+    
+    async def event_source():
+        totals = {"total": len(request.queries), "unique": 0, "cache_hits": 0, "errors": 0}
+        try:
+            async for indexes, memo, cache_hit in analyze_batch(request.queries, request.engine):
+                memo = AnalyzeResponse(**memo).model_dump()
+                totals["unique"] += 1
+                totals["cache_hits"] += int(cache_hit)
+                if cache_hit:
+                    cache_warmer.note_hit(request.queries[indexes[0]])
+                totals["errors"] += int(bool(memo["error"]))
+                for index in indexes:
+                    history_recorder.record(
+                        request.queries[index], user_id, headline=memo["headline"],
+                        latency_ms=elapsed_ms(started), cache_hit=cache_hit, error=memo["error"]
+                    )
+                    yield format_sse("item", {
+                        "index": index,
+                        "query": request.queries[index],
+                        "cache_hit": cache_hit,
+                        "memo": memo
+                    })
+        except Exception as e:
+            totals["error"] = str(e)
+        yield format_sse("done", {**totals, "elapsed_ms": elapsed_ms(started), "timings": current_timings()})
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/history")
+async def query_history(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    user: UserInfo = Depends(require_user)
+):
+    """
+    Current user's query history, newest first.
+    Pass the returned `next_cursor` back as `cursor` to fetch the next page.
+    """
+    return await get_user_history(user.id, limit=min(max(limit, 1), 100), cursor=cursor)
+
+
+@app.get("/aggregates")
+async def aggregates(
+    posteam: Optional[str] = None,
+    defteam: Optional[str] = None,
+    season: Optional[int] = None,
+    down: Optional[int] = None,
+    qtr: Optional[int] = None,
+    play_type: Optional[str] = None,
+    by: Optional[str] = None
+):
+    """
+    EPA/play, success rate and CPOE from the precomputed aggregate cube.
+    Unset filters are rolled up; `by` breaks the result down by one dimension.
+    Answered from memory without calling R or the LLM.
+    """
+    if by and by not in CUBE_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"`by` must be one of: {', '.join(CUBE_DIMENSIONS)}")
+    
+    cube = await cube_client.get()
+    if cube is None:
+        raise HTTPException(status_code=503, detail="Aggregate cube unavailable", headers={"Retry-After": "30"})
+    
+    return {
+        "success": True,
+        **cube.query(
+            by=by, posteam=posteam, defteam=defteam, season=season,
+            down=down, qtr=qtr, play_type=play_type
+        )
+    }
+
+
+# ============================================
+# Analysis Jobs
+# ============================================
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: AnalyzeRequest):
+    """
+    Submit a query for background analysis.
+    Returns immediately with a job id; poll GET /jobs/{id} for the result.
+    """
+    if not request.query or not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query is required")
+    if request.engine and request.engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"engine must be one of: {', '.join(ENGINES)}")
+    
+    try:
+        return await job_queue.submit(request.query, request.engine)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "5"})
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = 0, accept: Optional[str] = Header(default=None)):
+    """
+    Get a job's status and result.
+    Pass `wait` (seconds, max 30) to long-poll until the job finishes.
+    Send `Accept: application/msgpack` for a MessagePack response.
+    """
+    job = await job_queue.get(job_id, wait=min(max(wait, 0), 30))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if wants_msgpack(accept):
+        return MsgPackResponse(JobResponse(**job).model_dump())
+    return job
+
+
 # ============================================
 # Google OAuth
 # ============================================
@@ -117,7 +471,7 @@ async def analyze(request: AnalyzeRequest):
 async def google_login():
     """Initiate Google OAuth flow"""
     state = secrets.token_urlsafe(32)
-    oauth_states[state] = {"provider": "google"}
+    await oauth_states.put(state, "google")
     
     auth_url = get_google_auth_url(state)
     return {"url": auth_url}
@@ -128,18 +482,16 @@ async def google_callback(
     code: str = None, 
     state: str = None, 
     error: str = None,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle Google OAuth callback"""
     if error:
         return RedirectResponse(f"{FRONTEND_URL}?error={error}")
     
-    if not code or not state or state not in oauth_states:
+    state_data = await oauth_states.pop(state) if state else None
+    if not code or not state_data or state_data["provider"] != "google":
         return RedirectResponse(f"{FRONTEND_URL}?error=invalid_state")
     
-    # Clean up state
-    del oauth_states[state]
-    
     # Exchange code for tokens
     token_data = await exchange_google_code(code)
     if not token_data:
@@ -151,7 +503,7 @@ async def google_callback(
         return RedirectResponse(f"{FRONTEND_URL}?error=user_info_failed")
     
     # Create or update user
-    user = create_or_update_user(
+    user = await create_or_update_user_async(
         db=db,
         email=user_info.get("email"),
         name=user_info.get("name"),
@@ -161,7 +513,7 @@ async def google_callback(
     )
     
     # Create session
-    tokens = create_session_for_user(db, user)
+    tokens = await create_session_for_user_async(db, user)
     
     # Redirect to frontend with tokens
     return RedirectResponse(
@@ -179,10 +531,7 @@ async def twitter_login():
     state = secrets.token_urlsafe(32)
     code_verifier = secrets.token_urlsafe(32)
     
-    oauth_states[state] = {
-        "provider": "twitter",
-        "code_verifier": code_verifier
-    }
+    await oauth_states.put(state, "twitter", code_verifier)
     
     auth_url = get_twitter_auth_url(state, code_verifier)
     return {"url": auth_url}
@@ -193,17 +542,17 @@ async def twitter_callback(
     code: str = None,
     state: str = None,
     error: str = None,
-    db: DBSession = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle Twitter/X OAuth callback"""
     if error:
         return RedirectResponse(f"{FRONTEND_URL}?error={error}")
     
-    if not code or not state or state not in oauth_states:
+    state_data = await oauth_states.pop(state) if state else None
+    if not code or not state_data or state_data["provider"] != "twitter":
         return RedirectResponse(f"{FRONTEND_URL}?error=invalid_state")
     
-    state_data = oauth_states.pop(state)
-    code_verifier = state_data.get("code_verifier", "")
+    code_verifier = state_data.get("code_verifier") or ""
     
     # Exchange code for tokens
     token_data = await exchange_twitter_code(code, code_verifier)
@@ -219,7 +568,7 @@ async def twitter_callback(
     email = f"{user_info.get('username')}@twitter.gridiron"
     
     # Create or update user
-    user = create_or_update_user(
+    user = await create_or_update_user_async(
         db=db,
         email=email,
         name=user_info.get("name"),
@@ -229,7 +578,7 @@ async def twitter_callback(
     )
     
     # Create session
-    tokens = create_session_for_user(db, user)
+    tokens = await create_session_for_user_async(db, user)
     
     # Redirect to frontend with tokens
     return RedirectResponse(
@@ -242,54 +591,27 @@ async def twitter_callback(
 # ============================================
 
 @app.post("/auth/refresh", response_model=TokenResponse)
-async def refresh_token(request: RefreshRequest, db: DBSession = Depends(get_db)):
-    """Refresh access token using refresh token"""
-    payload = verify_token(request.refresh_token, expected_type="refresh")
+async def refresh_token(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Rotate a refresh token: the old one is retired and a new pair is issued"""
+    tokens = await rotate_session_async(db, request.refresh_token)
     
-    if not payload:
+    if not tokens:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     
-    user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
-    
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    return create_session_for_user(db, user)
+    return tokens
 
 
 @app.post("/auth/logout")
-async def logout(request: RefreshRequest, db: DBSession = Depends(get_db)):
+async def logout(request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
     """Logout and revoke refresh token"""
-    revoked = revoke_session(db, request.refresh_token)
+    revoked = await revoke_session_async(db, request.refresh_token)
     return {"success": revoked}
 
 
 @app.get("/auth/me")
-async def get_current_user(request: Request, db: DBSession = Depends(get_db)):
+async def get_current_user(user: UserInfo = Depends(require_user)):
     """Get current authenticated user"""
-    auth_header = request.headers.get("Authorization", "")
-    
-    if not auth_header.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Missing authorization header")
-    
-    token = auth_header.replace("Bearer ", "")
-    user = get_user_from_token(token, db)
-    
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    
-    return {
-        "id": user.id,
-        "email": user.email,
-        "name": user.name,
-        "avatar_url": user.avatar_url,
-        "provider": user.provider
-    }
-
-
-# Import User model for /auth/refresh
-from models import User
+    return user.model_dump()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+"""
+Gridiron Metrics
+Prometheus histograms for the analyze pipeline plus per-request Server-Timing
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+# Configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+BYTES_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+# Stage timings of the request being handled; None outside a request
+_timings: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("server_timings", default=None)
+
+
+# ============================================
+# Metric Types
+# ============================================
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+
+    def __init__(self, name: str, help: str, buckets: tuple, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._series: dict = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                labels = _labels(self.labels, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series: dict = {}
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labels)
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+REGISTRY: list = []
+
+stage_seconds = Histogram(
+    "gridiron_stage_duration_seconds", "Analyze pipeline stage latency",
+    LATENCY_BUCKETS, ("stage",)
+)
+request_seconds = Histogram(
+    "gridiron_http_request_duration_seconds", "Time to response headers by route",
+    LATENCY_BUCKETS, ("method", "route", "status")
+)
+llm_tokens = Histogram(
+    "gridiron_llm_tokens", "Tokens per OpenRouter call",
+    TOKEN_BUCKETS, ("stage", "type")
+)
+r_payload_bytes = Histogram(
+    "gridiron_r_payload_bytes", "R /execute response body size",
+    BYTES_BUCKETS, ("format",)
+)
+cache_lookups = Counter(
+    "gridiron_cache_lookups_total", "Cache, coalescing and router outcomes",
+    ("cache", "outcome")
+)
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition format (0.0.4) for every registered metric"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ============================================
+# Stage Timing
+# ============================================
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Observe a stage duration and add it to the current request's Server-Timing"""
+    stage_seconds.observe(seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time the enclosed block (sync or async code) as `stage`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def current_timings() -> dict:
+    """Milliseconds per stage recorded so far in this request (repeats are summed)"""
+    totals: dict = {}
+    for stage, seconds in _timings.get() or ():
+        totals[stage] = totals.get(stage, 0.0) + seconds * 1000
+    return {stage: round(ms, 1) for stage, ms in totals.items()}
+
+
+def server_timing(timings: dict, total_ms: Optional[float] = None) -> str:
+    entries = [f"{stage};dur={ms}" for stage, ms in timings.items()]
+    if total_ms is not None:
+        entries.append(f"total;dur={round(total_ms, 1)}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    Collects stage timings per request, adds them as a Server-Timing header
+    and observes time-to-headers per route. Streaming responses send headers
+    before the pipeline runs, so they report stages in their final events instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token = _timings.set([])
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                route = scope.get("route")
+                request_seconds.observe(
+                    elapsed,
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=message["status"]
+                )
+                if SERVER_TIMING:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(current_timings(), elapsed * 1000))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
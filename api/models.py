@@ -3,16 +3,54 @@ Gridiron Database Models
 SQLite with SQLAlchemy for users, sessions, and query history
 """
 
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, create_engine
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text, Index, create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+from typing import AsyncIterator
+import hashlib
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./gridiron.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+_connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+
+engine = create_engine(DATABASE_URL, connect_args=_connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine used by request handlers so queries never block the event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
+def _enable_sqlite_wal(dbapi_connection, connection_record):
+    """WAL lets readers proceed while batched history writes commit"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+if DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _enable_sqlite_wal)
+if ASYNC_DATABASE_URL.startswith("sqlite"):
+    event.listen(async_engine.sync_engine, "connect", _enable_sqlite_wal)
+
 Base = declarative_base()
 
 
@@ -44,10 +82,11 @@ class Session(Base):
 
     id = Column(String, primary_key=True, index=True)
     user_id = Column(String, index=True, nullable=False)
-    refresh_token = Column(String, unique=True, index=True)
+    # SHA-256 hex digest of the refresh token; the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
     
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     is_revoked = Column(Boolean, default=False)
     
     # Device info (optional)
@@ -58,18 +97,117 @@ class Session(Base):
 class QueryHistory(Base):
     """Query history for saved queries"""
     __tablename__ = "query_history"
+    __table_args__ = (
+        # Per-user history is paged newest-first by (created_at, id)
+        Index("ix_query_history_user_created", "user_id", "created_at"),
+    )
 
     id = Column(String, primary_key=True, index=True)
-    user_id = Column(String, index=True, nullable=False)
+    user_id = Column(String, nullable=False)  # 'anonymous' when not signed in
     
     query = Column(String, nullable=False)
     response_headline = Column(String, nullable=True)
     
+    # Request outcome
+    latency_ms = Column(Integer, nullable=True)
+    cache_hit = Column(Boolean, default=False)
+    error = Column(String, nullable=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class AnalysisJob(Base):
+    """Queued analysis job and its result (job mode of /analyze)"""
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    query = Column(String, nullable=False)
+    engine = Column(String, nullable=True)  # None runs on EXECUTION_ENGINE
+    status = Column(String, index=True, nullable=False, default="queued")  # 'queued', 'running', 'done', 'failed'
+    
+    # Worker holding a running job and when its lease runs out unless renewed
+    claimed_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True, index=True)
+    
+    result = Column(Text, nullable=True)  # JSON-encoded memo
+    error = Column(String, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class OAuthState(Base):
+    """Pending OAuth login: state parameter and PKCE verifier until the callback"""
+    __tablename__ = "oauth_states"
+
+    state = Column(String, primary_key=True)
+    provider = Column(String, nullable=False)
+    code_verifier = Column(String, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+def _migrate_legacy_sessions():
+    """Re-key sessions from databases that stored raw refresh tokens"""
+    inspector = inspect(engine)
+    if "sessions" not in inspector.get_table_names():
+        return
+    columns = {c["name"] for c in inspector.get_columns("sessions")}
+    if "token_hash" in columns or "refresh_token" not in columns:
+        return
+
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT id, user_id, refresh_token, created_at, expires_at, is_revoked, user_agent, ip_address "
+            "FROM sessions WHERE refresh_token IS NOT NULL"
+        )).mappings().all()
+        conn.execute(text("DROP TABLE sessions"))
+        Session.__table__.create(bind=conn)
+        if rows:
+            conn.execute(
+                text(
+                    "INSERT INTO sessions (id, user_id, token_hash, created_at, expires_at, is_revoked, user_agent, ip_address) "
+                    "VALUES (:id, :user_id, :token_hash, :created_at, :expires_at, :is_revoked, :user_agent, :ip_address)"
+                ),
+                [
+                    {**row, "token_hash": hashlib.sha256(row["refresh_token"].encode()).hexdigest()}
+                    for row in rows
+                ]
+            )
+
+
+def _add_missing_columns(table: str, columns: tuple) -> None:
+    """ALTER TABLE ... ADD COLUMN for model columns an existing table predates"""
+    inspector = inspect(engine)
+    if table not in inspector.get_table_names():
+        return
+    existing = {c["name"] for c in inspector.get_columns(table)}
+    model = Base.metadata.tables[table]
+
+    with engine.begin() as conn:
+        for column in columns:
+            if column not in existing:
+                column_type = model.c[column].type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+
+
+def _migrate_query_history():
+    """Add the outcome columns and paging index to query_history tables created before them"""
+    if "query_history" not in inspect(engine).get_table_names():
+        return
+    _add_missing_columns("query_history", ("latency_ms", "cache_hit", "error"))
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_query_history_user_created ON query_history (user_id, created_at)"
+        ))
+
+
 def init_db():
     """Initialize database tables"""
+    _migrate_legacy_sessions()
+    _migrate_query_history()
+    _add_missing_columns("analysis_jobs", ("engine", "claimed_by", "lease_expires_at"))
     Base.metadata.create_all(bind=engine)
 
 
@@ -80,3 +218,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
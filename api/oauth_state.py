@@ -0,0 +1,213 @@
+"""
+Gridiron OAuth State Store
+Short-lived OAuth state and PKCE verifiers between the login redirect and its callback
+"""
+
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+
+from models import AsyncSessionLocal, OAuthState
+
+# Configuration
+OAUTH_STATE_STORE = os.getenv("OAUTH_STATE_STORE", "memory")  # 'memory' or 'sqlite'
+OAUTH_STATE_TTL = float(os.getenv("OAUTH_STATE_TTL", "600"))
+OAUTH_STATE_MAX_ENTRIES = int(os.getenv("OAUTH_STATE_MAX_ENTRIES", "10000"))
+OAUTH_STATE_SWEEP_INTERVAL = float(os.getenv("OAUTH_STATE_SWEEP_INTERVAL", "60"))
+
+
+class _SweptStore(ABC):
+    """Counters and the background sweep loop shared by both stores"""
+
+    def __init__(self, ttl: float, max_entries: int, sweep_interval: float):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.issued = 0
+        self.consumed = 0
+        self.rejected = 0
+        self.expired = 0
+        self.evicted = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    async def sweep(self) -> int:
+        """Drop expired states (and any over max_entries); returns how many went"""
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception:
+                pass  # try again next interval
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _counters(self) -> dict:
+        return {
+            "ttl_s": self.ttl,
+            "max_entries": self.max_entries,
+            "issued": self.issued,
+            "consumed": self.consumed,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+class MemoryOAuthStateStore(_SweptStore):
+    """
+    States kept in this process only, oldest first.
+    Issuing beyond max_entries evicts the oldest pending login.
+    """
+
+    def __init__(
+        self,
+        ttl: float = OAUTH_STATE_TTL,
+        max_entries: int = OAUTH_STATE_MAX_ENTRIES,
+        sweep_interval: float = OAUTH_STATE_SWEEP_INTERVAL
+    ):
+        super().__init__(ttl, max_entries, sweep_interval)
+        self._states: OrderedDict = OrderedDict()  # state -> (expires_at, data)
+
+    async def put(self, state: str, provider: str, code_verifier: Optional[str] = None) -> None:
+        self._states[state] = (time.monotonic() + self.ttl, {"provider": provider, "code_verifier": code_verifier})
+        self._states.move_to_end(state)
+        self.issued += 1
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+            self.evicted += 1
+
+    async def pop(self, state: str) -> Optional[dict]:
+        """Consume a state; None if it is unknown, expired or already used"""
+        entry = self._states.pop(state, None)
+        if entry is None:
+            self.rejected += 1
+            return None
+        expires_at, data = entry
+        if expires_at <= time.monotonic():
+            self.expired += 1
+            self.rejected += 1
+            return None
+        self.consumed += 1
+        return data
+
+    async def sweep(self) -> int:
+        """Drop expired states; insertion order means they are all at the front"""
+        now = time.monotonic()
+        removed = 0
+        while self._states:
+            state, (expires_at, _) = next(iter(self._states.items()))
+            if expires_at > now:
+                break
+            del self._states[state]
+            removed += 1
+        self.expired += removed
+        return removed
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "size": len(self._states), **self._counters()}
+
+
+class SQLiteOAuthStateStore(_SweptStore):
+    """
+    States in the `oauth_states` table, so the callback can land on any
+    worker process sharing the database. Consuming a state is a single
+    DELETE, so a replayed callback cannot use it twice. Issuing trims the
+    table to max_entries, oldest first, in the same transaction; the sweeper
+    deletes expired rows.
+    """
+
+    def __init__(
+        self,
+        ttl: float = OAUTH_STATE_TTL,
+        max_entries: int = OAUTH_STATE_MAX_ENTRIES,
+        sweep_interval: float = OAUTH_STATE_SWEEP_INTERVAL
+    ):
+        super().__init__(ttl, max_entries, sweep_interval)
+        self._size = 0  # as of the last sweep
+
+    async def put(self, state: str, provider: str, code_verifier: Optional[str] = None) -> None:
+        async with AsyncSessionLocal() as db:
+            db.add(OAuthState(
+                state=state,
+                provider=provider,
+                code_verifier=code_verifier,
+                expires_at=datetime.utcnow() + timedelta(seconds=self.ttl)
+            ))
+            await db.flush()
+            size, evicted = await self._trim(db)
+            await db.commit()
+        self.issued += 1
+        self.evicted += evicted
+        self._size = size - evicted
+
+    async def pop(self, state: str) -> Optional[dict]:
+        """Consume a state; None if it is unknown, expired or already used"""
+        async with AsyncSessionLocal() as db:
+            row = await db.get(OAuthState, state)
+            if row is None:
+                self.rejected += 1
+                return None
+            result = await db.execute(delete(OAuthState).where(OAuthState.state == state))
+            await db.commit()
+
+        if result.rowcount != 1:
+            self.rejected += 1  # consumed concurrently by another request
+            return None
+        if row.expires_at <= datetime.utcnow():
+            self.expired += 1
+            self.rejected += 1
+            return None
+        self.consumed += 1
+        return {"provider": row.provider, "code_verifier": row.code_verifier}
+
+    async def _trim(self, db) -> tuple:
+        """Delete the oldest rows beyond max_entries; returns (size before, rows deleted)"""
+        size = (await db.execute(select(func.count()).select_from(OAuthState))).scalar()
+        if size <= self.max_entries:
+            return size, 0
+        oldest = (
+            select(OAuthState.state)
+            .order_by(OAuthState.created_at)
+            .limit(size - self.max_entries)
+            .scalar_subquery()
+        )
+        return size, (await db.execute(delete(OAuthState).where(OAuthState.state.in_(oldest)))).rowcount
+
+    async def sweep(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(delete(OAuthState).where(OAuthState.expires_at <= datetime.utcnow()))
+            expired = result.rowcount
+            size, evicted = await self._trim(db)
+            await db.commit()
+
+        self.expired += expired
+        self.evicted += evicted
+        self._size = size - evicted
+        return expired + evicted
+
+    def stats(self) -> dict:
+        return {"backend": "sqlite", "size": self._size, **self._counters()}
+
+
+def create_oauth_state_store():
+    """Build the OAuth state store from environment configuration"""
+    if OAUTH_STATE_STORE == "sqlite":
+        return SQLiteOAuthStateStore()
+    return MemoryOAuthStateStore()
@@ -3,65 +3,430 @@ R Service Client
 Communicates with the Dockerized R Plumber API
 """
 
+import asyncio
+import hashlib
 import httpx
 import os
+import time
 from typing import Optional
 
+from admission import AdmissionGate, Overloaded
+from arrow_ipc import ARROW_STREAM_MEDIA_TYPE, arrow_available, read_ipc_stream
+from metrics import cache_lookups, r_payload_bytes
+from cache import MemoryCacheBackend, data_version_from_health
+from r_pool import RPool
+from resilience import CircuitOpen, RetryableError, call_with_resilience, parse_retry_after
+
 R_SERVICE_URL = os.getenv("R_SERVICE_URL", "http://localhost:8787")
 
+# Comma-separated list of R replicas; defaults to the single R_SERVICE_URL
+R_SERVICE_URLS = [
+    url.strip() for url in os.getenv("R_SERVICE_URLS", R_SERVICE_URL).split(",") if url.strip()
+]
+R_PROBE_INTERVAL = float(os.getenv("R_PROBE_INTERVAL", "10"))
+R_HEDGE = os.getenv("R_HEDGE", "false").lower() in ("1", "true", "yes")
+R_HEDGE_PERCENTILE = float(os.getenv("R_HEDGE_PERCENTILE", "0.95"))
+
+r_pool = RPool(
+    R_SERVICE_URLS,
+    probe_interval=R_PROBE_INTERVAL,
+    hedge=R_HEDGE,
+    hedge_percentile=R_HEDGE_PERCENTILE
+)
+
+# How long a data version fingerprint is trusted before /health is asked again
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "30"))
+
+# Script result cache (keyed on data version + script hash)
+SCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("SCRIPT_CACHE_MAX_ENTRIES", "500"))
+SCRIPT_CACHE_TTL = float(os.getenv("SCRIPT_CACHE_TTL", "3600"))
+
+# Admission control: Plumber runs one script at a time, so keep the backlog API-side
+R_MAX_CONCURRENCY = int(os.getenv("R_MAX_CONCURRENCY", str(2 * len(R_SERVICE_URLS))))
+R_MAX_QUEUE = int(os.getenv("R_MAX_QUEUE", "20"))
+R_DEADLINE_SECONDS = float(os.getenv("R_DEADLINE_SECONDS", "30"))
+
+r_admission = AdmissionGate("r_service", R_MAX_CONCURRENCY, R_MAX_QUEUE, R_DEADLINE_SECONDS)
+
+# Multi-script requests: scripts per /execute_batch call and the time one call may take
+R_BATCH_MAX_SCRIPTS = int(os.getenv("R_BATCH_MAX_SCRIPTS", "20"))
+R_BATCH_DEADLINE_SECONDS = float(os.getenv("R_BATCH_DEADLINE_SECONDS", "120"))
+
+# Data frame results as Arrow IPC ('arrow', needs pyarrow) or JSON ('json');
+# the R service answers JSON whenever it cannot produce Arrow
+R_RESULT_FORMAT = os.getenv("R_RESULT_FORMAT", "arrow").lower()
+R_ACCEPT_ARROW = R_RESULT_FORMAT == "arrow" and arrow_available()
+R_EXECUTE_HEADERS = (
+    {"Accept": f"{ARROW_STREAM_MEDIA_TYPE}, application/json;q=0.9"} if R_ACCEPT_ARROW
+    else {"Accept": "application/json"}
+)
+
+_data_version: Optional[str] = None
+_data_version_checked_at = 0.0
+
+_script_cache = MemoryCacheBackend(max_entries=SCRIPT_CACHE_MAX_ENTRIES, ttl=SCRIPT_CACHE_TTL)
+_inflight: dict = {}  # script hash -> asyncio.Task running the shared request
+_script_stats = {
+    "hits": 0,
+    "misses": 0,
+    "coalesced": 0,
+    "r_seconds": 0.0,
+    "saved_r_seconds": 0.0
+}
+_transport_stats = {"arrow": 0, "json": 0, "arrow_bytes": 0, "json_bytes": 0}
+_batch_supported = True  # cleared when the R service has no /execute_batch
+
 
 async def check_r_health() -> dict:
-    """Check if R service is healthy"""
+    """Check if R service is healthy (the first healthy replica's /health payload)"""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{R_SERVICE_URL}/health")
-            if response.status_code == 200:
-                return response.json()
-            return {"status": "error", "code": response.status_code}
+        payloads = await r_pool.probe_all()
     except Exception as e:
         return {"status": "unreachable", "error": str(e)}
+    
+    for payload in payloads:
+        if payload and payload.get("status") == "ok":
+            return payload
+    for payload in payloads:
+        if payload:
+            return payload
+    return {"status": "unreachable", "error": "No R replica responded"}
+
+
+async def get_data_version(force: bool = False) -> Optional[str]:
+    """
+    Get the fingerprint of the nflfastR data currently loaded in R.
+    
+    The fingerprint changes whenever the R service reloads a different
+    set of plays, which invalidates every cache keyed on it.
+    Returns None while the R service is unreachable.
+    """
+    global _data_version, _data_version_checked_at
+    
+    now = time.monotonic()
+    if not force and _data_version and now - _data_version_checked_at < DATA_VERSION_TTL:
+        return _data_version
+    
+    _data_version = data_version_from_health(await check_r_health())
+    _data_version_checked_at = now
+    return _data_version
+
+
+def script_cache_key(version: Optional[str], script_hash: str, engine: str = "r") -> str:
+    """Script results are only valid for the engine and data version that produced them"""
+    return f"{version}:{engine}:{script_hash}"
 
 
-async def execute_r_script(script: str) -> dict:
+def _share_inflight(script_hash: str, task: asyncio.Future) -> None:
+    """
+    Let later callers join `task`. The entry is dropped when the task itself
+    finishes, not when the caller that started it returns or is cancelled,
+    so a cancelled first caller neither orphans nor hides a running request.
+    """
+    def forget(_) -> None:
+        if _inflight.get(script_hash) is task:
+            del _inflight[script_hash]
+
+    _inflight[script_hash] = task
+    task.add_done_callback(forget)
+
+
+async def execute_r_script(script: str, deadline: Optional[float] = None) -> dict:
     """
     Execute an R script on the R service.
     
+    Identical scripts share work: a script already running in R is joined
+    rather than re-sent, and a successful result is reused until the R data
+    version changes or the entry ages out.
+    
     Args:
         script: R code to execute (must return JSON-serializable result)
+        deadline: seconds allowed for queueing plus execution
+            (defaults to R_DEADLINE_SECONDS)
         
     Returns:
         dict with 'success' and 'result' or 'error'
+    
+    Raises:
+        Overloaded: when the request is shed by admission control
     """
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{R_SERVICE_URL}/execute",
-                json={"script": script}
+    script_hash = hashlib.sha256(script.strip().encode()).hexdigest()
+    version = await get_data_version()
+    cache_key = script_cache_key(version, script_hash)
+    
+    if version:
+        cached = _script_cache.get(cache_key)
+        if cached is not None:
+            result, duration = cached
+            _script_stats["hits"] += 1
+            _script_stats["saved_r_seconds"] += duration
+            cache_lookups.inc(cache="script", outcome="hit")
+            return result
+    
+    task = _inflight.get(script_hash)
+    if task is not None:
+        _script_stats["coalesced"] += 1
+        cache_lookups.inc(cache="script", outcome="coalesced")
+        started = time.perf_counter()
+        result = await asyncio.shield(task)
+        _script_stats["saved_r_seconds"] += time.perf_counter() - started
+        return result
+    
+    _script_stats["misses"] += 1
+    cache_lookups.inc(cache="script", outcome="miss")
+    task = asyncio.ensure_future(_post_r_script(script, deadline))
+    _share_inflight(script_hash, task)
+    started = time.perf_counter()
+    result = await asyncio.shield(task)
+    
+    duration = time.perf_counter() - started
+    _script_stats["r_seconds"] += duration
+    if version and result.get("success"):
+        _script_cache.set(cache_key, (result, duration), version)
+    
+    return result
+
+
+async def _post_r_script(script: str, deadline: Optional[float] = None) -> dict:
+    """
+    Send a single script to an R replica's /execute endpoint through admission
+    control, retrying transient failures and failing fast while the R breaker is open
+    """
+    deadline = deadline or R_DEADLINE_SECONDS
+    give_up_at = time.monotonic() + deadline
+    
+    async def attempt() -> dict:
+        remaining = give_up_at - time.monotonic()
+        async with r_admission.admit(remaining) as timeout:
+            try:
+                response = await r_pool.request(
+                    "POST",
+                    "/execute",
+                    json={"script": script},
+                    headers=R_EXECUTE_HEADERS,
+                    timeout=timeout
+                )
+            except httpx.ConnectTimeout:
+                raise RetryableError("R service connect timeout")
+            except httpx.TimeoutException:
+                raise  # a slow script fails this request without tripping the breaker
+            except httpx.TransportError as e:
+                raise RetryableError(str(e) or "R service unreachable")
+        
+        if response.status_code >= 500:
+            raise RetryableError(
+                f"R service returned {response.status_code}",
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
             )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {
-                    "success": False,
-                    "error": f"R service returned {response.status_code}"
-                }
-                
+        if response.status_code == 200:
+            return parse_execute_response(response)
+        return {
+            "success": False,
+            "error": f"R service returned {response.status_code}"
+        }
+    
+    try:
+        return await call_with_resilience("r_service", attempt, deadline=deadline)
     except httpx.TimeoutException:
         return {"success": False, "error": "R service timeout"}
+    except (RetryableError, CircuitOpen) as e:
+        return {"success": False, "error": str(e)}
+    except Overloaded:
+        raise
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+async def execute_r_scripts(scripts: list, deadline: Optional[float] = None) -> list:
+    """
+    Execute several R scripts, sending the ones that need R as a single
+    /execute_batch request (split every R_BATCH_MAX_SCRIPTS scripts).
+    
+    Cached results and scripts already running are reused exactly as in
+    execute_r_script, duplicates in the list run once, and scripts from the
+    batch are joinable by concurrent execute_r_script calls while it runs.
+    
+    Returns:
+        one {'success', 'result' | 'error'} dict per script, in order
+    
+    Raises:
+        Overloaded: when the batch is shed by admission control
+    """
+    version = await get_data_version()
+    results: list = [None] * len(scripts)
+    joined: list = []  # (index, task) for scripts another request is running
+    pending: dict = {}  # script hash -> (script, [indexes])
+    
+    for index, script in enumerate(scripts):
+        script_hash = hashlib.sha256(script.strip().encode()).hexdigest()
+        if script_hash in pending:
+            pending[script_hash][1].append(index)
+            continue
+        if version:
+            cached = _script_cache.get(script_cache_key(version, script_hash))
+            if cached is not None:
+                results[index] = cached[0]
+                _script_stats["hits"] += 1
+                _script_stats["saved_r_seconds"] += cached[1]
+                cache_lookups.inc(cache="script", outcome="hit")
+                continue
+        task = _inflight.get(script_hash)
+        if task is not None:
+            _script_stats["coalesced"] += 1
+            cache_lookups.inc(cache="script", outcome="coalesced")
+            joined.append((index, task))
+            continue
+        pending[script_hash] = (script, [index])
+    
+    if pending:
+        hashes = list(pending)
+        _script_stats["misses"] += len(hashes)
+        cache_lookups.inc(len(hashes), cache="script", outcome="miss")
+        chunks = [hashes[i:i + R_BATCH_MAX_SCRIPTS] for i in range(0, len(hashes), R_BATCH_MAX_SCRIPTS)]
+        started = time.perf_counter()
+        
+        # One task per chunk, plus a per-script view of it that others can join
+        tasks = {}
+        for chunk in chunks:
+            batch = asyncio.ensure_future(_post_r_batch([pending[h][0] for h in chunk], deadline))
+            for position, script_hash in enumerate(chunk):
+                tasks[script_hash] = asyncio.ensure_future(_batch_item(batch, position))
+                _share_inflight(script_hash, tasks[script_hash])
+        outcomes = await asyncio.gather(*(asyncio.shield(tasks[h]) for h in hashes))
+        
+        duration = time.perf_counter() - started
+        _script_stats["r_seconds"] += duration
+        for script_hash, result in zip(hashes, outcomes):
+            for index in pending[script_hash][1]:
+                results[index] = result
+            if version and result.get("success"):
+                _script_cache.set(script_cache_key(version, script_hash), (result, duration / len(hashes)), version)
+    
+    for index, task in joined:
+        results[index] = await asyncio.shield(task)
+    return results
+
+
+async def _batch_item(batch: asyncio.Future, position: int) -> dict:
+    return (await asyncio.shield(batch))[position]
+
+
+async def _post_r_batch(scripts: list, deadline: Optional[float] = None) -> list:
+    """
+    Send scripts to one R replica's /execute_batch endpoint as a single
+    admitted request. Falls back to concurrent /execute calls when the R
+    service predates the batch endpoint.
+    """
+    global _batch_supported
+    deadline = deadline or R_BATCH_DEADLINE_SECONDS
+    give_up_at = time.monotonic() + deadline
+    
+    async def one_by_one() -> list:
+        # Each script gets whatever is left of the batch's deadline
+        remaining = max(0.001, give_up_at - time.monotonic())
+        return list(await asyncio.gather(*(_post_r_script(script, remaining) for script in scripts)))
+    
+    if not _batch_supported:
+        return await one_by_one()
+    
+    async def attempt() -> Optional[list]:
+        remaining = give_up_at - time.monotonic()
+        async with r_admission.admit(remaining) as timeout:
+            try:
+                response = await r_pool.request(
+                    "POST",
+                    "/execute_batch",
+                    hedge=False,  # a hedge would run the whole batch twice
+                    json={"scripts": scripts},
+                    headers={"Accept": "application/json"},
+                    timeout=timeout
+                )
+            except httpx.ConnectTimeout:
+                raise RetryableError("R service connect timeout")
+            except httpx.TimeoutException:
+                raise  # a slow script fails this request without tripping the breaker
+            except httpx.TransportError as e:
+                raise RetryableError(str(e) or "R service unreachable")
+        
+        if response.status_code >= 500:
+            raise RetryableError(
+                f"R service returned {response.status_code}",
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+        if response.status_code == 404:
+            return None
+        if response.status_code == 200:
+            body = parse_execute_response(response)
+            if body.get("success") and len(body.get("results") or []) == len(scripts):
+                return body["results"]
+            error = body.get("error") or "R service returned an incomplete batch"
+            return [{"success": False, "error": error}] * len(scripts)
+        return [{"success": False, "error": f"R service returned {response.status_code}"}] * len(scripts)
+    
+    try:
+        results = await call_with_resilience("r_service", attempt, deadline=deadline)
+    except httpx.TimeoutException:
+        return [{"success": False, "error": "R service timeout"}] * len(scripts)
+    except (RetryableError, CircuitOpen) as e:
+        return [{"success": False, "error": str(e)}] * len(scripts)
+    except Overloaded:
+        raise
+    except Exception as e:
+        return [{"success": False, "error": str(e)}] * len(scripts)
+    
+    if results is None:
+        _batch_supported = False
+        return await one_by_one()
+    return results
+
+
+def parse_execute_response(response: httpx.Response) -> dict:
+    """
+    /execute body -> result dict. Arrow IPC bodies are always a successful
+    data frame and are read in place as an ArrowResult; anything else is the
+    JSON {success, result | error} envelope.
+    """
+    content_type = response.headers.get("content-type", "")
+    if content_type.startswith(ARROW_STREAM_MEDIA_TYPE):
+        _transport_stats["arrow"] += 1
+        _transport_stats["arrow_bytes"] += len(response.content)
+        r_payload_bytes.observe(len(response.content), format="arrow")
+        return {"success": True, "result": read_ipc_stream(response.content)}
+    _transport_stats["json"] += 1
+    _transport_stats["json_bytes"] += len(response.content)
+    r_payload_bytes.observe(len(response.content), format="json")
+    return response.json()
+
+
+def get_transport_stats() -> dict:
+    """How /execute results arrived: Arrow IPC vs JSON responses and bytes"""
+    return {"format": "arrow" if R_ACCEPT_ARROW else "json", **_transport_stats}
+
+
+def get_script_cache_stats() -> dict:
+    """Hit/miss/coalesce counters for the script-level cache"""
+    lookups = _script_stats["hits"] + _script_stats["misses"] + _script_stats["coalesced"]
+    saved = _script_stats["hits"] + _script_stats["coalesced"]
+    return {
+        "entries": len(_script_cache),
+        "in_flight": len(_inflight),
+        "hits": _script_stats["hits"],
+        "misses": _script_stats["misses"],
+        "coalesced": _script_stats["coalesced"],
+        "hit_rate": round(saved / lookups, 3) if lookups else 0.0,
+        "r_seconds": round(_script_stats["r_seconds"], 3),
+        "saved_r_seconds": round(_script_stats["saved_r_seconds"], 3)
+    }
+
+
 async def get_available_teams() -> list:
     """Get list of NFL teams from R service"""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{R_SERVICE_URL}/teams")
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("teams", [])
-            return []
+        response = await r_pool.request("GET", "/teams", hedge=False, timeout=10.0)
+        if response.status_code == 200:
+            data = response.json()
+            return data.get("teams", [])
+        return []
     except Exception:
         return []
 
@@ -69,10 +434,9 @@ async def get_available_teams() -> list:
 async def get_data_schema() -> dict:
     """Get nflfastR data schema from R service"""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{R_SERVICE_URL}/schema")
-            if response.status_code == 200:
-                return response.json()
-            return {"success": False}
+        response = await r_pool.request("GET", "/schema", hedge=False, timeout=10.0)
+        if response.status_code == 200:
+            return response.json()
+        return {"success": False}
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -0,0 +1,186 @@
+"""
+Gridiron R Replica Pool
+Least-outstanding routing, health-based ejection and hedged requests
+across one or more R Plumber replicas
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+import httpx
+
+from http_clients import get_http_client
+
+
+class RReplica:
+    """One R Plumber instance and its live routing state"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.healthy = True
+        self.requests = 0
+        self.failures = 0
+        self.latencies: deque = deque(maxlen=200)
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class RPool:
+    """
+    Routes each request to the healthy replica with the fewest outstanding
+    requests. Replicas that fail a request or /health probe are ejected and
+    re-admitted by the background prober once /health passes again.
+
+    With hedging enabled, a request still running after the pool's recent
+    latency percentile is duplicated to a second replica; the first
+    successful response wins and the other is cancelled.
+    """
+
+    def __init__(
+        self,
+        urls: list,
+        probe_interval: float = 10.0,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_min_delay: float = 0.05
+    ):
+        self.replicas = [RReplica(url) for url in urls]
+        self.probe_interval = probe_interval
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._probe_task: Optional[asyncio.Task] = None
+
+    # Routing
+
+    def pick(self, exclude: tuple = ()) -> Optional[RReplica]:
+        """Least-outstanding healthy replica; falls back to any replica if none are healthy"""
+        candidates = [r for r in self.replicas if r not in exclude]
+        healthy = [r for r in candidates if r.healthy] or candidates
+        if not healthy:
+            return None
+        return min(healthy, key=lambda r: r.outstanding)
+
+    def hedge_delay(self) -> float:
+        samples = sorted(s for r in self.replicas for s in r.latencies)
+        if len(samples) < 20:
+            return float("inf")  # not enough history to pick a sensible delay
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile))
+        return max(samples[index], self.hedge_min_delay)
+
+    async def _send(self, replica: RReplica, method: str, path: str, **kwargs) -> httpx.Response:
+        client = get_http_client("r_service")
+        replica.outstanding += 1
+        replica.requests += 1
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, f"{replica.url}{path}", **kwargs)
+        except httpx.TimeoutException as e:
+            # A slow script is not a dead replica; only a failed connect ejects
+            if isinstance(e, httpx.ConnectTimeout):
+                self._eject(replica)
+            raise
+        except (httpx.TransportError, OSError):
+            self._eject(replica)
+            raise
+        finally:
+            replica.outstanding -= 1
+        replica.latencies.append(time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _eject(replica: RReplica) -> None:
+        replica.failures += 1
+        replica.healthy = False  # ejected until the prober sees it healthy again
+
+    async def request(self, method: str, path: str, hedge: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """Send a request to the best replica, hedging to a second one if it runs long"""
+        primary = self.pick()
+        if primary is None:
+            raise httpx.ConnectError("No R replicas configured")
+
+        hedge = self.hedge if hedge is None else hedge
+        if not hedge or len(self.replicas) < 2:
+            return await self._send(primary, method, path, **kwargs)
+
+        first = asyncio.ensure_future(self._send(primary, method, path, **kwargs))
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.hedge_delay())
+        except asyncio.CancelledError:
+            first.cancel()  # asyncio.wait leaves its tasks running
+            raise
+        if done:
+            return first.result()
+
+        secondary = self.pick(exclude=(primary,))
+        if secondary is None or not secondary.healthy:
+            return await first
+
+        self.hedged += 1
+        second = asyncio.ensure_future(self._send(secondary, method, path, **kwargs))
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # Health
+
+    async def probe(self, replica: RReplica) -> Optional[dict]:
+        """Check one replica's /health and update its ejection state"""
+        try:
+            response = await get_http_client("r_service").get(f"{replica.url}/health", timeout=5.0)
+            payload = response.json() if response.status_code == 200 else None
+        except Exception:
+            payload = None
+        replica.healthy = bool(payload) and payload.get("status") == "ok"
+        return payload
+
+    async def probe_all(self) -> list:
+        return await asyncio.gather(*(self.probe(r) for r in self.replicas))
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self.probe_all()
+
+    async def start(self) -> None:
+        if self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+            self._probe_task = None
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [r.stats() for r in self.replicas],
+            "healthy": sum(1 for r in self.replicas if r.healthy),
+            "hedging": self.hedge,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
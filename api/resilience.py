@@ -0,0 +1,237 @@
+"""
+Gridiron Resilience
+Retry budgets with jittered exponential backoff and per-upstream circuit breakers
+"""
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+# Configuration
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+
+class RetryableError(Exception):
+    """A failed attempt that may succeed if tried again"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, upstream: str, retry_after: float):
+        self.upstream = upstream
+        self.retry_after = retry_after
+        super().__init__(f"{upstream} is unavailable (circuit open)")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+# ============================================
+# Retry Budget
+# ============================================
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent traffic so a struggling upstream
+    sees at most (1 + ratio)x load instead of max_attempts x load.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, min_tokens: float = 3.0):
+        self.ratio = ratio
+        self.min_tokens = min_tokens
+        self.max_tokens = max(min_tokens, 100 * ratio)
+        self._tokens = min_tokens
+
+    def record_request(self) -> None:
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+
+class RetryPolicy:
+    """Full-jitter exponential backoff that honours Retry-After"""
+
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        budget: Optional[RetryBudget] = None
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Delay before the next attempt, or None when it is not worth waiting"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+
+# ============================================
+# Circuit Breaker
+# ============================================
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and fails fast until
+    `reset_timeout` has passed; then lets one trial call through (half-open)
+    and closes again on success.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"  # 'closed', 'open', 'half_open'
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._trial_in_flight = False
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Free a half-open trial slot without judging the upstream"""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after_s": round(self.retry_after(), 1) if self.state == "open" else 0.0,
+        }
+
+
+_breakers: dict = {}
+_policies: dict = {}
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    if upstream not in _breakers:
+        _breakers[upstream] = CircuitBreaker(upstream)
+    return _breakers[upstream]
+
+
+def get_retry_policy(upstream: str) -> RetryPolicy:
+    if upstream not in _policies:
+        _policies[upstream] = RetryPolicy()
+    return _policies[upstream]
+
+
+def breaker_states() -> dict:
+    """Breaker state for every upstream seen so far, for /health"""
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
+
+
+async def call_with_resilience(
+    upstream: str,
+    attempt: Callable[[], Awaitable],
+    deadline: Optional[float] = None
+):
+    """
+    Run `attempt` under the upstream's breaker and retry policy.
+
+    `attempt` raises RetryableError for failures worth retrying; any other
+    exception is passed through without retrying or counting as a failure.
+    Raises CircuitOpen without calling the upstream while its breaker is open,
+    and re-raises the last RetryableError once retries are exhausted.
+    """
+    breaker = get_breaker(upstream)
+    policy = get_retry_policy(upstream)
+    give_up_at = time.monotonic() + deadline if deadline else None
+    policy.budget.record_request()
+
+    for attempt_number in range(policy.max_attempts):
+        if not breaker.allow():
+            raise CircuitOpen(upstream, breaker.retry_after())
+        try:
+            result = await attempt()
+        except RetryableError as e:
+            breaker.record_failure()
+            last_attempt = attempt_number == policy.max_attempts - 1
+            delay = policy.backoff(attempt_number, e.retry_after)
+            if (
+                last_attempt
+                or delay is None
+                or (give_up_at and time.monotonic() + delay >= give_up_at)
+                or not policy.budget.try_spend()
+            ):
+                raise
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            breaker.release_trial()
+            raise
+        breaker.record_success()
+        return result
@@ -0,0 +1,12 @@
+"""
+Shared test setup: api/ on the import path and a throwaway database
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/gridiron-test.db")
+os.environ.setdefault("RESULT_CACHE_BACKEND", "memory")
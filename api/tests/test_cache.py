@@ -0,0 +1,30 @@
+"""
+Result cache: stats-neutral presence checks
+"""
+
+import asyncio
+
+import pytest
+
+from cache import MemoryCacheBackend, ResultCache, SQLiteCacheBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "sqlite":
+        return ResultCache(SQLiteCacheBackend(path=str(tmp_path / "results.db")))
+    return ResultCache(MemoryCacheBackend())
+
+
+def test_contains_does_not_count_hits_or_misses(cache):
+    async def scenario():
+        assert not await cache.contains("Chiefs EPA", "v1")
+        await cache.set("Chiefs EPA", "v1", {"headline": "KC"})
+        assert await cache.contains("chiefs epa?", "v1")
+        assert not await cache.contains("Chiefs EPA", "v1", "duckdb:abc")
+        assert (cache.hits, cache.misses) == (0, 0)
+
+        assert await cache.get("Chiefs EPA", "v1") == {"headline": "KC"}
+        assert (cache.hits, cache.misses) == (1, 0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,155 @@
+"""
+Columnar engine: R string literals, dplyr verbs on DuckDB, fallback to R
+and result-cache scoping
+"""
+
+import asyncio
+import os
+
+import pytest
+
+import columnar
+from cache import MemoryCacheBackend, ResultCache
+from columnar import ColumnarEngine, cache_versions, execute_script, execute_scripts, tokenize
+
+duckdb = pytest.importorskip("duckdb")
+
+
+def test_string_literals_keep_non_ascii_and_unescape_r_sequences():
+    tokens = tokenize('x <- "Zé Nogueira"; y <- \'Ja\\\'Marr\'; z <- "tab\\there \\"quoted\\" ✓"')
+    strings = [value for kind, value in tokens if kind == "str"]
+    assert strings == ["Zé Nogueira", "Ja'Marr", 'tab\there "quoted" ✓']
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / "pbp.parquet")
+    duckdb.execute(f"""
+        COPY (SELECT * FROM (VALUES
+            ('KC', 'Zé Nogueira', 0.5::DOUBLE), ('KC', 'Zé Nogueira', -0.1), ('CIN', 'Ja''Marr Chase', 1.2)
+        ) AS t(posteam, receiver_player_name, epa)) TO '{path}' (FORMAT parquet)
+    """)
+    return path
+
+
+def test_non_ascii_filter_matches_rows(snapshot):
+    engine = ColumnarEngine(parquet_path=snapshot)
+    script = """pbp_data |>
+  filter(receiver_player_name == "Zé Nogueira") |>
+  summarize(plays = n(), epa = sum(epa, na.rm = TRUE))"""
+    assert engine.run(script) == {"success": True, "result": {"plays": 2, "epa": pytest.approx(0.4)}}
+
+
+def test_snapshot_version_follows_the_parquet_files(snapshot):
+    engine = ColumnarEngine(parquet_path=snapshot)
+    before = engine.snapshot_version()
+    os.utime(snapshot, ns=(1, 1))
+    assert engine.snapshot_version() != before
+
+    engine.load()
+    loaded = engine.snapshot_version()
+    os.utime(snapshot, ns=(2, 2))
+    assert engine.snapshot_version() == loaded  # the in-memory table is what answers
+
+
+@pytest.fixture
+def plays(tmp_path):
+    path = str(tmp_path / "plays.parquet")
+    duckdb.execute(f"""
+        COPY (SELECT * FROM (VALUES
+            ('KC', 1, 'pass', 0.8::DOUBLE), ('KC', 3, 'run', -0.4), ('KC', 3, 'pass', 1.1),
+            ('BUF', 1, 'pass', 0.2), ('BUF', 2, 'run', 0.1), ('CIN', 3, 'pass', -0.9)
+        ) AS t(posteam, down, play_type, epa)) TO '{path}' (FORMAT parquet)
+    """)
+    return ColumnarEngine(parquet_path=path)
+
+
+def run(engine: ColumnarEngine, script: str):
+    result = engine.run(script)
+    assert result["success"], result
+    return result["result"]
+
+
+def test_filter(plays):
+    assert run(plays, 'pbp_data |> filter(posteam == "KC", down == 3) |> select(play_type, epa)') == {
+        "play_type": ["run", "pass"], "epa": [-0.4, 1.1],
+    }
+
+
+def test_group_by_summarise(plays):
+    script = """pbp_data |>
+  group_by(posteam) |>
+  summarise(plays = n(), epa = mean(epa))"""
+    assert run(plays, script) == {
+        "posteam": ["BUF", "CIN", "KC"], "plays": [2, 1, 3], "epa": [0.15, -0.9, 0.5],
+    }
+
+
+def test_arrange_desc(plays):
+    result = run(plays, "pbp_data |> arrange(desc(epa)) |> select(posteam, epa)")
+    assert result["epa"] == [1.1, 0.8, 0.2, 0.1, -0.4, -0.9]
+    assert result["posteam"][:2] == ["KC", "KC"]
+
+
+def test_head_and_slice_head(plays):
+    assert run(plays, "pbp_data |> arrange(epa) |> head(2) |> select(epa)") == {"epa": [-0.9, -0.4]}
+    assert run(plays, "pbp_data |> arrange(desc(epa)) |> slice_head(n = 1) |> select(posteam, epa)") == {
+        "posteam": "KC", "epa": 1.1,
+    }
+
+
+def test_count(plays):
+    assert run(plays, "pbp_data |> count(play_type)") == {"play_type": ["pass", "run"], "n": [4, 2]}
+
+
+def test_unsupported_verb_falls_back_to_r(plays, monkeypatch):
+    sent = []
+
+    async def fake_r(script, deadline=None):
+        sent.append(script)
+        return {"success": True, "result": {"n": 1}}
+
+    async def fake_r_batch(scripts, deadline=None):
+        return [await fake_r(script) for script in scripts]
+
+    monkeypatch.setattr(columnar, "columnar_engine", plays)
+    monkeypatch.setattr(columnar, "execute_r_script", fake_r)
+    monkeypatch.setattr(columnar, "execute_r_scripts", fake_r_batch)
+    supported = "pbp_data |> count(posteam)"
+    unsupported = "pbp_data |> distinct(posteam)"
+
+    async def scenario():
+        assert (await execute_script(supported, "duckdb"))["engine"] == "duckdb"
+        assert await execute_script(unsupported, "duckdb") == {"success": True, "result": {"n": 1}, "engine": "r"}
+        assert [r["engine"] for r in await execute_scripts([unsupported, supported], "duckdb")] == ["r", "duckdb"]
+
+    asyncio.run(scenario())
+    assert sent == [unsupported, unsupported]
+    assert plays.unsupported == 2
+
+
+def test_duckdb_answers_are_cacheable_while_r_is_down(plays, monkeypatch):
+    async def r_down(force=False):
+        return None
+
+    monkeypatch.setattr(columnar, "columnar_engine", plays)
+    monkeypatch.setattr(columnar, "get_data_version", r_down)
+    versions = asyncio.run(cache_versions("duckdb"))
+    assert versions == {"duckdb": plays.snapshot_version()}
+    assert asyncio.run(cache_versions("r")) == {}
+
+
+def test_result_cache_entries_are_scoped_by_engine():
+    async def scenario():
+        cache = ResultCache(MemoryCacheBackend())
+        await cache.set("Chiefs EPA", "v1", {"headline": "from R"}, "r")
+        await cache.set("Bills EPA", "snap1", {"headline": "from DuckDB"}, "duckdb")
+        assert await cache.get("chiefs epa", "snap1", "duckdb") is None
+        assert await cache.get("chiefs epa", "v1", "r") == {"headline": "from R"}
+
+        # A new R data version purges R answers only
+        assert await cache.lookup("bills epa", {"duckdb": "snap1", "r": "v2"}) == {"headline": "from DuckDB"}
+        assert await cache.lookup("chiefs epa", {"duckdb": "snap1", "r": "v2"}) is None
+        assert len(cache.backend) == 1
+
+    asyncio.run(scenario())
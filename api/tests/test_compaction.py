@@ -0,0 +1,32 @@
+"""
+Result compaction: results that lose rows or text count as truncated
+"""
+
+from compaction import compact_result, get_compaction_stats
+
+
+def truncated_after(data, **kwargs) -> int:
+    before = get_compaction_stats()["truncated"]
+    compact_result(data, **kwargs)
+    return get_compaction_stats()["truncated"] - before
+
+
+def test_small_result_is_not_truncated():
+    assert truncated_after({"team": ["KC", "BUF"], "epa": [0.21, 0.18]}) == 0
+    assert truncated_after({"plays": 1043, "epa": 0.12}) == 0
+
+
+def test_row_cap_counts_as_truncated():
+    ranking = {"team": [f"T{i}" for i in range(32)], "epa": [i / 100 for i in range(32)]}
+    text = compact_result(ranking, top_n=10, bottom_n=5)
+    assert "17 rows omitted" in text
+    assert truncated_after(ranking, top_n=10, bottom_n=5) == 1
+
+
+def test_long_list_value_counts_as_truncated():
+    assert truncated_after({"weekly_epa": [0.1] * 18}, top_n=5, bottom_n=2) == 1
+
+
+def test_text_cut_counts_as_truncated():
+    wide = {f"column_{i}": "x" * 40 for i in range(50)}
+    assert truncated_after(wide, token_budget=50) == 1
@@ -0,0 +1,32 @@
+"""
+Content-coding negotiation
+"""
+
+import pytest
+
+import compression
+from compression import choose_encoding
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", ""),
+    ("gzip;q=0.0", ""),
+    ("gzip; q=0.00", ""),
+    ("gzip;q=0.5", "gzip"),
+    ("GZIP;Q=1", "gzip"),
+    ("gzip;q=abc", ""),
+    ("identity", ""),
+    ("", ""),
+])
+def test_gzip_q_values(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding(header) == expected
+
+
+def test_refused_brotli_falls_back_to_gzip(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert choose_encoding("br, gzip") == "br"
+    assert choose_encoding("br;q=0.0, gzip") == "gzip"
+    assert choose_encoding("br;q=0.000, gzip;q=0") == ""
@@ -0,0 +1,41 @@
+"""
+Aggregate cube with missing situation values
+"""
+
+import pytest
+
+from cube import AggregateCube
+
+
+@pytest.fixture
+def cube():
+    # down/qtr NA arrive as "NA" strings (jsonlite) or nulls, mixed with integers
+    return AggregateCube({
+        "posteam": ["KC", "KC", "KC", "BUF"],
+        "defteam": ["BUF", "BUF", "BUF", "KC"],
+        "season": [2025, 2025, 2025, 2025],
+        "down": [1, "NA", 3, None],
+        "qtr": [1, 2, "NA", 4],
+        "play_type": ["pass", "none", "run", "pass"],
+        "plays": [10, 2, 5, 7],
+        "epa_n": [10, 0, 5, 7],
+        "epa_sum": [1.0, 0, -0.5, 0.7],
+        "success_sum": [5, 0, 2, 3],
+        "cpoe_n": [10, 0, 0, 7],
+        "cpoe_sum": [20, 0, 0, -7],
+    })
+
+
+def test_breakdown_by_down_puts_missing_last(cube):
+    result = cube.query(by="down", posteam="KC")
+    assert [group["down"] for group in result["groups"]] == [1, 3, None]
+    assert [group["plays"] for group in result["groups"]] == [10, 5, 2]
+    assert cube.query(by="down")["groups"][-1] == {
+        "down": None, "plays": 9, "epa_per_play": 0.1, "success_rate": 0.4286, "cpoe": -1.0
+    }
+
+
+def test_values_skip_missing(cube):
+    assert cube.values("qtr") == [1, 2, 4]
+    assert cube.values("down") == [1, 3]
+    assert cube.query(down=3)["plays"] == 5
@@ -0,0 +1,81 @@
+"""
+Job queue: submitted jobs run with their requested engine; leases keep
+in-progress jobs from being requeued
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import models
+from jobs import JobQueue, MemoryJobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request):
+    if request.param == "sqlite":
+        models.init_db()
+        return SQLiteJobStore()
+    return MemoryJobStore()
+
+
+def test_job_runs_on_requested_engine():
+    async def scenario():
+        calls = []
+
+        async def runner(query, engine):
+            calls.append((query, engine))
+            return {"headline": query}
+
+        queue = JobQueue(MemoryJobStore(), runner, workers=1)
+        await queue.start()
+        try:
+            job = await queue.submit("Chiefs EPA", "duckdb")
+            assert job["engine"] == "duckdb"
+            done = await queue.get(job["id"], wait=2)
+            default = await queue.get((await queue.submit("Bills EPA"))["id"], wait=2)
+        finally:
+            await queue.stop()
+        assert done["status"] == "done" and default["status"] == "done"
+        assert calls == [("Chiefs EPA", "duckdb"), ("Bills EPA", None)]
+
+    asyncio.run(scenario())
+
+
+def test_running_job_keeps_its_lease_while_in_progress(store):
+    async def scenario():
+        release = asyncio.Event()
+
+        async def runner(query, engine):
+            await release.wait()
+            return {"headline": query}
+
+        queue = JobQueue(store, runner, workers=1, lease_seconds=0.3)
+        await queue.start()
+        try:
+            job = await queue.submit("Chiefs EPA")
+            await asyncio.sleep(0.7)  # more than two leases
+            requeued = await store.recover(datetime.utcnow())
+            running = await store.get(job["id"])
+            release.set()
+            done = await queue.get(job["id"], wait=2)
+        finally:
+            await queue.stop()
+        assert job["id"] not in requeued
+        assert running["status"] == "running" and running["claimed_by"] == queue.owner
+        assert done["status"] == "done"
+
+    asyncio.run(scenario())
+
+
+def test_expired_lease_is_requeued(store):
+    async def scenario():
+        job = await store.create("job-dead-worker", "Bills EPA")
+        assert await store.claim(job["id"], "dead-worker", datetime.utcnow() - timedelta(seconds=1))
+        assert job["id"] in await store.recover(datetime.utcnow())
+        requeued = await store.get(job["id"])
+        assert requeued["status"] == "queued" and requeued["claimed_by"] is None
+        assert not await store.renew(job["id"], "dead-worker", datetime.utcnow())
+
+    asyncio.run(scenario())
@@ -0,0 +1,71 @@
+"""
+Schema migrations for databases created by earlier releases
+"""
+
+import asyncio
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import history
+import models
+
+BASELINE_QUERY_HISTORY = """
+CREATE TABLE query_history (
+    id VARCHAR NOT NULL PRIMARY KEY,
+    user_id VARCHAR NOT NULL,
+    query VARCHAR NOT NULL,
+    response_headline VARCHAR,
+    created_at DATETIME
+)
+"""
+
+
+def test_analysis_jobs_gain_engine_and_lease_columns(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE analysis_jobs (id VARCHAR PRIMARY KEY, query VARCHAR NOT NULL, status VARCHAR NOT NULL, "
+            "result TEXT, error VARCHAR, created_at DATETIME, updated_at DATETIME)"
+        ))
+    monkeypatch.setattr(models, "engine", engine)
+
+    models.init_db()
+
+    columns = {c["name"] for c in inspect(engine).get_columns("analysis_jobs")}
+    assert {"engine", "claimed_by", "lease_expires_at"} <= columns
+
+
+def test_query_history_upgrade_lets_history_flush(tmp_path, monkeypatch):
+    path = tmp_path / "baseline.db"
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text(BASELINE_QUERY_HISTORY))
+        conn.execute(text(
+            "INSERT INTO query_history (id, user_id, query) VALUES ('old', 'anonymous', 'Chiefs EPA')"
+        ))
+    monkeypatch.setattr(models, "engine", engine)
+
+    models.init_db()
+    models.init_db()  # idempotent
+
+    inspector = inspect(engine)
+    columns = {c["name"] for c in inspector.get_columns("query_history")}
+    assert {"latency_ms", "cache_hit", "error"} <= columns
+    assert "ix_query_history_user_created" in {i["name"] for i in inspector.get_indexes("query_history")}
+
+    async def flush() -> tuple:
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        monkeypatch.setattr(history, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+        recorder = history.HistoryRecorder()
+        recorder.record("Bills 3rd down", latency_ms=120, cache_hit=True)
+        written = await recorder.flush()
+        page = await history.get_user_history("anonymous")
+        await async_engine.dispose()
+        return written, recorder.stats(), page
+
+    written, stats, page = asyncio.run(flush())
+    assert written == 1
+    assert stats["failed_flushes"] == 0
+    assert [item["query"] for item in page["items"]] == ["Bills 3rd down", "Chiefs EPA"]
+    assert page["items"][0]["cache_hit"] is True
@@ -0,0 +1,33 @@
+"""
+OAuth state stores stay within max_entries
+"""
+
+import asyncio
+
+import pytest
+
+import models
+from oauth_state import MemoryOAuthStateStore, SQLiteOAuthStateStore, _SweptStore
+
+
+def test_base_store_requires_sweep():
+    with pytest.raises(TypeError):
+        _SweptStore(600, 10, 60)
+
+
+@pytest.mark.parametrize("store_cls", [MemoryOAuthStateStore, SQLiteOAuthStateStore])
+def test_put_evicts_oldest_beyond_max_entries(store_cls):
+    models.init_db()
+
+    async def scenario():
+        store = store_cls(max_entries=3, sweep_interval=3600)
+        for i in range(5):
+            await store.put(f"{store_cls.__name__}-{i}", "google")
+            await asyncio.sleep(0.002)  # distinct created_at
+        stats = store.stats()
+        assert stats["size"] == 3
+        assert stats["evicted"] == 2
+        assert await store.pop(f"{store_cls.__name__}-0") is None
+        assert await store.pop(f"{store_cls.__name__}-4") == {"provider": "google", "code_verifier": None}
+
+    asyncio.run(scenario())
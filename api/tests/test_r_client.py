@@ -0,0 +1,74 @@
+"""
+R client: which timeouts count against the R circuit breaker, and sharing
+of in-flight scripts
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import r_client
+import resilience
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "_policies", {})
+    return resilience.get_breaker("r_service")
+
+
+def raising(error):
+    async def request(method, path, **kwargs):
+        raise error(f"{error.__name__}", request=httpx.Request(method, "http://r0" + path))
+    return request
+
+
+def test_read_timeout_fails_request_without_tripping_breaker(breaker, monkeypatch):
+    monkeypatch.setattr(r_client.r_pool, "request", raising(httpx.ReadTimeout))
+    result = asyncio.run(r_client._post_r_script("1", deadline=5))
+    assert result == {"success": False, "error": "R service timeout"}
+    assert breaker.consecutive_failures == 0
+    assert breaker.state == "closed"
+
+
+def test_connect_timeout_counts_as_breaker_failure(breaker, monkeypatch):
+    resilience._policies["r_service"] = resilience.RetryPolicy(base_delay=0.0)
+    monkeypatch.setattr(r_client.r_pool, "request", raising(httpx.ConnectTimeout))
+    results = asyncio.run(r_client._post_r_batch(["1", "2"], deadline=5))
+    assert [r["success"] for r in results] == [False, False]
+    assert breaker.consecutive_failures >= 1
+
+
+def test_inflight_entry_outlives_a_cancelled_first_caller(monkeypatch):
+    release = asyncio.Event()
+    sent = []
+
+    async def no_version(force=False):
+        return None
+
+    async def slow_post(script, deadline=None):
+        sent.append(script)
+        await release.wait()
+        return {"success": True, "result": 1}
+
+    monkeypatch.setattr(r_client, "get_data_version", no_version)
+    monkeypatch.setattr(r_client, "_post_r_script", slow_post)
+
+    async def scenario():
+        first = asyncio.ensure_future(r_client.execute_r_script("x <- 1"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        assert len(r_client._inflight) == 1  # the request is still running in R
+
+        second = asyncio.ensure_future(r_client.execute_r_script("x <- 1"))
+        await asyncio.sleep(0.01)
+        release.set()
+        assert await second == {"success": True, "result": 1}
+        await asyncio.sleep(0)
+        assert r_client._inflight == {}
+
+    asyncio.run(scenario())
+    assert sent == ["x <- 1"]
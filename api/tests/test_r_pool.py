@@ -0,0 +1,147 @@
+"""
+R replica pool: least-outstanding routing, ejection and re-admission, hedging
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import r_pool
+from r_pool import RPool
+
+URLS = ["http://r0", "http://r1", "http://r2"]
+
+
+class FakeReplicas:
+    """httpx transport standing in for R replicas, keyed by host"""
+
+    def __init__(self):
+        self.served: list = []
+        self.down: set = set()
+        self.timing_out: set = set()
+        self.delay: dict = {}
+        self.holds: dict = {}  # host -> Event that /execute waits on
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host in self.down:
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.path == "/health":
+            return httpx.Response(200, json={"status": "ok", "data_loaded": True})
+        if host in self.timing_out:
+            raise httpx.ReadTimeout("read timed out", request=request)
+        self.served.append(host)
+        if host in self.holds:
+            await self.holds[host].wait()
+        await asyncio.sleep(self.delay.get(host, 0.0))
+        return httpx.Response(200, json={"success": True, "replica": host})
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    fake = FakeReplicas()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handle))
+    monkeypatch.setattr(r_pool, "get_http_client", lambda name: client)
+    return fake
+
+
+def execute(pool: RPool, **kwargs):
+    return pool.request("POST", "/execute", json={"script": "1"}, **kwargs)
+
+
+def test_routes_to_least_outstanding_replica(replicas):
+    async def scenario():
+        pool = RPool(URLS)
+        replicas.holds = {host: asyncio.Event() for host in ("r0", "r1", "r2")}
+        held = [asyncio.ensure_future(execute(pool)) for _ in URLS]
+        await asyncio.sleep(0.05)
+        assert sorted(replicas.served) == ["r0", "r1", "r2"]
+        assert [r.outstanding for r in pool.replicas] == [1, 1, 1]
+
+        # r1 finishes first, so it is the only replica with nothing in flight
+        replicas.holds["r1"].set()
+        await asyncio.wait(held, return_when=asyncio.FIRST_COMPLETED)
+        assert [r.outstanding for r in pool.replicas] == [1, 0, 1]
+        assert (await execute(pool)).json()["replica"] == "r1"
+
+        for event in replicas.holds.values():
+            event.set()
+        await asyncio.gather(*held)
+
+    asyncio.run(scenario())
+
+
+def test_failed_replica_is_ejected_then_readmitted_by_probe(replicas):
+    async def scenario():
+        pool = RPool(URLS[:2])
+        replicas.down.add("r0")
+        with pytest.raises(httpx.ConnectError):
+            await execute(pool)
+        assert not pool.replicas[0].healthy
+        assert pool.replicas[0].failures == 1
+
+        for _ in range(3):
+            assert (await execute(pool)).json()["replica"] == "r1"
+
+        await pool.probe_all()
+        assert not pool.replicas[0].healthy  # still down
+
+        replicas.down.clear()
+        await pool.probe_all()
+        assert pool.replicas[0].healthy
+        assert (await execute(pool)).json()["replica"] == "r0"
+
+    asyncio.run(scenario())
+
+
+def test_slow_script_timeout_does_not_eject(replicas):
+    async def scenario():
+        pool = RPool(URLS[:2])
+        replicas.timing_out.add("r0")
+        with pytest.raises(httpx.ReadTimeout):
+            await execute(pool)
+        assert pool.replicas[0].healthy
+        assert pool.stats()["healthy"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_hedged_request_wins_on_slow_replica(replicas):
+    async def scenario():
+        pool = RPool(URLS[:2], hedge=True, hedge_min_delay=0.02)
+        for _ in range(20):  # latency history for the hedge delay
+            await execute(pool)
+        assert pool.hedged == 0
+
+        replicas.delay["r0"] = 2.0
+        started = time.perf_counter()
+        response = await execute(pool)
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0)  # let the cancelled attempt unwind
+
+        assert response.json()["replica"] == "r1"
+        assert elapsed < 1.0
+        assert pool.hedged == 1
+        assert pool.hedge_wins == 1
+        assert [r.outstanding for r in pool.replicas] == [0, 0]  # the slow attempt was cancelled
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_cancels_attempt_before_hedge(replicas):
+    async def scenario():
+        pool = RPool(URLS[:2], hedge=True, hedge_min_delay=5.0)
+        replicas.delay["r0"] = replicas.delay["r1"] = 2.0
+        caller = asyncio.ensure_future(execute(pool))
+        await asyncio.sleep(0.05)
+        assert sum(r.outstanding for r in pool.replicas) == 1
+
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)  # let the cancelled attempt unwind
+        assert [r.outstanding for r in pool.replicas] == [0, 0]
+
+    asyncio.run(scenario())
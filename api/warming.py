@@ -0,0 +1,181 @@
+"""
+Gridiron Cache Warming
+Re-runs the most popular queries whenever the R data version changes
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from admission import AdmissionGate, Overloaded
+from cache import normalize_query
+from chains import analyze_and_cache, result_cache
+from columnar import cache_versions
+from models import AsyncSessionLocal, QueryHistory
+from r_client import get_data_version, r_admission
+
+# Configuration
+CACHE_WARMING_ENABLED = os.getenv("CACHE_WARMING_ENABLED", "true").lower() == "true"
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "20"))
+WARM_MIN_COUNT = int(os.getenv("WARM_MIN_COUNT", "2"))  # asks in the lookback window
+WARM_LOOKBACK_DAYS = int(os.getenv("WARM_LOOKBACK_DAYS", "7"))
+WARM_CHECK_INTERVAL = float(os.getenv("WARM_CHECK_INTERVAL", "60"))
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", "1"))
+WARM_IDLE_POLL = float(os.getenv("WARM_IDLE_POLL", "0.5"))
+
+
+async def top_queries(
+    limit: int = WARM_TOP_N,
+    min_count: int = WARM_MIN_COUNT,
+    lookback_days: int = WARM_LOOKBACK_DAYS
+) -> list:
+    """
+    Most-asked successful queries in the lookback window, most popular first.
+    Phrasings that share a result-cache entry are counted together and
+    represented by their most common wording.
+    """
+    since = datetime.utcnow() - timedelta(days=lookback_days)
+    stmt = (
+        select(QueryHistory.query, func.count().label("asks"))
+        .where(QueryHistory.created_at >= since, QueryHistory.error.is_(None))
+        .group_by(QueryHistory.query)
+        .order_by(func.count().desc())
+        .limit(limit * 5)
+    )
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(stmt)).all()
+
+    groups: dict = {}  # normalized query -> [total asks, wording]
+    for query, asks in rows:  # most asked wording of each group comes first
+        group = groups.setdefault(normalize_query(query), [0, query])
+        group[0] += asks
+    ranked = sorted(groups.values(), key=lambda group: -group[0])
+    return [query for asks, query in ranked if asks >= min_count][:limit]
+
+
+class CacheWarmer:
+    """
+    Background task that watches the R data version fingerprint and, when it
+    changes (including the first version seen after a restart), re-runs the
+    top queries from QueryHistory so the result cache is hot before users ask.
+
+    Warming is low priority: at most `concurrency` queries run at once, each
+    waits until the R admission gate has a free slot and no queue, and a
+    query shed by admission control is skipped rather than retried.
+    """
+
+    def __init__(
+        self,
+        gate: AdmissionGate = r_admission,
+        top_n: int = WARM_TOP_N,
+        interval: float = WARM_CHECK_INTERVAL,
+        concurrency: int = WARM_CONCURRENCY
+    ):
+        self.gate = gate
+        self.top_n = top_n
+        self.interval = interval
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+        self._warmed_version: Optional[str] = None
+        self._pending_hits: set = set()  # normalized queries warmed for the current version
+        self.runs = 0
+        self.warmed = 0
+        self.already_cached = 0
+        self.failed = 0
+        self.skipped_busy = 0
+        self.prevented_cold_misses = 0
+        self.last_run: Optional[dict] = None
+
+    def note_hit(self, query: str) -> None:
+        """Call on a live result-cache hit; the first hit on a warmed entry was a cold miss prevented"""
+        key = normalize_query(query)
+        if key in self._pending_hits:
+            self._pending_hits.discard(key)
+            self.prevented_cold_misses += 1
+
+    async def _idle_slot(self) -> None:
+        """Wait until live traffic leaves the R gate a free slot"""
+        while self.gate.waiting or self.gate.active >= self.gate.concurrency:
+            await asyncio.sleep(WARM_IDLE_POLL)
+
+    async def _warm_one(self, query: str, versions: dict, slots: asyncio.Semaphore) -> None:
+        async with slots:
+            for scope, version in versions.items():
+                if await result_cache.contains(query, version, scope):
+                    self.already_cached += 1
+                    return
+            await self._idle_slot()
+            try:
+                memo = await analyze_and_cache(query, versions)
+            except Overloaded:
+                self.skipped_busy += 1
+                return
+            except Exception:
+                self.failed += 1
+                return
+        if memo.get("error"):
+            self.failed += 1
+            return
+        self.warmed += 1
+        self._pending_hits.add(normalize_query(query))
+
+    async def warm(self, version: str) -> int:
+        """Warm the top queries for `version`; returns how many were looked at"""
+        queries = await top_queries(self.top_n)
+        if not queries:
+            return 0
+
+        started = time.perf_counter()
+        warmed_before = self.warmed
+        self._pending_hits.clear()  # entries for the old version are gone
+        versions = {**await cache_versions(), "r": version}
+        slots = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._warm_one(query, versions, slots) for query in queries))
+
+        self.runs += 1
+        self.last_run = {
+            "version": version,
+            "queries": len(queries),
+            "warmed": self.warmed - warmed_before,
+            "seconds": round(time.perf_counter() - started, 2),
+            "finished_at": datetime.utcnow().isoformat(),
+        }
+        return len(queries)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                version = await get_data_version()
+                # History may still be empty; keep checking until there is something to warm
+                if version and version != self._warmed_version and await self.warm(version):
+                    self._warmed_version = version
+            except Exception:
+                pass  # try again next interval
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if CACHE_WARMING_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": CACHE_WARMING_ENABLED,
+            "runs": self.runs,
+            "warmed": self.warmed,
+            "already_cached": self.already_cached,
+            "failed": self.failed,
+            "skipped_busy": self.skipped_busy,
+            "prevented_cold_misses": self.prevented_cold_misses,
+            "awaiting_first_hit": len(self._pending_hits),
+            "last_run": self.last_run,
+        }
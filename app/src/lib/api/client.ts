@@ -23,6 +23,21 @@ export interface AnalyzeResponse {
 	insights?: string[];     // Key insights/takeaways
 	raw_data?: Record<string, unknown>;
 	error?: string;
+	timings?: StageTimings;  // Per-stage milliseconds from Server-Timing
+}
+
+// Milliseconds per pipeline stage (chain_a, execute, chain_b, total)
+export type StageTimings = Record<string, number>;
+
+export function parseServerTiming(header: string | null): StageTimings | undefined {
+	if (!header) return undefined;
+	const timings: StageTimings = {};
+	for (const entry of header.split(',')) {
+		const [name, ...params] = entry.trim().split(';');
+		const dur = params.find((p) => p.trim().startsWith('dur='));
+		if (name && dur) timings[name] = Number(dur.trim().slice(4));
+	}
+	return timings;
 }
 
 export async function analyzeQuery(query: string): Promise<AnalyzeResponse> {
@@ -38,7 +53,136 @@ export async function analyzeQuery(query: string): Promise<AnalyzeResponse> {
 		throw new Error(`API error: ${response.status}`);
 	}
 
-	return response.json();
+	const result: AnalyzeResponse = await response.json();
+	result.timings = parseServerTiming(response.headers.get('Server-Timing'));
+	return result;
+}
+
+export type AnalyzeStreamEvent =
+	| { event: 'script'; data: { r_script: string; route: string } }
+	| { event: 'executing'; data: Record<string, never> }
+	| { event: 'r_result'; data: { columns: string[] } }
+	| { event: 'token'; data: { text: string } }
+	| { event: 'chart'; data: ChartConfig }
+	| { event: 'timing'; data: StageTimings }
+	| { event: 'memo'; data: AnalyzeResponse };
+
+// Streaming variant of analyzeQuery: reports each pipeline stage as it happens
+// and resolves with the final memo (same shape as analyzeQuery).
+export async function analyzeQueryStream(
+	query: string,
+	onEvent?: (event: AnalyzeStreamEvent) => void
+): Promise<AnalyzeResponse> {
+	const response = await fetch(`${API_BASE}/analyze/stream`, {
+		method: 'POST',
+		headers: {
+			'Content-Type': 'application/json',
+			Accept: 'text/event-stream',
+		},
+		body: JSON.stringify({ query }),
+	});
+
+	if (!response.ok || !response.body) {
+		throw new Error(`API error: ${response.status}`);
+	}
+
+	let memo: AnalyzeResponse | null = null;
+	let timings: StageTimings | undefined;
+
+	for await (const event of readEvents<AnalyzeStreamEvent>(response.body)) {
+		onEvent?.(event);
+		if (event.event === 'timing') timings = event.data;
+		if (event.event === 'memo') memo = event.data;
+	}
+
+	if (!memo) {
+		throw new Error('Stream ended without a result');
+	}
+	memo.timings = timings;
+	return memo;
+}
+
+export interface BatchItem {
+	index: number;
+	query: string;
+	cache_hit: boolean;
+	memo: AnalyzeResponse;
+}
+
+export interface BatchSummary {
+	total: number;
+	unique: number;
+	cache_hits: number;
+	errors: number;
+	elapsed_ms: number;
+	timings: StageTimings;
+	error?: string;
+}
+
+// Analyze many queries in one request (dashboards). onItem fires as each
+// query completes, in completion order; resolves with the memos in query order.
+export async function analyzeBatch(
+	queries: string[],
+	onItem?: (item: BatchItem) => void
+): Promise<{ items: AnalyzeResponse[]; summary: BatchSummary }> {
+	const response = await fetch(`${API_BASE}/analyze/batch`, {
+		method: 'POST',
+		headers: {
+			'Content-Type': 'application/json',
+			Accept: 'text/event-stream',
+		},
+		body: JSON.stringify({ queries }),
+	});
+
+	if (!response.ok || !response.body) {
+		throw new Error(`API error: ${response.status}`);
+	}
+
+	const items: AnalyzeResponse[] = new Array(queries.length);
+	let summary: BatchSummary | null = null;
+
+	for await (const event of readEvents<
+		{ event: 'item'; data: BatchItem } | { event: 'done'; data: BatchSummary }
+	>(response.body)) {
+		if (event.event === 'item') {
+			items[event.data.index] = event.data.memo;
+			onItem?.(event.data);
+		}
+		if (event.event === 'done') summary = event.data;
+	}
+
+	if (!summary) {
+		throw new Error('Stream ended without a result');
+	}
+	return { items, summary };
+}
+
+// Parse a Server-Sent Events body into { event, data } objects
+async function* readEvents<T>(body: ReadableStream<Uint8Array>): AsyncGenerator<T> {
+	const reader = body.pipeThrough(new TextDecoderStream()).getReader();
+	let buffer = '';
+
+	while (true) {
+		const { value, done } = await reader.read();
+		if (done) break;
+		buffer += value;
+
+		let boundary: number;
+		while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+			const raw = buffer.slice(0, boundary);
+			buffer = buffer.slice(boundary + 2);
+
+			let name = 'message';
+			let data = '';
+			for (const line of raw.split('\n')) {
+				if (line.startsWith('event: ')) name = line.slice(7);
+				else if (line.startsWith('data: ')) data += line.slice(6);
+			}
+			if (!data) continue;
+
+			yield { event: name, data: JSON.parse(data) } as T;
+		}
+	}
 }
 
 export async function checkHealth(): Promise<boolean> {